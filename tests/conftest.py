@@ -368,6 +368,43 @@ def create_dir(tmp_path):
         return content_path
     return functools.partial(_create_dir, tmp_path)
 
+@pytest.fixture
+def piece_size_min():
+    """Smallest piece size, which keeps test content small"""
+    return torf.Torrent.piece_size_min_default
+
+@pytest.fixture
+def create_content(create_dir, piece_size_min):
+    """Create directory "content" with the files "a.jpg", "b.jpg", etc that are `piece_counts` pieces long"""
+    def _create_content(*piece_counts):
+        return create_dir('content', *(
+            (f'{name}.jpg', piece_size_min * piece_count)
+            for name, piece_count in zip('abcdefghijklmnopqrstuvwxyz', piece_counts)
+        ))
+    return _create_content
+
+@pytest.fixture
+def content(create_content):
+    return create_content(2.5, 3.2, 1.7)
+
+@pytest.fixture
+def torrent(content, piece_size_min):
+    t = torf.Torrent(content, piece_size=piece_size_min)
+    assert t.generate() is True
+    return t
+
+@pytest.fixture
+def corrupt_file():
+    """Change the byte at `position` in `filepath` and the modification time"""
+    def _corrupt_file(filepath, position=-1):
+        data = bytearray(filepath.read_bytes())
+        data[position] ^= 0xff
+        stat = os.stat(filepath)
+        filepath.write_bytes(data)
+        # Make sure mtime changes even on file systems with coarse timestamps
+        os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    return _corrupt_file
+
 
 @pytest.fixture
 def generated_singlefile_torrent(create_torrent, singlefile_content):
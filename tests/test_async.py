@@ -0,0 +1,137 @@
+import asyncio
+import os
+import shutil
+import threading
+
+import pytest
+
+import torf
+
+
+@pytest.fixture
+def content(create_content):
+    # Enough pieces to make cancelling and stopping in the middle possible
+    return create_content(20.5, 30.2, 10.7)
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_agenerate_returns_generate_result(content, piece_size_min):
+    t = torf.Torrent(content, piece_size=piece_size_min)
+    assert _run(_await(t.agenerate())) is True
+    exp_hashes = t.hashes
+    del t.metainfo['info']['pieces']
+    assert t.generate() is True
+    assert t.hashes == exp_hashes
+
+
+async def _await(progress):
+    return await progress
+
+
+async def _collect(progress):
+    events = [event async for event in progress]
+    return events, await progress
+
+
+def test_agenerate_yields_progress(content, piece_size_min):
+    t = torf.Torrent(content, piece_size=piece_size_min)
+    events, result = _run(_collect(t.agenerate()))
+    assert result is True
+    assert [event[1:] for event in events] == [(i, t.pieces) for i in range(1, t.pieces + 1)]
+    assert events[-1][0] == content / 'c.jpg'
+
+
+def test_averify_yields_progress(content, piece_size_min):
+    t = torf.Torrent(content, piece_size=piece_size_min)
+    assert t.generate() is True
+    events, result = _run(_collect(t.averify(content, readers=2)))
+    assert result is True
+    assert [event[1:3] for event in events] == [(i, t.pieces) for i in range(1, t.pieces + 1)]
+    assert sorted(event[3] for event in events) == list(range(t.pieces))
+    assert all(event[5] is None for event in events)
+
+
+def test_averify_reports_exceptions_as_events(content, tmp_path, piece_size_min):
+    t = torf.Torrent(content, piece_size=piece_size_min)
+    assert t.generate() is True
+    verify_path = tmp_path / 'verify'
+    shutil.copytree(content, verify_path)
+    os.remove(verify_path / 'b.jpg')
+
+    events, result = _run(_collect(t.averify(verify_path)))
+    assert result is False
+    exceptions = [event[-1] for event in events if event[-1] is not None]
+    assert [str(e) for e in exceptions] == [f'{verify_path / "b.jpg"}: No such file or directory']
+
+
+def test_averify_raises_exceptions_if_not_iterated(content, tmp_path, piece_size_min):
+    t = torf.Torrent(content, piece_size=piece_size_min)
+    assert t.generate() is True
+    verify_path = tmp_path / 'verify'
+    shutil.copytree(content, verify_path)
+    os.remove(verify_path / 'b.jpg')
+
+    with pytest.raises(torf.ReadError, match=rf'^{verify_path / "b.jpg"}: No such file or directory$'):
+        _run(_await(t.averify(verify_path)))
+
+
+def test_averify_filesize(content, tmp_path, piece_size_min):
+    t = torf.Torrent(content, piece_size=piece_size_min)
+    assert t.generate() is True
+    assert _run(_await(t.averify_filesize(content))) is True
+
+    verify_path = tmp_path / 'verify'
+    shutil.copytree(content, verify_path)
+    with open(verify_path / 'c.jpg', 'ab') as f:
+        f.write(b'more data')
+    events, result = _run(_collect(t.averify_filesize(verify_path)))
+    assert result is False
+    assert [event[2:4] for event in events] == [(1, 3), (2, 3), (3, 3)]
+    assert isinstance(events[-1][-1], torf.VerifyFileSizeError)
+
+
+def test_cancel_stops_reader(content, mocker, piece_size_min):
+    t = torf.Torrent(content, piece_size=piece_size_min)
+    assert t.generate() is True
+    stop_spy = mocker.spy(torf._generate.Reader, 'stop')
+
+    async def verify():
+        progress = t.averify(content, threads=1)
+        events = []
+        async for event in progress:
+            events.append(event)
+            if len(events) == 3:
+                progress.cancel()
+                assert stop_spy.call_count >= 1
+        return events, await progress
+
+    events, result = _run(verify())
+    assert result is False
+    assert len(events) < t.pieces
+
+
+def test_task_cancellation_stops_generate(content, mocker, piece_size_min):
+    t = torf.Torrent(content, piece_size=piece_size_min)
+    stop_spy = mocker.spy(torf._generate.Reader, 'stop')
+    threads_before = set(threading.enumerate())
+
+    async def generate():
+        progress = t.agenerate(threads=1)
+        task = asyncio.ensure_future(_collect(progress))
+        async for event in progress:
+            break
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    _run(generate())
+    assert stop_spy.call_count >= 1
+    assert 'pieces' not in t.metainfo['info']
+    # Worker thread has finished
+    for thread in set(threading.enumerate()) - threads_before:
+        if thread.name == 'async':
+            thread.join(timeout=1)
+            assert not thread.is_alive()
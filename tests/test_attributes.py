@@ -46,6 +46,40 @@ def test_path_is_directory_with_empty_file(create_torrent, tmp_path):
     for key in ('name', 'files', 'length', 'pieces'):
         assert key not in torrent.metainfo['info']
 
+def test_path_excludes_empty_files_regardless_of_working_directory(create_torrent, tmp_path):
+    (tmp_path / 'content').mkdir()
+    (tmp_path / 'content' / 'empty_file').write_text('')
+    (tmp_path / 'content' / 'file').write_text('not empty')
+    cwd = os.getcwd()
+    try:
+        for workdir in (tmp_path, tmp_path / 'content', '/'):
+            os.chdir(workdir)
+            torrent = create_torrent(path=tmp_path / 'content')
+            assert torrent.metainfo['info']['files'] == [{'path': ['file'], 'length': 9}]
+    finally:
+        os.chdir(cwd)
+
+def test_path_with_scan_threads(create_torrent, multifile_content):
+    exp_files = create_torrent(path=multifile_content.path).files
+    torrent = create_torrent(path=multifile_content.path, scan_threads=4)
+    assert torrent.scan_threads == 4
+    assert torrent.files == exp_files
+    with pytest.raises(ValueError, match=r'^scan_threads must be positive: 0$'):
+        torrent.scan_threads = 0
+
+def test_path_does_not_scan_excluded_or_hidden_directories(create_torrent, tmp_path, mocker):
+    content = tmp_path / 'content'
+    for dirname in ('keep', 'build', '.hidden'):
+        (content / dirname).mkdir(parents=True)
+        (content / dirname / 'file').write_text('data')
+        # Broken symbolic links raise ReadError if they are found
+        if dirname != 'keep':
+            os.symlink(tmp_path / 'nope', content / dirname / 'broken')
+    scandir_spy = mocker.spy(os, 'scandir')
+    torrent = create_torrent(path=content, exclude_globs=['content/build/*'])
+    assert torrent.metainfo['info']['files'] == [{'path': ['keep', 'file'], 'length': 4}]
+    assert sorted(str(c.args[0]) for c in scandir_spy.call_args_list) == [str(content), str(content / 'keep')]
+
 def test_path_reset(create_torrent, singlefile_content, multifile_content):
     torrent = create_torrent()
     torrent.path = singlefile_content.path
@@ -317,6 +351,77 @@ def test_files_switch_from_multifile_to_singlefile(create_torrent, tmp_path):
     assert 'files' not in torrent.metainfo['info']
     assert torrent.files == (torf.File(Path('foo'), size=123),)
 
+def test_files_keeps_declared_empty_files_when_filtered_again(create_torrent):
+    torrent = create_torrent()
+    torrent.files = (torf.File(Path('T', 'a'), size=100),
+                     torf.File(Path('T', 'empty'), size=0))
+    torrent.exclude_globs = ['*.nfo']
+    assert torrent.mode == 'multifile'
+    assert torrent.name == 'T'
+    assert torrent.files == (torf.File(Path('T', 'a'), size=100),
+                             torf.File(Path('T', 'empty'), size=0))
+    assert torrent.metainfo['info']['files'] == [{'path': ['a'], 'length': 100},
+                                                 {'path': ['empty'], 'length': 0}]
+
+def test_files_is_cached_until_metainfo_changes(create_torrent, tmp_path):
+    content = tmp_path / 'bar' ; content.mkdir()  # noqa: E702
+    for i in range(1, 3): (content / f'file{i}').write_text('<data>')  # noqa: E701
+    torrent = create_torrent(path=content)
+    files = torrent.files
+    assert torrent.files is files
+    assert torrent.size == 12
+
+    torrent.metainfo['info']['files'][0]['length'] = 100
+    assert torrent.files is not files
+    assert torrent.files == (torf.File(Path('bar', 'file1'), size=100),
+                             torf.File(Path('bar', 'file2'), size=6))
+    assert torrent.size == 106
+
+    torrent.metainfo['info']['files'].append({'path': ['file3'], 'length': 1})
+    assert torrent.files == (torf.File(Path('bar', 'file1'), size=100),
+                             torf.File(Path('bar', 'file2'), size=6),
+                             torf.File(Path('bar', 'file3'), size=1))
+    assert torrent.size == 107
+
+    torrent.metainfo['info'] = {'name': 'foo', 'length': 5}
+    assert torrent.files == (torf.File(Path('foo'), size=5),)
+    assert torrent.size == 5
+    torrent.metainfo['info']['length'] = 6
+    assert torrent.files == (torf.File(Path('foo'), size=6),)
+    assert torrent.size == 6
+
+def test_metainfo_keeps_nested_containers_of_caller():
+    torrent = torf.Torrent()
+    info = {'name': 'foo', 'length': 5}
+    torrent.metainfo['info'] = info
+    assert torrent.metainfo['info'] is info
+    assert torrent.name == 'foo'
+    assert torrent.size == 5
+    info['name'] = 'bar'
+    info['length'] = 6
+    assert torrent.name == 'bar'
+    assert torrent.files == (torf.File(Path('bar'), size=6),)
+    assert torrent.size == 6
+
+    announce_list = [['http://foo:123/announce']]
+    torrent.metainfo['announce-list'] = announce_list
+    announce_list.append(['http://bar:456/announce'])
+    assert torrent.metainfo['announce-list'] is announce_list
+    assert torrent.trackers == [['http://foo:123/announce'], ['http://bar:456/announce']]
+
+def test_files_cache_is_not_shared_with_copies(create_torrent, tmp_path):
+    content = tmp_path / 'bar' ; content.mkdir()  # noqa: E702
+    for i in range(1, 3): (content / f'file{i}').write_text('<data>')  # noqa: E701
+    torrent = create_torrent(path=content)
+    torrent_copy = copy.deepcopy(torrent)
+    assert torrent_copy.files == torrent.files
+
+    torrent_copy.metainfo['info']['files'][0]['length'] = 100
+    assert torrent_copy.files == (torf.File(Path('bar', 'file1'), size=100),
+                                  torf.File(Path('bar', 'file2'), size=6))
+    assert torrent.files == (torf.File(Path('bar', 'file1'), size=6),
+                             torf.File(Path('bar', 'file2'), size=6))
+
 
 def test_filepaths_singlefile(create_torrent, singlefile_content):
     torrent = create_torrent(path=singlefile_content.path)
@@ -1569,6 +1674,31 @@ def test_infohash_multifile(multifile_content):
 def test_infohash_base32_multifile(multifile_content):
     check_hash(multifile_content, 'infohash_base32')
 
+def test_infohash_is_cached_until_info_changes(singlefile_content, mocker):
+    t = torf.Torrent(singlefile_content.path)
+    t.generate()
+    encode_spy = mocker.spy(torf._torrent.bencode, 'encode')
+    validate_spy = mocker.spy(t, 'validate')
+    infohash = t.infohash
+    assert t.infohash == infohash
+    assert t.magnet().infohash == infohash
+    assert encode_spy.call_count == 1
+    assert validate_spy.call_count == 1
+
+    # Changes outside of info are validated but don't affect infohash
+    t.comment = 'foo'
+    assert t.infohash == infohash
+    assert encode_spy.call_count == 1
+    assert validate_spy.call_count == 2
+
+    t.source = 'bar'
+    assert t.infohash != infohash
+    assert encode_spy.call_count == 2
+    t.source = None
+    assert t.infohash == infohash
+    assert encode_spy.call_count == 3
+
+
 
 def test_randomize_infohash(singlefile_content):
     t1 = torf.Torrent(singlefile_content.path)
@@ -0,0 +1,156 @@
+import os
+import shutil
+from unittest import mock
+
+import pytest
+
+import torf
+from torf import _generate as generate
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with torf.PieceHashCache(tmp_path / 'cache.db') as cache:
+        yield cache
+
+
+def test_cache_is_created(tmp_path):
+    with torf.PieceHashCache(tmp_path / 'cache.db') as cache:
+        assert cache.path == str(tmp_path / 'cache.db')
+        assert len(cache) == 0
+    assert os.path.exists(tmp_path / 'cache.db')
+
+
+def test_cache_is_unreadable(tmp_path):
+    cache_path = tmp_path / 'cache.db'
+    cache_path.write_bytes(b'this is not a database')
+    with pytest.raises(torf.ReadError) as e:
+        torf.PieceHashCache(cache_path)
+    assert str(e.value) == f'{cache_path}: Input/output error'
+
+
+@pytest.mark.parametrize('executor', ('thread', 'process'))
+def test_generate_with_cache_skips_unchanged_pieces(executor, content, cache, mocker, piece_size_min):
+    t = torf.Torrent(content, piece_size=piece_size_min)
+    assert t.generate() is True
+    exp_hashes = t.hashes
+    del t.metainfo['info']['pieces']
+
+    assert t.generate(cache=cache, executor=executor) is True
+    assert t.hashes == exp_hashes
+    assert len(cache) == t.pieces
+
+    del t.metainfo['info']['pieces']
+    cb = mock.Mock(return_value=None)
+    iter_pieces_spy = mocker.spy(torf.TorrentFileStream, 'iter_pieces')
+    get_piece_spy = mocker.spy(torf.TorrentFileStream, 'get_piece')
+    assert t.generate(cache=cache, callback=cb, executor=executor) is True
+    assert t.hashes == exp_hashes
+    assert iter_pieces_spy.call_count == 0
+    assert get_piece_spy.call_count == 0
+    assert cb.call_count == t.pieces
+
+
+@pytest.mark.parametrize('executor', ('thread', 'process'))
+def test_generate_with_cache_rehashes_changed_file(executor, content, cache, mocker, piece_size_min, corrupt_file):
+    t = torf.Torrent(content, piece_size=piece_size_min)
+    assert t.generate(cache=cache) is True
+
+    corrupt_file(content / 'b.jpg')
+    assert t.generate() is True
+    exp_hashes = t.hashes
+
+    del t.metainfo['info']['pieces']
+    if executor == 'thread':
+        push_piece_spy = mocker.spy(generate.Reader, '_push_piece')
+    assert t.generate(cache=cache, executor=executor) is True
+    assert t.hashes == exp_hashes
+    if executor == 'thread':
+        # b.jpg is in piece 2 (shared with a.jpg) to piece 5 (shared with c.jpg)
+        assert [c.kwargs['piece_index'] for c in push_piece_spy.call_args_list] == [2, 3, 4, 5]
+
+
+def test_verify_with_cache(content, cache, tmp_path, piece_size_min, corrupt_file):
+    t = torf.Torrent(content, piece_size=piece_size_min)
+    assert t.generate() is True
+    assert t.verify(content, cache=cache) is True
+    assert len(cache) == t.pieces
+    assert t.verify(content, cache=cache) is True
+
+    corrupt_file(content / 'c.jpg')
+    cb = mock.Mock(return_value=None)
+    assert t.verify(content, cache=cache, callback=cb) is False
+    exceptions = [c.args[-1] for c in cb.call_args_list if c.args[-1] is not None]
+    assert [str(e) for e in exceptions] == [f'Corruption in piece 8 in {content / "c.jpg"}']
+    assert cb.call_count == t.pieces
+
+
+def test_verify_with_cache_reports_missing_file(content, cache, tmp_path, piece_size_min):
+    t = torf.Torrent(content, piece_size=piece_size_min)
+    assert t.generate() is True
+    content_copy = tmp_path / 'copy'
+    shutil.copytree(content, content_copy)
+    assert t.verify(content_copy, cache=cache) is True
+    os.remove(content_copy / 'a.jpg')
+
+    cb = mock.Mock(return_value=None)
+    assert t.verify(content_copy, cache=cache, callback=cb) is False
+    exceptions = [c.args[-1] for c in cb.call_args_list if c.args[-1] is not None]
+    assert [str(e) for e in exceptions] == [f'{content_copy / "a.jpg"}: No such file or directory']
+    assert cb.call_count == t.pieces
+
+
+def test_piece_keys_identify_file_segments(content, piece_size_min):
+    t = torf.Torrent(content, piece_size=piece_size_min)
+    piece_keys = torf.PieceHashCache.get_piece_keys(t)
+    assert len(piece_keys) == t.pieces
+    assert len(set(key for key, filepath in piece_keys)) == t.pieces
+    assert [filepath for key, filepath in piece_keys] == [
+        content / 'a.jpg', content / 'a.jpg',
+        content / 'b.jpg', content / 'b.jpg', content / 'b.jpg',
+        content / 'c.jpg', content / 'c.jpg', content / 'c.jpg',
+    ]
+    assert torf.PieceHashCache.get_piece_keys(t) == piece_keys
+
+    os.remove(content / 'c.jpg')
+    exp_piece_keys = piece_keys[:5] + [(None, content / 'c.jpg')] * 3
+    assert torf.PieceHashCache.get_piece_keys(t) == exp_piece_keys
+
+
+def test_max_entries_evicts_least_recently_used(tmp_path, mocker):
+    now = mocker.patch('time.time', return_value=1000)
+    with torf.PieceHashCache(tmp_path / 'cache.db', max_entries=3) as cache:
+        cache.set([(b'a', b'A'), (b'b', b'B')])
+        now.return_value = 1001
+        cache.set([(b'c', b'C')])
+        now.return_value = 1002
+        assert cache.get([b'a']) == {b'a': b'A'}
+        now.return_value = 1003
+        cache.set([(b'd', b'D')])
+        assert len(cache) == 3
+        assert cache.get([b'a', b'b', b'c', b'd']) == {b'a': b'A', b'c': b'C', b'd': b'D'}
+
+
+def test_max_age_evicts_unused_entries(tmp_path, mocker):
+    now = mocker.patch('time.time', return_value=1000)
+    with torf.PieceHashCache(tmp_path / 'cache.db', max_age=60) as cache:
+        cache.set([(b'a', b'A'), (b'b', b'B')])
+        now.return_value = 1050
+        assert cache.get([b'a']) == {b'a': b'A'}
+        now.return_value = 1100
+        cache.prune()
+        assert cache.get([b'a', b'b']) == {b'a': b'A'}
+
+
+def test_clear(cache):
+    cache.set([(b'a', b'A'), (b'b', b'B')])
+    assert len(cache) == 2
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_cache_persists(tmp_path):
+    with torf.PieceHashCache(tmp_path / 'cache.db') as cache:
+        cache.set([(b'a', b'A')])
+    with torf.PieceHashCache(tmp_path / 'cache.db') as cache:
+        assert cache.get([b'a', b'b']) == {b'a': b'A'}
@@ -1,5 +1,9 @@
 import base64
+import concurrent.futures
+import copy
 import os
+import pickle
+import queue
 from collections import defaultdict
 from pathlib import Path
 from unittest import mock
@@ -7,6 +11,7 @@ from unittest import mock
 import pytest
 
 import torf
+from torf import _generate as generate
 
 from . import *  # noqa: F403
 
@@ -234,3 +239,381 @@ def test_callback_raises_exception(piece_size, create_file, forced_piece_size):
             # The pool of hashers should be stopped before all pieces are hashed
             assert sha1_mock.call_count < t.pieces
             assert not t.is_ready
+
+
+def test_invalid_executor(create_file):
+    content_path = create_file('file.jpg', '<image data>')
+    t = torf.Torrent(content_path)
+    with pytest.raises(ValueError) as e:
+        t.generate(executor='foo')
+    assert str(e.value) == "Invalid executor: 'foo'"
+
+
+@pytest.mark.parametrize('threads', (1, 3))
+def test_process_executor_generates_same_hashes(threads, create_dir, random_seed):
+    with random_seed(0):
+        content_path = create_dir('content',
+                                  ('a.jpg', torf.Torrent.piece_size_min_default * 1.123),
+                                  ('b.jpg', torf.Torrent.piece_size_min_default * 2.456),
+                                  ('c.jpg', torf.Torrent.piece_size_min_default * 3.789))
+    t = torf.Torrent(content_path)
+    t.piece_size = 2**14
+    assert t.generate(executor='thread') is True
+    exp_pieces = t.metainfo['info']['pieces']
+
+    cb = mock.Mock(return_value=None)
+    assert t.generate(executor='process', threads=threads, callback=cb) is True
+    assert t.metainfo['info']['pieces'] == exp_pieces
+    assert cb.call_count == t.pieces
+    assert [c.args[2] for c in cb.call_args_list] == list(range(1, t.pieces + 1))
+
+
+def test_process_executor_raises_read_error(create_dir):
+    content_path = create_dir('content',
+                              ('a.jpg', torf.Torrent.piece_size_min_default * 3),
+                              ('b.jpg', torf.Torrent.piece_size_min_default * 3))
+    t = torf.Torrent(content_path)
+    (content_path / 'b.jpg').unlink()
+    with pytest.raises(torf.ReadError) as e:
+        t.generate(executor='process')
+    assert str(e.value) == f'{content_path / "b.jpg"}: No such file or directory'
+    assert 'pieces' not in t.metainfo['info']
+
+
+def test_process_executor_callback_cancels(create_file):
+    def maybe_cancel(torrent, filepath, pieces_done, pieces_total):
+        if pieces_done / pieces_total > 0.1:
+            return 'STOP THE PRESSES!'
+
+    cb = mock.Mock(side_effect=maybe_cancel)
+    piece_count = 1000
+    content_path = create_file('file.jpg', torf.Torrent.piece_size_min_default * piece_count)
+    t = torf.Torrent(content_path, piece_size=torf.Torrent.piece_size_min_default)
+    success = t.generate(callback=cb, interval=0, threads=1, executor='process')
+    assert success is False
+    assert cb.call_count < piece_count
+
+
+def test_process_executor_does_not_fork(create_file, mocker):
+    content_path = create_file('file.jpg', torf.Torrent.piece_size_min_default * 3)
+    t = torf.Torrent(content_path, piece_size=torf.Torrent.piece_size_min_default)
+    executor_spy = mocker.spy(concurrent.futures, 'ProcessPoolExecutor')
+    assert t.generate(executor='process', threads=2) is True
+    assert executor_spy.call_args[1]['mp_context'].get_start_method() in ('forkserver', 'spawn')
+
+
+def test_reader_skips_pieces_and_reports_their_exceptions_with_next_missing_piece(create_dir):
+    piece_size = torf.Torrent.piece_size_min_default
+    content_path = create_dir('content',
+                              ('a.jpg', piece_size * 2),
+                              ('b.jpg', piece_size * 2),
+                              ('c.jpg', piece_size * 1))
+    t = torf.Torrent(content_path, piece_size=piece_size)
+    (content_path / 'b.jpg').unlink()
+    reader = generate.Reader(torrent=t, queue_size=10, skip_pieces={0, 2})
+    reader.join()
+    items = list(iter(reader.piece_queue.get, generate.QUEUE_CLOSED))
+    assert [(piece_index, str(filepath), bytes(piece) if piece else piece, [str(e) for e in exceptions])
+            for piece_index, filepath, piece, exceptions in items] == [
+        (1, str(content_path / 'a.jpg'), (content_path / 'a.jpg').read_bytes()[piece_size:], []),
+        (3, str(content_path / 'b.jpg'), None, [f'{content_path / "b.jpg"}: No such file or directory']),
+        (4, str(content_path / 'c.jpg'), (content_path / 'c.jpg').read_bytes(), []),
+    ]
+
+
+def test_generate_with_known_pieces_reads_sequentially(create_dir, tmp_path, mocker):
+    piece_size = torf.Torrent.piece_size_min_default
+    content_path = create_dir('content',
+                              ('a.jpg', piece_size * 2.5),
+                              ('b.jpg', piece_size * 3.2))
+    t = torf.Torrent(content_path, piece_size=piece_size)
+    with torf.PieceHashCache(tmp_path / 'cache.db') as cache:
+        assert t.generate(cache=cache) is True
+        exp_hashes = t.hashes
+        stat = os.stat(content_path / 'b.jpg')
+        os.utime(content_path / 'b.jpg', ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        iter_pieces_spy = mocker.spy(torf.TorrentFileStream, 'iter_pieces')
+        get_piece_spy = mocker.spy(torf.TorrentFileStream, 'get_piece')
+        assert t.generate(cache=cache, memory_map=True) is True
+        assert t.hashes == exp_hashes
+        assert get_piece_spy.call_args_list == []
+        assert iter_pieces_spy.call_count == 1
+        assert iter_pieces_spy.call_args.kwargs['memory_map'] is True
+        assert iter_pieces_spy.call_args.kwargs['skip_pieces'] == {0, 1}
+
+
+def test_piece_buffer_pool_reuses_buffers():
+    pool = generate.PieceBufferPool(size=2, piece_size=16)
+    assert pool.size == 2
+    buf1, buf2 = pool.get(), pool.get()
+    assert buf1 is not buf2
+    assert isinstance(buf1, bytearray) and len(buf1) == 16
+    pool.put(memoryview(buf2)[:3])
+    assert pool.get() is buf2
+    pool.put(buf1)
+    assert pool.get() is buf1
+
+
+def test_piece_buffer_pool_uses_fewer_buffers_if_out_of_memory(mocker):
+    allocated = []
+
+    def bytearray_mock(size):
+        if len(allocated) >= 2:
+            raise MemoryError()
+        allocated.append(bytes(size))
+        return allocated[-1]
+
+    mocker.patch.object(generate, 'bytearray', bytearray_mock, create=True)
+    pool = generate.PieceBufferPool(size=5, piece_size=16)
+    assert pool.size == 2
+
+
+def test_piece_buffer_pool_raises_read_error_if_out_of_memory(mocker):
+    mocker.patch.object(generate, 'bytearray', mock.Mock(side_effect=MemoryError()), create=True)
+    with pytest.raises(torf.ReadError) as e:
+        generate.PieceBufferPool(size=5, piece_size=16)
+    assert str(e.value) == 'Cannot allocate memory'
+
+
+def test_reader_limits_number_of_piece_buffers(create_file):
+    content_path = create_file('file.jpg', torf.Torrent.piece_size_min_default * 100)
+    t = torf.Torrent(content_path, piece_size=torf.Torrent.piece_size_min_default)
+    reader = generate.Reader(torrent=t, queue_size=3)
+    assert reader.buffer_pool.size == 3
+    pieces = []
+    for _ in range(100):
+        piece_index, filepath, piece, exceptions = reader.piece_queue.get()
+        pieces.append(bytes(piece))
+        reader.buffer_pool.put(piece)
+    assert reader.piece_queue.get() is generate.QUEUE_CLOSED
+    reader.join()
+    assert b''.join(pieces) == content_path.read_bytes()
+
+
+def test_incremental_generate_only_hashes_affected_pieces(create_dir, mocker):
+    piece_size = torf.Torrent.piece_size_min_default
+    content_path = create_dir('content',
+                              ('a.jpg', piece_size * 2.5),
+                              ('b.jpg', piece_size * 3.2),
+                              ('c.jpg', piece_size * 1.7))
+    t = torf.Torrent(content_path, piece_size=piece_size)
+    assert t.generate(incremental=True) is True
+
+    # Removing c.jpg changes piece 5, which contains the end of b.jpg
+    t.exclude_globs = ['*/c.jpg']
+    assert 'pieces' not in t.metainfo['info']
+    push_piece_spy = mocker.spy(generate.Reader, '_push_piece')
+    get_piece_spy = mocker.spy(torf.TorrentFileStream, 'get_piece')
+    assert t.generate(incremental=True) is True
+    assert [c.kwargs['piece_index'] for c in push_piece_spy.call_args_list] == [5]
+    assert get_piece_spy.call_args_list == []
+    incremental_hashes = t.hashes
+    assert t.generate() is True
+    assert t.hashes == incremental_hashes
+
+    # Adding c.jpg again only requires hashing pieces 5 and later
+    t.exclude_globs = []
+    push_piece_spy.reset_mock()
+    assert t.generate(incremental=True) is True
+    assert [c.kwargs['piece_index'] for c in push_piece_spy.call_args_list] == [5, 6, 7]
+    assert get_piece_spy.call_args_list == []
+    incremental_hashes = t.hashes
+    assert t.generate() is True
+    assert t.hashes == incremental_hashes
+
+
+def test_incremental_generate_hashes_modified_file(create_dir, mocker):
+    piece_size = torf.Torrent.piece_size_min_default
+    content_path = create_dir('content',
+                              ('a.jpg', piece_size * 2),
+                              ('b.jpg', piece_size * 2))
+    t = torf.Torrent(content_path, piece_size=piece_size)
+    assert t.generate(incremental=True) is True
+    orig_hashes = t.hashes
+
+    data = bytearray((content_path / 'b.jpg').read_bytes())
+    data[0] = (data[0] + 1) % 256
+    stat = os.stat(content_path / 'b.jpg')
+    (content_path / 'b.jpg').write_bytes(data)
+    os.utime(content_path / 'b.jpg', ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    push_piece_spy = mocker.spy(generate.Reader, '_push_piece')
+    assert t.generate(incremental=True) is True
+    assert [c.kwargs['piece_index'] for c in push_piece_spy.call_args_list] == [2, 3]
+    assert t.hashes[:2] == orig_hashes[:2]
+    assert t.hashes[2] != orig_hashes[2]
+    assert t.hashes[3] == orig_hashes[3]
+
+
+def test_generate_is_not_incremental_by_default(create_dir, mocker):
+    piece_size = torf.Torrent.piece_size_min_default
+    content_path = create_dir('content', ('a.jpg', piece_size * 3))
+    t = torf.Torrent(content_path, piece_size=piece_size)
+    assert t.generate() is True
+    iter_pieces_spy = mocker.spy(torf.TorrentFileStream, 'iter_pieces')
+    get_piece_keys_spy = mocker.spy(torf.PieceHashCache, 'get_piece_keys')
+    assert t.generate() is True
+    assert iter_pieces_spy.call_count == 1
+    assert get_piece_keys_spy.call_args_list == []
+    assert t._previous_piece_hashes == {}
+
+
+def test_previous_piece_hashes_are_not_copied(create_dir):
+    piece_size = torf.Torrent.piece_size_min_default
+    content_path = create_dir('content', ('a.jpg', piece_size * 3))
+    t = torf.Torrent(content_path, piece_size=piece_size)
+    assert t.generate(incremental=True) is True
+    assert len(t._previous_piece_hashes) == 3
+    assert copy.deepcopy(t)._previous_piece_hashes == {}
+    assert pickle.loads(pickle.dumps(t))._previous_piece_hashes == {}
+
+
+def test_collector_writes_hashes_to_their_positions():
+    torrent = mock.Mock(pieces=10)
+    hash_queue = queue.Queue()
+    hashers = mock.Mock(hash_queue=hash_queue)
+    collector = generate.Collector(torrent, reader=mock.Mock(), hashers=hashers)
+    for piece_index in (9, 2, 0, 1, 8, 3, 7, 5, 6):
+        hash_queue.put((piece_index, 'path', bytes([piece_index]) * 20, ()))
+    hash_queue.put((4, 'path', None, (torf.ReadError(5, 'path'),)))
+    hash_queue.put(generate.QUEUE_CLOSED)
+
+    with pytest.raises(torf.ReadError):
+        collector.collect()
+    assert collector.pieces_done == 10
+    assert collector.pieces_seen == frozenset(range(10))
+    assert collector.hashes_by_index == {i: bytes([i]) * 20 for i in (0, 1, 2, 3, 5, 6, 7, 8, 9)}
+    assert collector.pieces == b''.join(bytes([i]) * 20 for i in (0, 1, 2, 3, 5, 6, 7, 8, 9))
+
+    hash_queue = queue.Queue()
+    hashers = mock.Mock(hash_queue=hash_queue)
+    hash_queue.put((4, 'path', b'\x04' * 20, ()))
+    hash_queue.put(generate.QUEUE_CLOSED)
+    collector = generate.Collector(torrent, reader=mock.Mock(), hashers=hashers,
+                                   known_hashes={i: ('path', bytes([i]) * 20) for i in (0, 1, 2, 3, 5, 6, 7, 8, 9)})
+    assert collector.collect() == b''.join(bytes([i]) * 20 for i in range(10))
+    assert collector.hashes == tuple(bytes([i]) * 20 for i in range(10))
+
+
+def test_checkpoint_collects_contiguous_prefix(create_dir, tmp_path):
+    content_path = create_dir('content', ('a.jpg', 100))
+    t = torf.Torrent(content_path)
+    checkpoint = generate.Checkpoint(tmp_path / 'checkpoint', t, interval=1000)
+    checkpoint.add(1, b'b' * 20)
+    checkpoint.add(3, b'd' * 20)
+    assert checkpoint.hashes == ()
+    checkpoint.add(0, b'a' * 20)
+    assert checkpoint.hashes == (b'a' * 20, b'b' * 20)
+    checkpoint.add(2, b'c' * 20)
+    assert checkpoint.hashes == (b'a' * 20, b'b' * 20, b'c' * 20, b'd' * 20)
+    assert not os.path.exists(tmp_path / 'checkpoint')
+    checkpoint.save()
+    assert generate.Checkpoint.read(tmp_path / 'checkpoint', t) == ()
+    t.files = [torf.File('content/a.jpg', size=4 * t.piece_size)]
+    assert generate.Checkpoint.read(tmp_path / 'checkpoint', t) == ()
+
+
+def test_generate_resumes_from_checkpoint(create_dir, tmp_path, mocker):
+    piece_size = torf.Torrent.piece_size_min_default
+    content_path = create_dir('content',
+                              ('a.jpg', piece_size * 40.5),
+                              ('b.jpg', piece_size * 60.2))
+    t = torf.Torrent(content_path, piece_size=piece_size)
+    assert t.generate() is True
+    exp_hashes = t.hashes
+    del t.metainfo['info']['pieces']
+
+    # Checkpoint is written when hashing is cancelled
+    checkpoint_path = tmp_path / 'content.checkpoint'
+    assert t.generate(threads=1, checkpoint=checkpoint_path,
+                      callback=lambda t, fp, done, total: 'cancel' if done >= 3 else None) is False
+    checkpoint_hashes = generate.Checkpoint.read(checkpoint_path, t)
+    assert 3 <= len(checkpoint_hashes) < t.pieces
+    assert checkpoint_hashes == exp_hashes[:len(checkpoint_hashes)]
+
+    # Only pieces after the checkpoint are read
+    calls = []
+    push_piece_spy = mocker.spy(generate.Reader, '_push_piece')
+    assert t.generate(checkpoint=checkpoint_path, resume_from=checkpoint_path,
+                      callback=lambda t, fp, done, total: calls.append((str(fp), done, total))) is True
+    assert [c.kwargs['piece_index'] for c in push_piece_spy.call_args_list] \
+        == list(range(len(checkpoint_hashes), t.pieces))
+    assert t.hashes == exp_hashes
+    assert calls[0] == (str(content_path / 'a.jpg'), 1, t.pieces)
+    assert calls[-1] == (str(content_path / 'b.jpg'), t.pieces, t.pieces)
+    assert not os.path.exists(checkpoint_path)
+
+
+def test_generate_ignores_checkpoint_for_different_files(create_dir, tmp_path, mocker):
+    piece_size = torf.Torrent.piece_size_min_default
+    content_path = create_dir('content',
+                              ('a.jpg', piece_size * 40.5),
+                              ('b.jpg', piece_size * 60.2))
+    t = torf.Torrent(content_path, piece_size=piece_size)
+    checkpoint_path = tmp_path / 'content.checkpoint'
+    assert t.generate(checkpoint=checkpoint_path,
+                      callback=lambda t, fp, done, total: 'cancel' if done >= 2 else None) is False
+    assert generate.Checkpoint.read(checkpoint_path, t)
+
+    t.exclude_globs = ['*/b.jpg']
+    iter_pieces_spy = mocker.spy(torf.TorrentFileStream, 'iter_pieces')
+    assert t.generate(resume_from=checkpoint_path) is True
+    assert iter_pieces_spy.call_count == 1
+    assert os.path.exists(checkpoint_path)
+
+
+def test_generate_resumes_from_nonexisting_checkpoint(create_dir, tmp_path):
+    piece_size = torf.Torrent.piece_size_min_default
+    content_path = create_dir('content', ('a.jpg', piece_size * 2.5))
+    t = torf.Torrent(content_path, piece_size=piece_size)
+    checkpoint_path = tmp_path / 'content.checkpoint'
+    assert t.generate(checkpoint=checkpoint_path, resume_from=checkpoint_path) is True
+    assert len(t.hashes) == 3
+    assert not os.path.exists(checkpoint_path)
+
+
+@pytest.mark.parametrize(
+    argnames='shards, piece_indexes, exp_shards',
+    argvalues=(
+        # Files end in pieces 1, 4, 6 and 9 so shards can start at 2, 5, 7
+        (1, None, [list(range(10))]),
+        (2, None, [[0, 1, 2, 3, 4], [5, 6, 7, 8, 9]]),
+        (3, None, [[0, 1], [2, 3, 4, 5, 6], [7, 8, 9]]),
+        (4, None, [[0, 1], [2, 3, 4], [5, 6], [7, 8, 9]]),
+        (10, None, [[0, 1], [2, 3, 4], [5, 6], [7, 8, 9]]),
+        (2, [0, 3, 4, 8, 9], [[0, 3, 4], [8, 9]]),
+        (2, [], []),
+    ),
+)
+def test_get_shards_splits_at_file_boundaries(shards, piece_indexes, exp_shards, create_dir):
+    content_path = create_dir('content',
+                              ('a', 100),
+                              ('b', 200),
+                              ('c', 100),
+                              ('d', 240))
+    t = torf.Torrent(content_path)
+    t.metainfo['info']['piece length'] = 64
+    assert t.pieces == 10
+    assert generate.get_shards(t, shards, piece_indexes=piece_indexes) == exp_shards
+
+
+def test_sharded_reader_reads_all_pieces(create_dir):
+    content_path = create_dir('content', *((f'file{i}', 1000 + i) for i in range(10)))
+    t = torf.Torrent(content_path)
+    t.metainfo['info']['piece length'] = 64
+    reader = generate.ShardedReader(torrent=t, queue_size=3, readers=4)
+    assert reader.buffer_pool.size == 3
+    pieces = {}
+    while True:
+        task = reader.piece_queue.get()
+        if task is generate.QUEUE_CLOSED:
+            break
+        piece_index, filepath, piece, exceptions = task
+        assert exceptions == ()
+        pieces[piece_index] = bytes(piece)
+        reader.buffer_pool.put(piece)
+    reader.join()
+    assert sorted(pieces) == list(range(t.pieces))
+    exp_content = b''.join((content_path / f'file{i}').read_bytes() for i in range(10))
+    assert b''.join(pieces[i] for i in sorted(pieces)) == exp_content
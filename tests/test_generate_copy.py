@@ -0,0 +1,136 @@
+import os
+
+import pytest
+
+import torf
+
+
+def _assert_copied(content_path, destination, torrent):
+    for file in torrent.files:
+        source = os.path.join(content_path, *file.parts[1:])
+        target = os.path.join(destination, *file.parts)
+        with open(source, 'rb') as s, open(target, 'rb') as t:
+            assert s.read() == t.read()
+
+
+def test_no_path():
+    t = torf.Torrent()
+    with pytest.raises(RuntimeError) as e:
+        t.generate_copy('destination')
+    assert str(e.value) == 'generate_copy() called with no path specified'
+
+
+def test_singlefile_torrent(create_file, tmp_path):
+    content_path = create_file('foo.jpg', 2 * 16384 + 123)
+    t = torf.Torrent(content_path, piece_size=16384)
+    t.generate()
+    hashes = t.hashes
+    del t.metainfo['info']['pieces']
+
+    destination = tmp_path / 'destination'
+    assert t.generate_copy(destination) is True
+    assert t.hashes == hashes
+    assert os.listdir(destination) == ['foo.jpg']
+    _assert_copied(content_path, destination, t)
+
+
+def test_multifile_torrent(create_dir, tmp_path):
+    content_path = create_dir(
+        'foo',
+        ('a', 16384 - 1),
+        ('b/c', 3 * 16384 + 17),
+        ('b/d', 1),
+        ('e', 16384),
+    )
+    t = torf.Torrent(content_path, piece_size=16384)
+    t.generate()
+    hashes = t.hashes
+    infohash = t.infohash
+    del t.metainfo['info']['pieces']
+
+    destination = tmp_path / 'destination'
+    assert t.generate_copy(destination, threads=3) is True
+    assert t.hashes == hashes
+    assert t.infohash == infohash
+    assert t.path == content_path
+    _assert_copied(content_path, destination, t)
+
+
+def test_excluded_files_are_not_copied(create_dir, tmp_path):
+    content_path = create_dir('foo', ('a', 100), ('b.txt', 200))
+    t = torf.Torrent(content_path, exclude_globs=['*.txt'])
+    destination = tmp_path / 'destination'
+    assert t.generate_copy(destination) is True
+    assert os.listdir(destination / 'foo') == ['a']
+
+
+def test_callback_reports_source_file_paths(create_dir, tmp_path):
+    content_path = create_dir('foo', ('a', 16384 + 1), ('b', 16384 - 1))
+    t = torf.Torrent(content_path, piece_size=16384)
+    calls = []
+
+    def callback(torrent, filepath, pieces_done, pieces_total):
+        calls.append((torrent, filepath, pieces_done, pieces_total))
+
+    assert t.generate_copy(tmp_path / 'destination', callback=callback) is True
+    assert calls == [
+        (t, str(content_path / 'a'), 1, 2),
+        (t, str(content_path / 'b'), 2, 2),
+    ]
+
+
+def test_callback_cancels(create_file, tmp_path):
+    content_path = create_file('foo', 100 * 16384)
+    t = torf.Torrent(content_path, piece_size=16384)
+    calls = []
+
+    def callback(torrent, filepath, pieces_done, pieces_total):
+        calls.append(pieces_done)
+        if pieces_done >= 3:
+            return 'cancel'
+
+    assert t.generate_copy(tmp_path / 'destination', callback=callback) is False
+    assert 3 <= len(calls) < 100
+    assert 'pieces' not in t.metainfo['info']
+
+
+@pytest.mark.parametrize('size_diff', (-1, 1), ids=('shrunk', 'grown'))
+def test_file_size_changed(size_diff, create_dir, tmp_path):
+    content_path = create_dir('foo', ('a', 16384), ('b', 16384))
+    t = torf.Torrent(content_path, piece_size=16384)
+    (content_path / 'b').write_bytes(b'x' * (16384 + size_diff))
+    with pytest.raises(torf.VerifyFileSizeError) as e:
+        t.generate_copy(tmp_path / 'destination')
+    assert e.value.filepath == str(content_path / 'b')
+    assert e.value.expected_size == 16384
+    assert 'pieces' not in t.metainfo['info']
+
+
+def test_missing_file(create_dir, tmp_path):
+    content_path = create_dir('foo', ('a', 16384), ('b', 16384))
+    t = torf.Torrent(content_path, piece_size=16384)
+    (content_path / 'b').unlink()
+    with pytest.raises(torf.ReadError) as e:
+        t.generate_copy(tmp_path / 'destination')
+    assert str(e.value) == f'{content_path / "b"}: No such file or directory'
+
+
+def test_unwritable_destination(create_dir, tmp_path):
+    content_path = create_dir('foo', ('a', 16384), ('b/c', 16384))
+    t = torf.Torrent(content_path, piece_size=16384)
+    destination = tmp_path / 'destination'
+    (destination / 'foo').mkdir(parents=True)
+    (destination / 'foo' / 'b').write_bytes(b'not a directory')
+    with pytest.raises(torf.WriteError) as e:
+        t.generate_copy(destination)
+    assert e.value.path == str(destination / 'foo' / 'b' / 'c')
+
+
+def test_destination_is_source(create_dir, tmp_path):
+    content_path = create_dir('foo', ('a', 16384), ('b', 16384))
+    t = torf.Torrent(content_path, piece_size=16384)
+    content = (content_path / 'a').read_bytes()
+    with pytest.raises(torf.PathError) as e:
+        t.generate_copy(tmp_path)
+    assert str(e.value) == f'{content_path / "a"}: Destination is the same file as source'
+    assert (content_path / 'a').read_bytes() == content
@@ -0,0 +1,136 @@
+import io
+import os
+
+import pytest
+
+import torf
+
+
+def _get_content(content_path, files):
+    return b''.join(
+        (content_path.parent / os.path.join(*file.parts)).read_bytes()
+        for file in files
+    )
+
+
+def _get_stream_torrent(torrent):
+    stream_torrent = torf.Torrent(piece_size=torrent.piece_size)
+    stream_torrent.files = torrent.files
+    return stream_torrent
+
+
+def _iter_chunks(data, chunk_size):
+    for pos in range(0, len(data), chunk_size):
+        yield data[pos:pos + chunk_size]
+
+
+class _ReadOnlyStream:
+    # File-like object without readinto() that returns short reads
+    def __init__(self, data):
+        self._stream = io.BytesIO(data)
+
+    def read(self, size):
+        return self._stream.read(min(size, 1000))
+
+
+@pytest.fixture(params=('readinto', 'read', 'chunks'))
+def make_stream(request):
+    def make_stream(data):
+        if request.param == 'readinto':
+            return io.BytesIO(data)
+        elif request.param == 'read':
+            return _ReadOnlyStream(data)
+        else:
+            return _iter_chunks(data, 1234)
+    return make_stream
+
+
+def test_files_are_empty():
+    t = torf.Torrent()
+    with pytest.raises(RuntimeError) as e:
+        t.generate_stream(b'')
+    assert str(e.value) == 'generate_stream() called while file list is empty'
+
+
+def test_singlefile_torrent(create_file, make_stream):
+    content_path = create_file('foo.jpg', 2 * 16384 + 123)
+    t = torf.Torrent(content_path, piece_size=16384)
+    t.generate()
+
+    t_stream = _get_stream_torrent(t)
+    assert t_stream.mode == 'singlefile'
+    assert t_stream.generate_stream(make_stream(content_path.read_bytes())) is True
+    assert t_stream.hashes == t.hashes
+    assert t_stream.infohash == t.infohash
+
+
+def test_multifile_torrent(create_dir, make_stream):
+    content_path = create_dir(
+        'foo',
+        ('a', 16384 - 1),
+        ('b/c', 3 * 16384 + 17),
+        ('b/d', 1),
+        ('e', 16384),
+    )
+    t = torf.Torrent(content_path, piece_size=16384)
+    t.generate()
+
+    t_stream = _get_stream_torrent(t)
+    assert t_stream.mode == 'multifile'
+    data = _get_content(content_path, t.files)
+    assert t_stream.generate_stream(make_stream(data), threads=3) is True
+    assert t_stream.hashes == t.hashes
+    assert t_stream.infohash == t.infohash
+
+
+def test_stream_is_too_small(make_stream):
+    t = torf.Torrent(piece_size=16384)
+    t.files = [torf.File('foo/a', size=16384), torf.File('foo/b', size=16384 + 100)]
+    with pytest.raises(torf.StreamSizeError) as e:
+        t.generate_stream(make_stream(b'x' * (2 * 16384 + 99)))
+    assert str(e.value) == f'Stream is too small: {2 * 16384 + 99} instead of {2 * 16384 + 100} bytes'
+    assert e.value.actual_size == 2 * 16384 + 99
+    assert e.value.expected_size == 2 * 16384 + 100
+    assert 'pieces' not in t.metainfo['info']
+
+
+def test_stream_is_too_big(make_stream):
+    t = torf.Torrent(piece_size=16384)
+    t.files = [torf.File('foo', size=16384 + 100)]
+    with pytest.raises(torf.StreamSizeError) as e:
+        t.generate_stream(make_stream(b'x' * (16384 + 101)))
+    assert str(e.value) == f'Stream is too big: More than {16384 + 100} bytes'
+    assert e.value.expected_size == 16384 + 100
+    assert 'pieces' not in t.metainfo['info']
+
+
+def test_callback_reports_relative_file_paths(create_dir):
+    content_path = create_dir('foo', ('a', 16384 + 1), ('b', 16384 - 1))
+    t = torf.Torrent(content_path, piece_size=16384)
+    t_stream = _get_stream_torrent(t)
+    calls = []
+
+    def callback(torrent, filepath, pieces_done, pieces_total):
+        calls.append((torrent, filepath, pieces_done, pieces_total))
+
+    data = _get_content(content_path, t.files)
+    assert t_stream.generate_stream(io.BytesIO(data), callback=callback) is True
+    assert calls == [
+        (t_stream, os.path.join('foo', 'a'), 1, 2),
+        (t_stream, os.path.join('foo', 'b'), 2, 2),
+    ]
+
+
+def test_callback_cancels(make_stream):
+    t = torf.Torrent(piece_size=16384)
+    t.files = [torf.File('foo', size=100 * 16384)]
+    calls = []
+
+    def callback(torrent, filepath, pieces_done, pieces_total):
+        calls.append(pieces_done)
+        if pieces_done >= 3:
+            return 'cancel'
+
+    assert t.generate_stream(make_stream(b'x' * (100 * 16384)), callback=callback) is False
+    assert 3 <= len(calls) < 100
+    assert 'pieces' not in t.metainfo['info']
@@ -1,3 +1,4 @@
+import concurrent.futures
 import io
 from collections import OrderedDict
 from datetime import datetime
@@ -250,3 +251,108 @@ def test_read_nonutf8_encoded_metainfo(valid_multifile_metainfo, tmp_path):
     assert t.files == [
         _utils.File('Th� ��me/F�O/BA�/�AZ', size=124),
     ]
+
+
+def test_infohash_is_calculated_from_original_info_bytes(valid_multifile_metainfo, tmp_path):
+    valid_multifile_metainfo[b'info'][b'name'] = 'Thê ñãme'.encode('CP860')
+    valid_multifile_metainfo[b'info'][b'private'] = 0
+    info_bytes = bencode.encode(valid_multifile_metainfo[b'info'])
+    f = (tmp_path / 'test.torrent')
+    f.write_bytes(bencode.encode(valid_multifile_metainfo))
+
+    t = torf.Torrent.read(str(f))
+    assert t.infohash == sha1(info_bytes).hexdigest()
+    t.comment = 'Changes outside of info are ignored'
+    assert t.infohash == sha1(info_bytes).hexdigest()
+
+    # Decoding the name and dropping the private flag changes the info dictionary
+    t.name = t.name
+    assert t.infohash != sha1(info_bytes).hexdigest()
+    assert t.infohash == sha1(bencode.encode(_utils.encode_dict(t.metainfo['info']))).hexdigest()
+
+
+@pytest.fixture
+def torrent_files(valid_singlefile_metainfo, valid_multifile_metainfo, tmp_path):
+    (tmp_path / 'torrents' / 'sub').mkdir(parents=True)
+    singlefile = tmp_path / 'torrents' / 'single.torrent'
+    singlefile.write_bytes(bencode.encode(valid_singlefile_metainfo))
+    multifile = tmp_path / 'torrents' / 'sub' / 'multi.torrent'
+    multifile.write_bytes(bencode.encode(valid_multifile_metainfo))
+    invalid = tmp_path / 'torrents' / 'sub' / 'invalid.torrent'
+    invalid.write_bytes(b'not bencoded')
+    (tmp_path / 'torrents' / 'ignored.txt').write_bytes(b'not a torrent')
+    return singlefile, multifile, invalid
+
+
+def test_read_many_from_directories_and_files(torrent_files, tmp_path, mocker):
+    singlefile, multifile, invalid = torrent_files
+    nonexisting = tmp_path / 'nonexisting.torrent'
+    results = dict(torf.Torrent.read_many([tmp_path / 'torrents', nonexisting], processes=2))
+    assert sorted(results) == sorted(str(p) for p in (singlefile, multifile, invalid, nonexisting))
+    assert results[str(singlefile)] == torf.Torrent.read(singlefile)
+    assert results[str(multifile)] == torf.Torrent.read(multifile)
+    assert str(results[str(invalid)]) == f'{invalid}: Invalid torrent file format'
+    assert str(results[str(nonexisting)]) == f'{nonexisting}: No such file or directory'
+
+    # Original info bytes and validation are not lost in the worker process
+    encode_spy = mocker.spy(torf._torrent.bencode, 'encode')
+    validate_spy = mocker.spy(torf.Torrent, 'validate')
+    assert results[str(singlefile)].infohash == torf.Torrent.read(singlefile).infohash
+    assert encode_spy.call_args_list == []
+    assert validate_spy.call_count == 1
+
+
+def test_read_many_reports_invalid_metainfo(valid_singlefile_metainfo, tmp_path):
+    del valid_singlefile_metainfo[b'info'][b'name']
+    f = tmp_path / 'test.torrent'
+    f.write_bytes(bencode.encode(valid_singlefile_metainfo))
+    ((path, exception),) = torf.Torrent.read_many(f)
+    assert path == str(f)
+    assert isinstance(exception, torf.MetainfoError)
+    ((path, torrent),) = torf.Torrent.read_many(f, validate=False)
+    assert torrent.metainfo['info'].get('name') is None
+
+
+def test_read_many_with_selected_fields(torrent_files):
+    singlefile, multifile, invalid = torrent_files
+    results = dict(torf.Torrent.read_many([singlefile, multifile, invalid], fields=('name', 'files')))
+    for path in (singlefile, multifile):
+        torrent = torf.Torrent.read(path)
+        partial = results[str(path)]
+        assert partial.infohash == torrent.infohash
+        assert partial.trackers == torrent.trackers
+        assert partial.metainfo['info'] == {
+            key: value for key, value in torrent.metainfo['info'].items()
+            if key in ('name', 'files')
+        }
+    assert isinstance(results[str(invalid)], torf.BdecodeError)
+
+
+def test_read_many_with_selected_fields_that_validate(torrent_files):
+    singlefile, _, _ = torrent_files
+    fields = ('name', 'length', 'piece length', 'pieces')
+    ((path, partial),) = torf.Torrent.read_many(singlefile, fields=fields)
+    partial.validate()
+    assert partial.infohash == torf.Torrent.read(singlefile).infohash
+
+
+def test_read_many_reads_ahead_only_a_few_files(torrent_files):
+    singlefile, _, _ = torrent_files
+    consumed = []
+
+    def iter_paths():
+        for i in range(100):
+            consumed.append(i)
+            yield singlefile
+
+    results = torf.Torrent.read_many(iter_paths(), processes=1)
+    assert next(results)[0] == str(singlefile)
+    assert len(consumed) <= 5
+    results.close()
+    assert len(consumed) <= 5
+
+def test_read_many_does_not_fork(torrent_files, mocker):
+    singlefile, _, _ = torrent_files
+    executor_spy = mocker.spy(concurrent.futures, 'ProcessPoolExecutor')
+    assert [path for path, _ in torf.Torrent.read_many([singlefile], processes=1)] == [str(singlefile)]
+    assert executor_spy.call_args[1]['mp_context'].get_start_method() in ('forkserver', 'spawn')
@@ -3,6 +3,7 @@ import copy
 import errno
 import os
 import re
+import threading
 from types import SimpleNamespace
 from unittest.mock import MagicMock, Mock, call
 
@@ -733,3 +734,214 @@ def test_reuse_copies_file_order(with_callback, existing_torrents):
         # Confirm everything happened as expected
         assert return_value is True
         assert new_torrent.metainfo == exp_joined_metainfo
+
+
+def test_reuse_with_index_only_reads_candidates(existing_torrents, tmp_path, mocker):
+    existing_torrents = existing_torrents(
+        my_torrents=(
+            ('a', 'foo', {'creation_date': 123}),
+            ('b', 'bar', {'creation_date': 456}),
+            ('c', 'baz', {'creation_date': 789}),
+        ),
+    )
+    reused = existing_torrents.my_torrents[1]
+    read_spy = mocker.spy(torf.Torrent, 'read')
+
+    with torf.ReuseIndex(tmp_path / 'index.db') as index:
+        new_torrent = torf.Torrent(reused.content_path)
+        callback = Mock(return_value=None)
+        assert new_torrent.reuse(existing_torrents.location_paths, callback=callback, index=index,
+                                 update_index=True) is True
+        assert new_torrent.metainfo['info']['pieces'] == reused.torrent.metainfo['info']['pieces']
+        assert len(index) == 3
+        assert callback.call_args_list == [
+            call(new_torrent, str(reused.torrent_path), 1, 1, None, None),
+            call(new_torrent, str(reused.torrent_path), 1, 1, True, None),
+        ]
+
+        # Unchanged torrent files are not read again
+        read_spy.reset_mock()
+        new_torrent = torf.Torrent(reused.content_path)
+        assert new_torrent.reuse(existing_torrents.location_paths, index=index, update_index=True) is True
+        assert read_spy.call_args_list == [call(str(reused.torrent_path))]
+
+
+def test_reuse_with_index_does_not_update_index_by_default(existing_torrents, tmp_path, mocker):
+    existing_torrents = existing_torrents(
+        my_torrents=(
+            ('a', 'foo', {'creation_date': 123}),
+            ('b', 'bar', {'creation_date': 456}),
+        ),
+    )
+    reused = existing_torrents.my_torrents[1]
+
+    with torf.ReuseIndex(tmp_path / 'index.db') as index:
+        update_spy = mocker.spy(index, 'update')
+        new_torrent = torf.Torrent(reused.content_path)
+        assert new_torrent.reuse(existing_torrents.location_paths, index=index) is False
+        assert update_spy.call_args_list == []
+
+        assert index.update(*existing_torrents.location_paths) == ()
+        update_spy.reset_mock()
+        assert new_torrent.reuse(existing_torrents.location_paths, index=index) is True
+        assert update_spy.call_args_list == []
+        assert new_torrent.metainfo['info']['pieces'] == reused.torrent.metainfo['info']['pieces']
+
+
+def test_index_update_handles_changed_and_removed_torrents(existing_torrents, tmp_path):
+    existing_torrents = existing_torrents(
+        my_torrents=(
+            ('a', 'foo', {'creation_date': 123}),
+            ('b', 'bar', {'creation_date': 456}),
+        ),
+    )
+    torrent_a, torrent_b = existing_torrents.my_torrents
+    location = existing_torrents.locations['my_torrents']
+
+    with torf.ReuseIndex(tmp_path / 'index.db') as index:
+        assert index.update(location) == ()
+        assert index.find(torrent_a.torrent) == [str(torrent_a.torrent_path)]
+        assert index.find(torrent_b.torrent) == [str(torrent_b.torrent_path)]
+
+        # Broken torrent file is reported once
+        torrent_a.torrent_path.write_bytes(b'this is not a torrent')
+        exceptions = index.update(location)
+        assert [(path, type(e)) for path, e in exceptions] == [(str(torrent_a.torrent_path), torf.BdecodeError)]
+        assert index.update(location) == ()
+        assert index.find(torrent_a.torrent) == []
+
+        # Removed torrent file is forgotten
+        os.remove(torrent_b.torrent_path)
+        assert index.update(location) == ()
+        assert index.find(torrent_b.torrent) == []
+        assert len(index) == 1
+
+
+def test_index_find_only_returns_torrents_beneath_paths(existing_torrents, tmp_path):
+    existing_torrents = existing_torrents(
+        subpath1=(('a', 'foo', {'creation_date': 123}),),
+        subpath2=(('b', 'bar', {'creation_date': 456}),),
+    )
+    torrent_a = existing_torrents.subpath1[0]
+
+    with torf.ReuseIndex(tmp_path / 'index.db') as index:
+        assert index.update(*existing_torrents.location_paths) == ()
+        assert index.find(torrent_a.torrent, existing_torrents.locations['subpath1']) == [str(torrent_a.torrent_path)]
+        assert index.find(torrent_a.torrent, existing_torrents.locations['subpath2']) == []
+        assert index.find(torrent_a.torrent, str(existing_torrents.locations['subpath1']) + os.sep) \
+            == [str(torrent_a.torrent_path)]
+        assert index.find(torrent_a.torrent, str(existing_torrents.locations['subpath1']) + 'x') == []
+        assert index.find(torrent_a.torrent, torrent_a.torrent_path) == [str(torrent_a.torrent_path)]
+
+
+def test_reuse_does_not_decode_mismatching_torrents(existing_torrents, mocker):
+    existing_torrents = existing_torrents(
+        my_torrents=(
+            ('a', 'foo', {'creation_date': 123}),
+            ('b', 'bar', {'creation_date': 456}),
+            ('c', 'baz', {'creation_date': 789}),
+        ),
+    )
+    reused = existing_torrents.my_torrents[1]
+    read_spy = mocker.spy(torf.Torrent, 'read')
+
+    new_torrent = torf.Torrent(reused.content_path)
+    assert new_torrent.reuse(existing_torrents.location_paths) is True
+    assert read_spy.call_args_list == [call(str(reused.torrent_path))]
+
+
+def test_read_info(existing_torrents, tmp_path):
+    existing_torrents = existing_torrents(
+        my_torrents=(
+            ('a', 'foo', {}),
+            ('b', (('x', 'hey'), ('y', 'ho')), {}),
+        ),
+    )
+    single, multi = existing_torrents.my_torrents
+    assert torf._reuse.read_info(single.torrent_path) == {
+        'name': 'a',
+        'piece length': single.torrent.piece_size,
+        'length': 3,
+    }
+    assert torf._reuse.read_info(multi.torrent_path) == {
+        'name': 'b',
+        'piece length': multi.torrent.piece_size,
+        'files': [{'length': 3, 'path': ['x'], 'foohash': 'This could be your MD5 sum'},
+                  {'length': 2, 'path': ['y'], 'foohash': 'This could be your MD5 sum'}],
+    }
+
+    del single.torrent.metainfo['info']['piece length']
+    single.torrent.write(single.torrent_path, validate=False, overwrite=True)
+    assert torf._reuse.read_info(single.torrent_path) is None
+    assert torf._reuse.read_info(tmp_path / 'no such file.torrent') is None
+
+
+@pytest.mark.parametrize('threads', (1, 2, 4))
+def test_reuse_with_threads_reports_candidates_in_order(threads, tmp_path):
+    # Same name, file names and file sizes, but different content
+    torrents_path = tmp_path / 'torrents'
+    torrents_path.mkdir()
+    torrent_paths = []
+    for i in range(7):
+        content_path = tmp_path / str(i) / 'content'
+        content_path.mkdir(parents=True)
+        (content_path / 'this.jpg').write_bytes(bytes([i]) * 16380 * 30)
+        (content_path / 'that.txt').write_text('text data')
+        torrent = torf.Torrent(content_path)
+        torrent.generate()
+        torrent_paths.append(torrents_path / f'{i}.torrent')
+        torrent.write(torrent_paths[-1])
+    reused = torf.Torrent.read(torrent_paths[4])
+
+    new_torrent = torf.Torrent(tmp_path / '4' / 'content')
+    callback = Mock(return_value=None)
+    return_value = new_torrent.reuse(torrents_path, callback=callback, threads=threads)
+    assert return_value is True
+    assert new_torrent.metainfo['info']['pieces'] == reused.metainfo['info']['pieces']
+
+    exp_calls = []
+    for i, torrent_path in enumerate(torrent_paths[:4], start=1):
+        exp_calls.append(call(new_torrent, str(torrent_path), i, 7, None, None))
+        exp_calls.append(call(new_torrent, str(torrent_path), i, 7, False, None))
+    exp_calls.append(call(new_torrent, str(torrent_paths[4]), 5, 7, None, None))
+    exp_calls.append(call(new_torrent, str(torrent_paths[4]), 5, 7, True, None))
+    assert callback.call_args_list == exp_calls
+
+
+def test_reuse_with_threads_stops_comparing_when_closed(existing_torrents, mocker):
+    existing_torrents = existing_torrents(
+        my_torrents=tuple((str(i), 'foo', {}) for i in range(7)),
+    )
+    is_content_match_mock = mocker.patch('torf._reuse.is_content_match', return_value=False)
+    new_torrent = torf.Torrent(existing_torrents.my_torrents[0].content_path)
+    items = [(t.torrent_path, i, None) for i, t in enumerate(existing_torrents.my_torrents, start=1)]
+    candidates = torf._reuse.iter_candidates(new_torrent, items, threads=2)
+    assert next(candidates)[0] == items[0][0]
+    candidates.close()
+    assert not any(t.name.startswith('reuse') for t in threading.enumerate())
+    assert is_content_match_mock.call_count < len(items)
+
+    # Candidates that are screened after closing are not compared
+    stopped = threading.Event()
+    stopped.set()
+    candidate, exception, content_future = torf._reuse._screen_and_compare(
+        new_torrent, items[0][0], None, stopped,
+    )
+    assert candidate is not None
+    assert content_future is None
+
+
+def test_reuse_with_threads_raises_exceptions_in_order(existing_torrents):
+    existing_torrents = existing_torrents(
+        my_torrents=(
+            ('a', 'foo', {}),
+            ('b', 'bar', {}),
+            ('c', 'baz', {}),
+        ),
+    )
+    existing_torrents.my_torrents[1].torrent_path.write_bytes(b'not a torrent')
+    new_torrent = torf.Torrent(existing_torrents.my_torrents[2].content_path)
+    exp_exception = torf.BdecodeError(str(existing_torrents.my_torrents[1].torrent_path))
+    with pytest.raises(type(exp_exception), match=rf'^{re.escape(str(exp_exception))}$'):
+        new_torrent.reuse(existing_torrents.location_paths, threads=3)
+    assert 'pieces' not in new_torrent.metainfo['info']
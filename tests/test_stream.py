@@ -1,12 +1,14 @@
+import contextlib
 import errno
 import math
 import os
 import re
-from unittest.mock import Mock, PropertyMock, call
+from unittest.mock import Mock, PropertyMock, call, patch
 
 import pytest
 
 from torf import MemoryError, ReadError, TorrentFileStream, VerifyFileSizeError
+from torf._generate import PieceBufferPool
 
 from . import ComparableException
 
@@ -1257,9 +1259,10 @@ def test_get_open_file_respects_max_open_files(mocker):
         (None, None, None, None),
     ),
 )
+@pytest.mark.parametrize('read_mode', ('read', 'mmap', 'buffers', 'mmap+buffers', 'mmap_unsupported'))
 def test_iter_pieces_without_missing_files(
     torrent_content_path, stream_content_path, custom_content_path, exp_content_path,
-    chunk_size, files, exp_chunks,
+    chunk_size, files, exp_chunks, read_mode,
     tmp_path, mocker,
 ):
     torrent_name = 'my_torrent'
@@ -1296,7 +1299,34 @@ def test_iter_pieces_without_missing_files(
             with pytest.raises(ValueError, match=r'^Missing content_path argument and torrent has no path specified$'):
                 list(tfs.iter_pieces(content_path=custom_content_path))
         else:
-            assert list(tfs.iter_pieces(content_path=custom_content_path)) == exp_chunks_fixed
+            chunks = _iter_pieces_as_bytes(tfs, read_mode, content_path=custom_content_path)
+            assert chunks == exp_chunks_fixed
+
+
+def _iter_pieces_as_bytes(tfs, read_mode, **kwargs):
+    if read_mode.startswith('mmap'):
+        kwargs['memory_map'] = True
+    if read_mode in ('buffers', 'mmap+buffers'):
+        # One buffer is enough if every piece is returned immediately
+        buffer_pool = PieceBufferPool(size=1, piece_size=tfs._torrent.piece_size)
+        kwargs['buffer_pool'] = buffer_pool
+
+    # memoryview pieces are only valid until the next piece is requested
+    chunks = []
+    with contextlib.ExitStack() as stack:
+        if read_mode == 'mmap_unsupported':
+            stack.enter_context(patch('mmap.mmap', side_effect=OSError('mmap is not supported')))
+        for piece, filepath, exceptions in tfs.iter_pieces(**kwargs):
+            if isinstance(piece, memoryview):
+                piece_bytes = bytes(piece)
+                if 'buffers' in read_mode:
+                    buffer_pool.put(piece)
+                piece = piece_bytes
+            chunks.append((piece, filepath, exceptions))
+    if 'buffers' in read_mode:
+        # All buffers were returned
+        assert buffer_pool._buffers.qsize() == buffer_pool.size
+    return chunks
 
 
 @pytest.mark.parametrize(
@@ -1617,7 +1647,8 @@ def test_iter_pieces_without_missing_files(
     ),
     ids=lambda v: str(v),
 )
-def test_iter_pieces_with_missing_files(chunk_size, files, missing_files, exp_chunks, tmp_path):
+@pytest.mark.parametrize('read_mode', ('read', 'mmap', 'buffers', 'mmap+buffers', 'mmap_unsupported'))
+def test_iter_pieces_with_missing_files(chunk_size, files, missing_files, exp_chunks, read_mode, tmp_path):
     torrent_name = files[0].parts[0]
     content_path = tmp_path / torrent_name
     content_path.mkdir(parents=True, exist_ok=True)
@@ -1638,7 +1669,7 @@ def test_iter_pieces_with_missing_files(chunk_size, files, missing_files, exp_ch
 
     torrent = Torrent(piece_size=chunk_size, files=files)
     tfs = TorrentFileStream(torrent)
-    chunks = list(tfs.iter_pieces(content_path=content_path))
+    chunks = _iter_pieces_as_bytes(tfs, read_mode, content_path=content_path)
 
     def compare(x, y):
         if chunks[x][y] != exp_chunks_fixed[x][y]:
@@ -1652,6 +1683,30 @@ def test_iter_pieces_with_missing_files(chunk_size, files, missing_files, exp_ch
     assert chunks == exp_chunks_fixed
 
 
+@pytest.mark.parametrize(
+    argnames='read_mode, exp_pieces',
+    argvalues=(
+        ('read', [b'abcd', b'efgh', b'ijkl', b'mnop', b'qrst', b'u']),
+        ('mmap', [None, b'efgh', b'ijkl', b'mnop', None, b'u']),
+        ('buffers', [None, b'efgh', b'ijkl', b'mnop', None, b'u']),
+        ('mmap+buffers', [None, b'efgh', b'ijkl', b'mnop', None, b'u']),
+        ('mmap_unsupported', [b'abcd', b'efgh', b'ijkl', b'mnop', b'qrst', b'u']),
+    ),
+    ids=lambda v: str(v),
+)
+def test_iter_pieces_skips_pieces_inside_files(read_mode, exp_pieces, tmp_path):
+    files = [File('t/A', b'abcdefghij'), File('t/B', b'klmnopqrstu')]
+    (tmp_path / 't').mkdir()
+    for f in files:
+        (tmp_path / f).write_bytes(f.content)
+
+    torrent = Torrent(piece_size=4, files=files)
+    tfs = TorrentFileStream(torrent)
+    # Piece 2 spans both files and piece 5 is the incomplete final piece
+    chunks = _iter_pieces_as_bytes(tfs, read_mode, content_path=tmp_path / 't', skip_pieces={0, 2, 4, 5})
+    assert [piece for piece, _, _ in chunks] == exp_pieces
+
+
 class OOMCallback:
     def __init__(self, attempts):
         self._attempts = int(attempts)
@@ -1787,3 +1842,25 @@ def test_verify_piece_gets_handles_no_piece_hash(mocker):
     assert tfs.verify_piece(2, content_path='foo/path') is None
     with pytest.raises(ValueError, match=r'^piece_index must be in range 0 - 2: 3$'):
         tfs.verify_piece(3, content_path='foo/path')
+
+
+def test_file_index_is_updated_when_files_change():
+    files = [File('t/a', 3), File('t/b', 5), File('t/c', 7)]
+    torrent = Torrent(piece_size=4, files=files)
+    tfs = TorrentFileStream(torrent)
+    assert tfs.get_file_position(File('t/c', 7)) == 8
+    assert tfs.get_file_at_position(8) == 't/c'
+    assert tfs.get_files_at_byte_range(2, 3) == ['t/a', 't/b']
+
+    # Change list in place
+    torrent.files.insert(0, File('t/0', 2))
+    assert tfs.get_file_position(File('t/c', 7)) == 10
+    assert tfs.get_file_at_position(8) == 't/b'
+    assert tfs.get_files_at_byte_range(2, 3) == ['t/a']
+
+    # Replace list
+    torrent.files = [File('t/c', 7)]
+    assert tfs.get_file_position(File('t/c', 7)) == 0
+    assert tfs.get_file_at_position(6) == 't/c'
+    with pytest.raises(ValueError, match=r'^File not specified: t/a$'):
+        tfs.get_file_position(File('t/a', 3))
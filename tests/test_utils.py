@@ -191,6 +191,91 @@ def test_list_files_with_unreadable_file_in_directory(tmp_path):
         os.chmod(file, mode=file_mode)
 
 
+def test_scan_files_with_directory(testdir):
+    files = utils.scan_files(testdir)
+    assert [str(f) for f in files] == utils.list_files(testdir)
+    assert all(isinstance(f, utils.File) for f in files)
+    assert [f.size for f in files] == [os.path.getsize(f) for f in files]
+
+@pytest.mark.parametrize('threads', (2, 8))
+def test_scan_files_with_threads(threads, testdir, mocker):
+    mocker.patch('torf._utils._SCAN_CHUNK_SIZE', 3)
+    for i in range(20):
+        (testdir / 'foo' / f'file{i}').write_text('x' * i)
+    assert utils.scan_files(testdir, threads=threads) == utils.scan_files(testdir)
+
+def test_scan_files_sorts_paths_that_only_differ_in_case(tmp_path):
+    for name in ('b/X', 'B/x', 'B/X', 'b/x', 'a', 'A'):
+        (tmp_path / name).parent.mkdir(exist_ok=True)
+        (tmp_path / name).write_text('data')
+    exp_files = [str(tmp_path / name) for name in ('A', 'a', 'B/X', 'B/x', 'b/X', 'b/x')]
+    for threads in (1, 2, 8):
+        assert [str(f) for f in utils.scan_files(tmp_path, threads=threads)] == exp_files
+
+def test_scan_files_with_threads_raises_ReadError(testdir):
+    os.symlink(testdir / 'does/not/exist', testdir / '.bar' / 'baz' / 'broken')
+    with pytest.raises(errors.ReadError) as exc_info:
+        utils.scan_files(testdir, threads=4)
+    assert str(exc_info.value) == f'{testdir / ".bar" / "baz" / "broken"}: Permission denied'
+
+def test_scan_files_with_file(testdir):
+    assert utils.scan_files(testdir / 'foo/not_empty') == [utils.File(testdir / 'foo/not_empty', size=13)]
+
+def test_scan_files_with_nonexisting_path(tmp_path):
+    with pytest.raises(errors.ReadError) as exc_info:
+        utils.scan_files(tmp_path / 'nope')
+    assert str(exc_info.value) == f'{tmp_path / "nope"}: No such file or directory'
+
+def test_filter_files_uses_size_of_scanned_File_objects(mocker):
+    getsize_mock = mocker.patch('os.path.getsize')
+    files = [utils.File('base/empty', size=0), utils.File('base/not_empty', size=1)]
+    assert utils.filter_files(files, empty=False, scanned=True) == [files[1]]
+    assert getsize_mock.call_args_list == []
+
+def test_filter_files_keeps_declared_empty_files_that_do_not_exist(tmp_path):
+    files = [utils.File(tmp_path / 'empty', size=0), utils.File(tmp_path / 'not_empty', size=1)]
+    assert utils.filter_files(files, empty=False) == files
+
+
+@pytest.mark.parametrize(
+    argnames='exclude, include, path, exp_excluded',
+    argvalues=(
+        (('*.jpg',), (), 'base/foo.JPG', True),
+        (('*.jpg', '*.txt'), (), 'base/foo.txt', True),
+        (('*.jpg', '*.txt'), (), 'base/foo.png', False),
+        (('*.jpg',), ('*/keep/*',), 'base/keep/foo.jpg', False),
+        ((re.compile(r'foo'), re.compile(r'bar')), (), 'base/bar.txt', True),
+        ((re.compile(r'foo'), re.compile(r'bar')), (), 'base/BAR.txt', False),
+        ((re.compile(r'foo'), re.compile(r'bar', flags=re.IGNORECASE)), (), 'base/BAR.txt', True),
+        ((re.compile(r'(?i)foo'), re.compile(r'bar')), (), 'base/FOO.txt', True),
+        ((re.compile(r'(?i)foo'), re.compile(r'bar')), (), 'base/BAR.txt', False),
+        ((re.compile(r'(a)\1'), re.compile(r'(b)\1')), (), 'base/bb', True),
+        ((re.compile(r'(a)\1'), re.compile(r'(b)\1')), (), 'base/ab', False),
+        ((re.compile(r'foo'),), (re.compile(r'\.txt$'), '*.png'), 'base/foo.txt', False),
+        ((re.compile(r'foo'),), (re.compile(r'\.txt$'), '*.png'), 'base/foo.jpg', True),
+    ),
+)
+def test_PathMatcher_is_excluded(exclude, include, path, exp_excluded):
+    assert utils.PathMatcher(exclude=exclude, include=include).is_excluded(path) is exp_excluded
+
+@pytest.mark.parametrize(
+    argnames='exclude, include, dirpath, exp_pruned',
+    argvalues=(
+        (('base/build/*',), (), 'base/build', True),
+        (('*/BUILD*',), (), 'base/build', True),
+        (('*/build/*.o',), (), 'base/build', False),
+        (('*/build',), (), 'base/build', False),
+        (('base/build/*',), ('*.txt',), 'base/build', False),
+        ((re.compile(r'build'),), (), 'base/build', False),
+    ),
+)
+def test_PathMatcher_is_pruned(exclude, include, dirpath, exp_pruned):
+    matcher = utils.PathMatcher(exclude=exclude, include=include)
+    assert matcher.is_pruned(dirpath) is exp_pruned
+    if exp_pruned:
+        assert matcher.is_excluded(f'{dirpath}/some/file')
+
+
 def test_filter_files_with_default_arguments():
     filelist = ['base/foo/.hidden', 'base/foo/not_hidden',
                 'base/.hidden/.hidden', 'base/.hiddendir/not_hidden',
@@ -317,6 +402,20 @@ def test_File_is_picklable():
     assert file_unpickled == file_original
 
 
+def test_snapshot_changes_with_nested_values():
+    value = {'a': {'b': [1, {'c': 2}]}}
+    snapshot = utils.snapshot(value)
+    assert utils.snapshot(value) == snapshot
+    hash(snapshot)
+    value['a']['b'][1]['c'] = 3
+    assert utils.snapshot(value) != snapshot
+    snapshot = utils.snapshot(value)
+    value['a']['b'].append(4)
+    assert utils.snapshot(value) != snapshot
+    assert utils.snapshot({'a': []}) != utils.snapshot({'a': {}})
+    assert utils.snapshot({'a': [1]}) != utils.snapshot({'a': (1,)})
+
+
 def test_Filepath_is_equal_to_absolute_path():
     assert utils.Filepath('/some/path/to/a/file') == utils.Filepath('/some/path/to/a/file')
     assert utils.Filepath('/some/path/to/a/file') == '/some/path/to/a/file'
@@ -757,3 +856,84 @@ def test_download_with_zero_timeout(httpserver):
     with pytest.raises(torf.ConnectionError) as excinfo:
         utils.download('some/url', timeout=-1)
     assert str(excinfo.value) == 'some/url: Timed out'
+
+
+def test_bdecode_info_fields_skips_other_fields():
+    data = (b'd8:announce12:http://foo/a4:infod5:filesld6:lengthi3e4:pathl1:a1:beee'
+            b'4:name4:test12:piece lengthi16384e6:pieces20:' + b'x' * 20 + b'e3:zzzli1eee')
+    assert utils.bdecode_info_fields(data, ('name', 'piece length', 'files', 'length')) == {
+        'files': [{'length': 3, 'path': ['a', 'b']}],
+        'name': 'test',
+        'piece length': 16384,
+    }
+    assert utils.bdecode_info_fields(b'd3:fooi1ee', ('name',)) == {}
+
+@pytest.mark.parametrize('data', (
+    b'', b'l1:ae', b'd4:info', b'd4:infod4:name10:shorte', b'd4:infod4:namei1xe', b'd3:fooxe',
+    b'd4:infod4:name-1:ee',
+))
+def test_bdecode_info_fields_with_invalid_data(data):
+    with pytest.raises(ValueError):
+        utils.bdecode_info_fields(data, ('name',))
+
+def test_get_bencoded_info_span():
+    info = b'd4:name4:test12:piece lengthi16384e6:pieces20:' + b'x' * 20 + b'e'
+    data = b'd8:announce12:http://foo/a4:info' + info + b'3:zzzli1eee'
+    start, end = utils.get_bencoded_info_span(data)
+    assert data[start:end] == info
+    assert utils.get_bencoded_info_span(b'd3:fooi1ee') is None
+    assert utils.get_bencoded_info_span(b'd4:infoli1eee') is None
+    with pytest.raises(ValueError):
+        utils.get_bencoded_info_span(b'l1:ae')
+
+
+def test_PieceHashes_indexing_and_slicing():
+    pieces = b''.join(bytes([i]) * 20 for i in range(5))
+    hashes = utils.PieceHashes(pieces)
+    assert len(hashes) == 5
+    assert hashes[0] == b'\x00' * 20
+    assert hashes[-1] == b'\x04' * 20
+    assert list(hashes) == [bytes([i]) * 20 for i in range(5)]
+    assert hashes[1:3] == (b'\x01' * 20, b'\x02' * 20)
+    assert isinstance(hashes[1:3], utils.PieceHashes)
+    assert hashes[::2] == (b'\x00' * 20, b'\x02' * 20, b'\x04' * 20)
+    assert hashes[3:1] == ()
+    assert hashes.bytes is pieces
+    assert hashes[1:3].bytes == pieces[20:60]
+    with pytest.raises(IndexError):
+        hashes[5]
+    with pytest.raises(ValueError, match=r'^Length of pieces is not divisible by 20: 19$'):
+        utils.PieceHashes(b'x' * 19)
+
+def test_PieceHashes_does_not_share_mutable_memory():
+    pieces = bytearray(b'x' * 20)
+    hashes = utils.PieceHashes(pieces)
+    pieces[0] = 0
+    assert hashes[0] == b'x' * 20
+
+def test_PieceHashes_equality():
+    hashes = utils.PieceHashes(b'a' * 20 + b'b' * 20)
+    assert hashes == utils.PieceHashes(b'a' * 20 + b'b' * 20)
+    assert hashes != utils.PieceHashes(b'a' * 20 + b'c' * 20)
+    assert hashes == (b'a' * 20, b'b' * 20)
+    assert hashes == [b'a' * 20, b'b' * 20]
+    assert hashes != (b'a' * 20,)
+    assert hashes != b'a' * 20 + b'b' * 20
+    assert utils.PieceHashes() == ()
+
+def test_PieceHashes_is_hashable():
+    hashes = utils.PieceHashes(b'a' * 20 + b'b' * 20)
+    assert hash(hashes) == hash(utils.PieceHashes(b'a' * 20 + b'b' * 20))
+    assert hash(hashes[1:]) == hash(utils.PieceHashes(b'b' * 20))
+    assert {hashes: 'foo'}[utils.PieceHashes(b'a' * 20 + b'b' * 20)] == 'foo'
+
+def test_PieceHashes_diff():
+    a = utils.PieceHashes(os.urandom(20 * 50))
+    b = bytearray(a.bytes)
+    for index in (0, 7, 8, 49):
+        b[index * 20 + 5] ^= 0xff
+    assert a.diff(a) == ()
+    assert a.diff(bytes(b), block_size=4) == (0, 7, 8, 49)
+    assert a.diff(utils.PieceHashes(b)) == (0, 7, 8, 49)
+    assert a.diff(list(utils.PieceHashes(b[:20 * 10]))) == (0, 7, 8, *range(10, 50))
+    assert a[:10].diff(a) == tuple(range(10, 50))
@@ -3,6 +3,7 @@ import errno
 import itertools
 import os
 import random
+import shutil
 from unittest import mock
 
 import pytest
@@ -640,3 +641,95 @@ def test_verify_content_with_multiple_error_types(mktestcase, piece_size, callba
     tc.run(with_callback=callback['enabled'],
            # skip_on_error=random.choice((True, False)),
            exp_return_value=False)
+
+
+def test_verify_content_with_process_executor(create_dir, tmp_path):
+    content_path = create_dir('content',
+                              ('a', 100),
+                              ('b', 200),
+                              ('c', 300),
+                              ('d', 400))
+    torrent = torf.Torrent(content_path)
+    torrent.metainfo['info']['piece length'] = 64
+    torrent.generate()
+    assert torrent.verify(content_path, executor='process') is True
+
+    verify_path = tmp_path / 'verify'
+    shutil.copytree(content_path, verify_path)
+    (verify_path / 'b').unlink()
+    with open(verify_path / 'd', 'r+b') as f:
+        f.seek(350)
+        f.write(b'CORRUPTION')
+
+    cb = mock.Mock(return_value=None)
+    assert torrent.verify(verify_path, callback=cb, executor='process', threads=2) is False
+    exceptions = [c.args[6] for c in cb.call_args_list if c.args[6] is not None]
+    assert sorted(str(e) for e in exceptions) == sorted([
+        f'{verify_path / "b"}: No such file or directory',
+        f'Corruption in piece 15 in {verify_path / "d"}',
+    ])
+
+
+@pytest.mark.parametrize('readers', (2, 3, 10))
+def test_verify_content_with_multiple_readers(readers, create_dir, tmp_path):
+    content_path = create_dir('content',
+                              ('a', 100),
+                              ('b', 200),
+                              ('c', 300),
+                              ('d', 400))
+    torrent = torf.Torrent(content_path)
+    torrent.metainfo['info']['piece length'] = 64
+    torrent.generate()
+    assert torrent.verify(content_path, readers=readers) is True
+
+    verify_path = tmp_path / 'verify'
+    shutil.copytree(content_path, verify_path)
+    (verify_path / 'b').unlink()
+    with open(verify_path / 'd', 'r+b') as f:
+        f.seek(350)
+        f.write(b'CORRUPTION')
+
+    cb = mock.Mock(return_value=None)
+    assert torrent.verify(verify_path, callback=cb, readers=readers) is False
+    assert [c.args[2] for c in cb.call_args_list] == list(range(1, torrent.pieces + 1))
+    assert sorted(c.args[4] for c in cb.call_args_list) == list(range(torrent.pieces))
+    exceptions = [c.args[6] for c in cb.call_args_list if c.args[6] is not None]
+    assert sorted(str(e) for e in exceptions) == sorted([
+        f'{verify_path / "b"}: No such file or directory',
+        f'Corruption in piece 15 in {verify_path / "d"}',
+    ])
+
+
+@pytest.mark.parametrize('mmap_supported', (True, False), ids=('mmap', 'mmap_unsupported'))
+def test_verify_content_with_memory_map(mmap_supported, create_dir, tmp_path, mocker):
+    content_path = create_dir('content',
+                              ('a', 100),
+                              ('b', 200),
+                              ('c', 300),
+                              ('d', 400))
+    torrent = torf.Torrent(content_path)
+    torrent.metainfo['info']['piece length'] = 64
+    hashes = torrent.generate() and torrent.hashes
+    if not mmap_supported:
+        mocker.patch('mmap.mmap', side_effect=OSError('mmap is not supported'))
+    mmap_spy = mocker.spy(torf._stream.mmap, 'mmap')
+    del torrent.metainfo['info']['pieces']
+    assert torrent.generate(threads=3, memory_map=True) is True
+    assert torrent.hashes == hashes
+    assert mmap_spy.call_count == 4
+    assert torrent.verify(content_path, memory_map=True) is True
+
+    verify_path = tmp_path / 'verify'
+    shutil.copytree(content_path, verify_path)
+    (verify_path / 'b').unlink()
+    with open(verify_path / 'd', 'r+b') as f:
+        f.seek(350)
+        f.write(b'CORRUPTION')
+
+    cb = mock.Mock(return_value=None)
+    assert torrent.verify(verify_path, callback=cb, threads=2, memory_map=True) is False
+    exceptions = [c.args[6] for c in cb.call_args_list if c.args[6] is not None]
+    assert sorted(str(e) for e in exceptions) == sorted([
+        f'{verify_path / "b"}: No such file or directory',
+        f'Corruption in piece 15 in {verify_path / "d"}',
+    ])
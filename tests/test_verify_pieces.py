@@ -0,0 +1,149 @@
+import os
+from unittest import mock
+
+import pytest
+
+import torf
+
+
+def test_bitfield_stores_states_compactly():
+    bitfield = torf.PieceBitfield('d' * 40, 6)
+    assert len(bitfield) == 6
+    assert bitfield.states == b'\x00\x00'
+    assert bitfield.unknown_pieces == (0, 1, 2, 3, 4, 5)
+    bitfield[0] = torf.PieceBitfield.GOOD
+    bitfield[3] = torf.PieceBitfield.MISSING
+    bitfield[4] = torf.PieceBitfield.BAD
+    assert bitfield.states == bytes([0b11000001, 0b00000010])
+    assert [bitfield[i] for i in range(6)] == [1, 0, 0, 3, 2, 0]
+    assert bitfield.good_pieces == (0,)
+    assert bitfield.bad_pieces == (4,)
+    assert bitfield.missing_pieces == (3,)
+    assert bitfield.unknown_pieces == (1, 2, 5)
+    assert not bitfield
+    for i in range(6):
+        bitfield[i] = torf.PieceBitfield.GOOD
+    assert bitfield
+
+
+def test_bitfield_rejects_invalid_states():
+    bitfield = torf.PieceBitfield('d' * 40, 6)
+    with pytest.raises(IndexError, match=r'^Invalid piece index: 6$'):
+        bitfield[6] = torf.PieceBitfield.GOOD
+    with pytest.raises(ValueError, match=r'^Invalid piece state: 4$'):
+        bitfield[0] = 4
+    with pytest.raises(ValueError, match=r'^Expected 2 bytes of states for 6 pieces: 1$'):
+        torf.PieceBitfield('d' * 40, 6, states=b'\x00')
+
+
+def test_bitfield_write_and_read(tmp_path):
+    bitfield = torf.PieceBitfield('d' * 40, 6, file_signatures=('1:2:3:4', ''))
+    bitfield[2] = torf.PieceBitfield.BAD
+    bitfield.write(tmp_path / 'bitfield')
+    assert torf.PieceBitfield.read(tmp_path / 'bitfield') == bitfield
+
+    (tmp_path / 'bitfield').write_bytes(b'not bencoded')
+    with pytest.raises(torf.BdecodeError):
+        torf.PieceBitfield.read(tmp_path / 'bitfield')
+    with pytest.raises(torf.ReadError):
+        torf.PieceBitfield.read(tmp_path / 'nonexisting')
+
+
+def test_all_pieces_are_good(torrent, content):
+    result = torrent.verify_pieces(content)
+    assert result
+    assert result.infohash == torrent.infohash
+    assert result.good_pieces == tuple(range(8))
+
+
+@pytest.mark.parametrize('executor', ('thread', 'process'))
+def test_corrupt_pieces_are_recorded_without_raising(executor, torrent, content, piece_size_min, corrupt_file):
+    # Piece 3 starts in the middle of b.jpg
+    corrupt_file(content / 'b.jpg', int(piece_size_min * 0.5))
+    result = torrent.verify_pieces(content, executor=executor)
+    assert not result
+    assert result.bad_pieces == (3,)
+    assert result.good_pieces == (0, 1, 2, 4, 5, 6, 7)
+
+
+def test_corrupt_pieces_are_reported_to_callback(torrent, content, piece_size_min, corrupt_file):
+    corrupt_file(content / 'b.jpg', int(piece_size_min * 0.5))
+    cb = mock.Mock(return_value=None)
+    result = torrent.verify_pieces(content, callback=cb)
+    assert result.bad_pieces == (3,)
+    exceptions = [c.args[-1] for c in cb.call_args_list if c.args[-1] is not None]
+    assert [str(e) for e in exceptions] == [f'Corruption in piece 4 in {content / "b.jpg"}']
+
+
+def test_missing_file_is_recorded(torrent, content):
+    os.remove(content / 'c.jpg')
+    with mock.patch.object(torrent, 'validate'):
+        result = torrent.verify_pieces(content)
+    assert result.missing_pieces == (5, 6, 7)
+    assert result.good_pieces == (0, 1, 2, 3, 4)
+
+
+def test_cancelled_pieces_are_unknown(create_file, piece_size_min):
+    content_path = create_file('content', piece_size_min * 100)
+    t = torf.Torrent(content_path, piece_size=piece_size_min)
+    assert t.generate() is True
+    cb = mock.Mock(return_value='cancel')
+    result = t.verify_pieces(content_path, threads=1, callback=cb)
+    assert not result
+    assert 0 < len(result.good_pieces) < 100
+    assert result.unknown_pieces == tuple(range(len(result.good_pieces), 100))
+
+
+def test_previous_good_pieces_of_unchanged_files_are_not_checked(torrent, content, mocker, piece_size_min, corrupt_file):
+    corrupt_file(content / 'b.jpg', int(piece_size_min * 0.5))
+    previous = torrent.verify_pieces(content)
+    assert previous.bad_pieces == (3,)
+
+    # Only the bad piece is checked again
+    get_piece_spy = mocker.spy(torf.TorrentFileStream, 'get_piece')
+    cb = mock.Mock(return_value=None)
+    result = torrent.verify_pieces(content, previous=previous, callback=cb)
+    assert [c.args[1] for c in get_piece_spy.call_args_list] == [3]
+    assert [c.args[2:5] for c in cb.call_args_list] == [(1, 1, 3)]
+    assert result.bad_pieces == (3,)
+    assert result.good_pieces == (0, 1, 2, 4, 5, 6, 7)
+
+    # Nothing is checked if all pieces are good and no files changed
+    corrupt_file(content / 'b.jpg', int(piece_size_min * 0.5))
+    result = torrent.verify_pieces(content, previous=result)
+    assert result
+    get_piece_spy.reset_mock()
+    assert torrent.verify_pieces(content, previous=result) == result
+    assert get_piece_spy.call_args_list == []
+
+
+def test_pieces_of_changed_files_are_checked(torrent, content, mocker, tmp_path, piece_size_min, corrupt_file):
+    torrent.verify_pieces(content).write(tmp_path / 'bitfield')
+    previous = torf.PieceBitfield.read(tmp_path / 'bitfield')
+    assert previous
+
+    # c.jpg starts in piece 5, which also contains the end of b.jpg
+    corrupt_file(content / 'c.jpg', piece_size_min)
+    get_piece_spy = mocker.spy(torf.TorrentFileStream, 'get_piece')
+    result = torrent.verify_pieces(content, previous=previous)
+    assert [c.args[1] for c in get_piece_spy.call_args_list] == [5, 6, 7]
+    assert result.bad_pieces == (6,)
+
+
+def test_previous_bitfield_of_different_torrent(torrent, content):
+    previous = torf.PieceBitfield('d' * 40, torrent.pieces)
+    with pytest.raises(ValueError, match=r'^Bitfield belongs to different torrent: d{40}$'):
+        torrent.verify_pieces(content, previous=previous)
+
+
+def test_wrong_path_type_is_reported(torrent, content):
+    cb = mock.Mock(return_value=None)
+    result = torrent.verify_pieces(content / 'a.jpg', callback=cb)
+    assert result.unknown_pieces == tuple(range(8))
+    exceptions = [c.args[-1] for c in cb.call_args_list]
+    assert [type(e) for e in exceptions] == [torf.VerifyNotDirectoryError]
+
+
+def test_wrong_path_type_is_raised_without_callback(torrent, content):
+    with pytest.raises(torf.VerifyNotDirectoryError):
+        torrent.verify_pieces(content / 'a.jpg')
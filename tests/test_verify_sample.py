@@ -0,0 +1,144 @@
+import os
+from unittest import mock
+
+import pytest
+
+import torf
+
+
+@pytest.mark.parametrize(
+    argnames='kwargs, exp_count',
+    argvalues=(
+        ({'fraction': 0.5}, 4),
+        ({'fraction': 1}, 8),
+        ({'pieces': 3}, 3),
+        ({'pieces': 100}, 8),
+    ),
+    ids=lambda v: str(v),
+)
+def test_sample_size(kwargs, exp_count, torrent, content):
+    result = torrent.verify_sample(content, **kwargs)
+    assert result
+    assert len(result.piece_indexes) == exp_count
+    assert result.piece_indexes == tuple(sorted(set(result.piece_indexes)))
+    assert result.pieces_checked == exp_count
+    assert result.pieces_total == 8
+    assert result.bad_pieces == ()
+
+
+def test_pieces_per_file_samples_each_file(torrent, content):
+    result = torrent.verify_sample(content, pieces_per_file=1, seed=123)
+    assert result
+    with torf.TorrentFileStream(torrent) as stream:
+        for file in torrent.files:
+            file_piece_indexes = stream.get_piece_indexes_of_file(file)
+            assert set(file_piece_indexes) & set(result.piece_indexes)
+
+
+def test_seed_makes_sample_repeatable(torrent, content):
+    piece_indexes = {torrent.verify_sample(content, pieces=4, seed=42).piece_indexes
+                     for _ in range(5)}
+    assert len(piece_indexes) == 1
+
+
+@pytest.mark.parametrize(
+    argnames='kwargs, exp_error',
+    argvalues=(
+        ({}, 'Exactly one of fraction, pieces or pieces_per_file must be given'),
+        ({'fraction': 0.5, 'pieces': 1}, 'Exactly one of fraction, pieces or pieces_per_file must be given'),
+        ({'fraction': 0}, 'fraction must be greater than 0 and at most 1: 0.0'),
+        ({'fraction': 1.5}, 'fraction must be greater than 0 and at most 1: 1.5'),
+        ({'pieces': 0}, 'pieces must be positive: 0'),
+        ({'pieces_per_file': -1}, 'pieces_per_file must be positive: -1'),
+    ),
+    ids=lambda v: str(v),
+)
+def test_invalid_sample_size(kwargs, exp_error, torrent, content):
+    with pytest.raises(ValueError, match=rf'^{exp_error}$'):
+        torrent.verify_sample(content, **kwargs)
+
+
+@pytest.mark.parametrize('executor', ('thread', 'process'))
+def test_corrupt_piece_is_reported(executor, torrent, content, piece_size_min, corrupt_file):
+    # Piece 3 starts in the middle of b.jpg
+    corrupt_file(content / 'b.jpg', int(piece_size_min * 0.5))
+    cb = mock.Mock(return_value=None)
+    result = torrent.verify_sample(content, fraction=1, callback=cb, executor=executor)
+    assert not result
+    assert result.bad_pieces == (3,)
+    assert result.confidence() == 1.0
+
+    exceptions = [c.args[-1] for c in cb.call_args_list if c.args[-1] is not None]
+    assert [str(e) for e in exceptions] == [f'Corruption in piece 4 in {content / "b.jpg"}']
+    assert cb.call_count == 8
+    assert [c.args[2:4] for c in cb.call_args_list] == [(i, 8) for i in range(1, 9)]
+
+
+def test_corrupt_piece_is_raised_without_callback(torrent, content, piece_size_min, corrupt_file):
+    # Piece 3 starts in the middle of b.jpg
+    corrupt_file(content / 'b.jpg', int(piece_size_min * 0.5))
+    with pytest.raises(torf.VerifyContentError, match=r'^Corruption in piece 4 in '):
+        torrent.verify_sample(content, fraction=1)
+
+
+def test_callback_reports_sampled_pieces_only(torrent, content):
+    cb = mock.Mock(return_value=None)
+    result = torrent.verify_sample(content, pieces=3, seed=1, callback=cb)
+    assert result
+    assert sorted(c.args[4] for c in cb.call_args_list) == list(result.piece_indexes)
+    assert [c.args[2:4] for c in cb.call_args_list] == [(1, 3), (2, 3), (3, 3)]
+
+
+def test_cancelled_verification_is_falsy(torrent, content):
+    cb = mock.Mock(return_value='cancel')
+    result = torrent.verify_sample(content, fraction=1, callback=cb)
+    assert not result
+    assert result.bad_pieces == ()
+    assert result.pieces_checked < len(result.piece_indexes)
+
+
+def test_missing_file_is_reported(torrent, content, tmp_path):
+    os.remove(content / 'c.jpg')
+    cb = mock.Mock(return_value=None)
+    with mock.patch.object(torrent, 'validate'):
+        result = torrent.verify_sample(content, fraction=1, callback=cb)
+    assert not result
+    assert result.bad_pieces == (5, 6, 7)
+    exceptions = [c.args[-1] for c in cb.call_args_list if c.args[-1] is not None]
+    assert [str(e) for e in exceptions] == [f'{content / "c.jpg"}: No such file or directory']
+
+
+def test_wrong_path_type_is_reported(torrent, content):
+    cb = mock.Mock(return_value=None)
+    result = torrent.verify_sample(content / 'a.jpg', pieces=2, callback=cb)
+    assert not result
+    assert result.pieces_checked == 0
+    exceptions = [c.args[-1] for c in cb.call_args_list]
+    assert [type(e) for e in exceptions] == [torf.VerifyNotDirectoryError]
+
+
+@pytest.mark.parametrize(
+    argnames='pieces_total, pieces_checked, corrupt_fraction, exp_confidence',
+    argvalues=(
+        (100, 0, 0.1, 0.0),
+        (100, 1, 0.1, 0.1),
+        (100, 2, 0.1, 1 - (90 / 100) * (89 / 99)),
+        (100, 10, 0.01, 0.1),
+        (100, 91, 0.1, 1.0),
+        (100, 100, 0.01, 1.0),
+    ),
+)
+def test_confidence(pieces_total, pieces_checked, corrupt_fraction, exp_confidence):
+    result = torf.SampleResult(
+        pieces_total=pieces_total,
+        piece_indexes=range(pieces_checked),
+        pieces_checked=pieces_checked,
+        bad_pieces=(),
+    )
+    assert result.confidence(corrupt_fraction) == pytest.approx(exp_confidence)
+
+
+def test_confidence_with_invalid_corrupt_fraction():
+    result = torf.SampleResult(pieces_total=10, piece_indexes=(1,), pieces_checked=1, bad_pieces=())
+    with pytest.raises(ValueError, match=r'^corrupt_fraction must be greater than 0 and at most 1: 0.0$'):
+        result.confidence(0)
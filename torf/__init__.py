@@ -20,8 +20,13 @@ Create and parse torrent files and magnet URIs
 
 __version__ = '4.2.6'
 
+from ._async import AsyncProgress
+from ._bitfield import PieceBitfield
+from ._cache import PieceHashCache
 from ._errors import *
 from ._magnet import Magnet
+from ._reuse import ReuseIndex
+from ._sample import SampleResult
 from ._stream import TorrentFileStream
 from ._torrent import Torrent
-from ._utils import File, Filepath
+from ._utils import File, Filepath, PieceHashes
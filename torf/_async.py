@@ -0,0 +1,164 @@
+# This file is part of torf.
+#
+# torf is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# torf is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with torf.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import logging
+import threading
+
+from . import _generate as generate
+
+_debug = logging.getLogger('torf').debug
+
+# Marks the end of progress events
+_DONE = object()
+
+
+class AsyncProgress:
+    """
+    Run blocking :class:`~.Torrent` method in a thread without blocking the
+    event loop
+
+    Instances are awaitable and return the same value as the blocking method.
+
+    Instances are also asynchronous iterators. Each item is a tuple of the
+    arguments the blocking method passes to its `callback`, without the
+    :class:`~.Torrent` instance. Exceptions that are passed to `callback` by
+    the blocking method are only raised when awaiting if the instance is not
+    iterated over.
+
+    The method is started when the instance is iterated over or awaited for the
+    first time.
+
+    >>> progress = torrent.agenerate()
+    >>> async for filepath, pieces_done, pieces_total in progress:
+    ...     print(f'{pieces_done / pieces_total * 100:.2f} %')
+    >>> success = await progress
+
+    Cancelling the task that awaits the instance or iterates over it calls
+    :meth:`cancel`.
+
+    :param function: Blocking :class:`~.Torrent` method that accepts a
+        `callback` argument
+    :param kwargs: Keyword arguments for `function`
+    """
+
+    def __init__(self, function, **kwargs):
+        self._function = function
+        self._kwargs = kwargs
+        self._loop = None
+        self._future = None
+        self._events = None
+        self._iterating = False
+        self._cancelled = False
+        self._collector = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        if self._future is None:
+            self._loop = asyncio.get_running_loop()
+            self._events = asyncio.Queue()
+            self._future = self._loop.create_future()
+            threading.Thread(name='async', target=self._run, daemon=True).start()
+        return self._future
+
+    def _run(self):
+        try:
+            with generate.observe_collectors(self._set_collector):
+                result = self._function(callback=self._callback, **self._kwargs)
+        except BaseException as e:
+            _debug(f'{threading.current_thread().name}: Exception from {self._function.__name__}: {e!r}')
+            self._call_soon(self._finish, None, e)
+        else:
+            self._call_soon(self._finish, result, None)
+
+    def _call_soon(self, callback, *args):
+        try:
+            self._loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            # Event loop was closed
+            _debug(f'{threading.current_thread().name}: Failed to call {callback!r}: Event loop is closed')
+
+    def _finish(self, result, exception):
+        self._events.put_nowait(_DONE)
+        if not self._future.done():
+            if exception is not None:
+                self._future.set_exception(exception)
+            else:
+                self._future.set_result(result)
+
+    def _set_collector(self, collector):
+        with self._lock:
+            self._collector = collector
+            if self._cancelled:
+                collector.cancel()
+
+    def _callback(self, torrent, *args):
+        # This is called in the worker thread
+        if self._cancelled:
+            return True
+        elif self._iterating:
+            self._call_soon(self._events.put_nowait, args)
+        elif args and isinstance(args[-1], BaseException):
+            raise args[-1]
+
+    def cancel(self):
+        """
+        Stop as soon as possible
+
+        If pieces are being read, :meth:`~.Reader.stop` is called immediately.
+        Otherwise, the blocking method is cancelled the next time it reports
+        progress.
+
+        Awaiting the instance returns the same value as the blocking method
+        after it was cancelled by `callback`.
+        """
+        with self._lock:
+            self._cancelled = True
+            collector = self._collector
+        if collector is not None:
+            collector.cancel()
+
+    async def _cancel_and_wait(self):
+        self.cancel()
+        # Wait for the worker thread so it doesn't run after the event loop is
+        # closed
+        await asyncio.wait((self._future,))
+
+    async def _wait(self):
+        future = self._start()
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            await self._cancel_and_wait()
+            raise
+
+    def __await__(self):
+        return self._wait().__await__()
+
+    def __aiter__(self):
+        self._iterating = True
+        self._start()
+        return self
+
+    async def __anext__(self):
+        try:
+            event = await self._events.get()
+        except asyncio.CancelledError:
+            await self._cancel_and_wait()
+            raise
+        if event is _DONE:
+            # Keep the end marker for further calls
+            self._events.put_nowait(_DONE)
+            raise StopAsyncIteration
+        return event
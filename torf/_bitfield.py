@@ -0,0 +1,220 @@
+# This file is part of torf.
+#
+# torf is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# torf is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with torf.  If not, see <https://www.gnu.org/licenses/>.
+
+import itertools
+import math
+import os
+
+import flatbencode as bencode
+
+from . import _errors as error
+from . import _utils as utils
+
+
+def get_file_signature(filepath):
+    """
+    Return :class:`str` that changes if the file at `filepath` is modified or
+    replaced or an empty string if it doesn't exist
+    """
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return ''
+    else:
+        return utils.get_stat_signature(stat)
+
+
+def get_file_piece_ranges(torrent):
+    """Return `(first_piece_index, last_piece_index)` tuple for each file in `torrent`"""
+    piece_size = torrent.piece_size
+    file_ends = itertools.accumulate(file.size for file in torrent.files)
+    ranges = []
+    for file, file_end in zip(torrent.files, file_ends):
+        if file.size > 0:
+            ranges.append(((file_end - file.size) // piece_size, (file_end - 1) // piece_size))
+        else:
+            ranges.append((None, None))
+    return ranges
+
+
+class PieceBitfield:
+    """
+    Result of :meth:`~.Torrent.verify_pieces`
+
+    The state of each piece is stored in two bits. It is one of
+    :attr:`UNKNOWN`, :attr:`GOOD`, :attr:`BAD` or :attr:`MISSING`.
+
+    Instances are truthy if all pieces are :attr:`GOOD`.
+
+    :param str infohash: :attr:`~.Torrent.infohash` of the verified torrent
+    :param int pieces: Number of pieces in the torrent
+    :param states: :class:`bytes` as returned by :attr:`states` or ``None``
+        to mark all pieces as :attr:`UNKNOWN`
+    :param file_signatures: Sequence of :class:`str` objects that identify the
+        state of each file in :attr:`~.Torrent.files` when it was verified
+    """
+
+    UNKNOWN = 0
+    """Piece was not checked"""
+
+    GOOD = 1
+    """Piece hash matches"""
+
+    BAD = 2
+    """Piece hash doesn't match"""
+
+    MISSING = 3
+    """Piece could not be read, e.g. because a file is missing or has the wrong size"""
+
+    def __init__(self, infohash, pieces, states=None, file_signatures=()):
+        self._infohash = str(infohash)
+        self._pieces = int(pieces)
+        size = math.ceil(self._pieces / 4)
+        if states is None:
+            self._states = bytearray(size)
+        elif len(states) != size:
+            raise ValueError(f'Expected {size} bytes of states for {self._pieces} pieces: {len(states)}')
+        else:
+            self._states = bytearray(states)
+        self._file_signatures = tuple(str(sig) for sig in file_signatures)
+
+    @property
+    def infohash(self):
+        """:attr:`~.Torrent.infohash` of the verified torrent"""
+        return self._infohash
+
+    @property
+    def states(self):
+        """Piece states as :class:`bytes` with four pieces per byte"""
+        return bytes(self._states)
+
+    @property
+    def file_signatures(self):
+        """Sequence of file signatures (see :func:`get_file_signature`)"""
+        return self._file_signatures
+
+    def __len__(self):
+        return self._pieces
+
+    def __getitem__(self, piece_index):
+        if not 0 <= piece_index < self._pieces:
+            raise IndexError(f'Invalid piece index: {piece_index}')
+        byte_index, shift = divmod(piece_index, 4)
+        return (self._states[byte_index] >> (shift * 2)) & 0b11
+
+    def __setitem__(self, piece_index, state):
+        if not 0 <= piece_index < self._pieces:
+            raise IndexError(f'Invalid piece index: {piece_index}')
+        elif state not in (self.UNKNOWN, self.GOOD, self.BAD, self.MISSING):
+            raise ValueError(f'Invalid piece state: {state!r}')
+        byte_index, shift = divmod(piece_index, 4)
+        self._states[byte_index] = (
+            (self._states[byte_index] & ~(0b11 << (shift * 2)))
+            | (state << (shift * 2))
+        )
+
+    def get_piece_indexes(self, state):
+        """Return sorted sequence of indexes of pieces with `state`"""
+        return tuple(piece_index for piece_index in range(self._pieces)
+                     if self[piece_index] == state)
+
+    @property
+    def good_pieces(self):
+        """Sorted sequence of indexes of pieces that are :attr:`GOOD`"""
+        return self.get_piece_indexes(self.GOOD)
+
+    @property
+    def bad_pieces(self):
+        """Sorted sequence of indexes of pieces that are :attr:`BAD`"""
+        return self.get_piece_indexes(self.BAD)
+
+    @property
+    def missing_pieces(self):
+        """Sorted sequence of indexes of pieces that are :attr:`MISSING`"""
+        return self.get_piece_indexes(self.MISSING)
+
+    @property
+    def unknown_pieces(self):
+        """Sorted sequence of indexes of pieces that are :attr:`UNKNOWN`"""
+        return self.get_piece_indexes(self.UNKNOWN)
+
+    def dump(self):
+        """Return bencoded :class:`bytes`"""
+        return bencode.encode({
+            b'infohash': self._infohash.encode('ascii'),
+            b'pieces': self._pieces,
+            b'states': bytes(self._states),
+            b'files': [sig.encode('ascii') for sig in self._file_signatures],
+        })
+
+    def write(self, filepath):
+        """
+        Write :meth:`dump` to `filepath`, replacing it atomically if it exists
+
+        :raises WriteError: if writing to `filepath` fails
+        """
+        utils.write_file_atomically(filepath, self.dump())
+
+    @classmethod
+    def read(cls, filepath):
+        """
+        Read instance from file that was created with :meth:`write`
+
+        :raises ReadError: if reading from `filepath` fails
+        :raises BdecodeError: if `filepath` does not contain a valid bitfield
+        """
+        try:
+            with open(filepath, 'rb') as f:
+                content = f.read()
+        except OSError as e:
+            raise error.ReadError(e.errno, str(filepath))
+
+        try:
+            data = bencode.decode(content)
+            return cls(
+                infohash=data[b'infohash'].decode('ascii'),
+                pieces=data[b'pieces'],
+                states=data[b'states'],
+                file_signatures=(sig.decode('ascii') for sig in data[b'files']),
+            )
+        except (bencode.DecodingError, ValueError, TypeError, KeyError, AttributeError):
+            raise error.BdecodeError(str(filepath))
+
+    def __bool__(self):
+        # Compare all bytes at once with the states of all good pieces
+        full_bytes, remainder = divmod(self._pieces, 4)
+        all_good = bytearray([0b01010101] * full_bytes)
+        if remainder:
+            all_good.append(0b01010101 & ((1 << (remainder * 2)) - 1))
+        return self._pieces > 0 and self._states == all_good
+
+    def __eq__(self, other):
+        if isinstance(other, type(self)):
+            return (
+                self._infohash == other._infohash
+                and self._pieces == other._pieces
+                and self._states == other._states
+                and self._file_signatures == other._file_signatures
+            )
+        return NotImplemented
+
+    def __repr__(self):
+        return (
+            f'{type(self).__name__}('
+            f'infohash={self._infohash!r}, '
+            f'pieces={self._pieces!r}, '
+            f'bad_pieces={self.bad_pieces!r}, '
+            f'missing_pieces={self.missing_pieces!r}, '
+            f'unknown_pieces={self.unknown_pieces!r})'
+        )
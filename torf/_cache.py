@@ -0,0 +1,196 @@
+# This file is part of torf.
+#
+# torf is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# torf is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with torf.  If not, see <https://www.gnu.org/licenses/>.
+
+import hashlib
+import os
+import time
+
+from . import _errors as error
+from . import _utils as utils
+from ._stream import TorrentFileStream
+
+
+class PieceHashCache(utils.SQLiteDatabase):
+    """
+    Persistent storage of piece hashes
+
+    Piece hashes are stored in an SQLite database together with the identity of
+    the files that contain the piece (device, inode, size and modification time)
+    and the byte range in each file. :meth:`~.Torrent.generate` and
+    :meth:`~.Torrent.verify` don't read pieces if all of their files are
+    unchanged.
+
+    .. note:: A file that is modified without changing its size or
+       modification time is not detected.
+
+    :param path: Path to the database file; it is created if it doesn't exist
+    :param int max_entries: Maximum number of stored piece hashes or ``None``;
+        least recently used hashes are removed first
+    :param float max_age: Number of seconds after which unused piece hashes are
+        removed or ``None``
+
+    :raises ReadError: if the database can't be opened
+    """
+
+    _schema = (
+        'CREATE TABLE IF NOT EXISTS hashes '
+        '(key BLOB PRIMARY KEY, hash BLOB NOT NULL, last_used INTEGER NOT NULL)',
+        'CREATE INDEX IF NOT EXISTS last_used_index ON hashes (last_used)',
+    )
+    _table = 'hashes'
+    _description = 'piece hash cache'
+
+    # Number of keys per SQL query
+    _chunk_size = 500
+
+    def __init__(self, path, max_entries=None, max_age=None):
+        self._max_entries = None if max_entries is None else int(max_entries)
+        self._max_age = None if max_age is None else float(max_age)
+        super().__init__(path)
+
+    @property
+    def max_entries(self):
+        """Maximum number of stored piece hashes or ``None``"""
+        return self._max_entries
+
+    @property
+    def max_age(self):
+        """Number of seconds after which unused piece hashes are removed or ``None``"""
+        return self._max_age
+
+    def get(self, keys):
+        """
+        Return mapping of known `keys` to piece hashes
+
+        Each found key is marked as recently used.
+
+        :param keys: Sequence of :class:`bytes` as returned by
+            :meth:`get_piece_keys`
+
+        :raises ReadError: if reading from the database fails
+        """
+        keys = tuple(keys)
+        hashes = {}
+        now = int(time.time())
+        with self._transaction('read from', error.ReadError) as db:
+            for i in range(0, len(keys), self._chunk_size):
+                chunk = keys[i:i + self._chunk_size]
+                placeholders = ','.join('?' * len(chunk))
+                cursor = db.execute(
+                    f'SELECT key, hash FROM hashes WHERE key IN ({placeholders})',
+                    chunk,
+                )
+                hashes.update(cursor.fetchall())
+            db.executemany(
+                'UPDATE hashes SET last_used = ? WHERE key = ?',
+                ((now, key) for key in hashes),
+            )
+        return hashes
+
+    def set(self, items):
+        """
+        Store piece hashes and remove old ones
+
+        :param items: Sequence of `(key, piece_hash)` tuples
+
+        :raises WriteError: if writing to the database fails
+        """
+        now = int(time.time())
+        with self._transaction('write to', error.WriteError) as db:
+            db.executemany(
+                'INSERT OR REPLACE INTO hashes (key, hash, last_used) VALUES (?, ?, ?)',
+                ((key, piece_hash, now) for key, piece_hash in items),
+            )
+            self._prune(now)
+
+    def prune(self):
+        """
+        Remove piece hashes that exceed :attr:`max_age` or :attr:`max_entries`
+
+        This is called automatically by :meth:`set`.
+
+        :raises WriteError: if writing to the database fails
+        """
+        with self._transaction('prune', error.WriteError):
+            self._prune(int(time.time()))
+
+    def _prune(self, now):
+        if self._max_age is not None:
+            self._db.execute('DELETE FROM hashes WHERE last_used < ?', (now - self._max_age,))
+        if self._max_entries is not None:
+            self._db.execute(
+                'DELETE FROM hashes WHERE key IN '
+                '(SELECT key FROM hashes ORDER BY last_used DESC LIMIT -1 OFFSET ?)',
+                (self._max_entries,),
+            )
+
+    @staticmethod
+    def get_piece_keys(torrent, content_path=None):
+        """
+        Return cache key and file path for each piece
+
+        A key identifies the files and byte ranges a piece is made of. It is
+        ``None`` if any of those files doesn't exist or has an unexpected size.
+
+        The file path is the last file that contains the piece, i.e. the one
+        that is reported by :meth:`~.Torrent.generate` and
+        :meth:`~.Torrent.verify`.
+
+        :param torrent: :class:`~.Torrent` instance
+        :param content_path: Path to file or directory (defaults to
+            :attr:`~.Torrent.path`)
+
+        :return: List of `(key, filepath)` tuples
+        """
+        piece_size = torrent.piece_size
+        stream = TorrentFileStream(torrent, content_path=content_path)
+        hashers = [hashlib.sha1() for _ in range(torrent.pieces)]
+        filepaths = [None] * len(hashers)
+        invalid = set()
+
+        file_start = 0
+        for file in torrent.files:
+            file_end = file_start + file.size
+            if file.size <= 0:
+                continue
+
+            filepath = stream._get_content_path(content_path, none_ok=False, file=file)
+            try:
+                stat = os.stat(filepath)
+            except OSError:
+                signature = None
+            else:
+                if stat.st_size == file.size:
+                    signature = utils.get_stat_signature(stat)
+                else:
+                    signature = None
+
+            first_piece_index = file_start // piece_size
+            last_piece_index = (file_end - 1) // piece_size
+            for piece_index in range(first_piece_index, last_piece_index + 1):
+                filepaths[piece_index] = filepath
+                if signature is None:
+                    invalid.add(piece_index)
+                else:
+                    # Byte range of this piece in `file`
+                    start = max(piece_index * piece_size, file_start) - file_start
+                    end = min((piece_index + 1) * piece_size, file_end) - file_start
+                    hashers[piece_index].update(f'{signature}:{start}:{end};'.encode())
+
+            file_start = file_end
+
+        return [
+            (None if piece_index in invalid else hasher.digest(), filepaths[piece_index])
+            for piece_index, hasher in enumerate(hashers)
+        ]
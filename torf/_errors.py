@@ -22,6 +22,19 @@ class TorfError(Exception):
         self.posargs = posargs
         self.kwargs = kwargs
 
+    def __reduce__(self):
+        # Subclasses have different signatures, so we can't rely on the default
+        # implementation that calls `type(self)(*self.args)`. This is needed to
+        # pass exceptions from worker processes.
+        return (_unpickle_exception, (type(self), self.args, self.__dict__))
+
+
+def _unpickle_exception(cls, args, state):
+    exception = BaseException.__new__(cls)
+    Exception.__init__(exception, *args)
+    exception.__dict__.update(state)
+    return exception
+
 
 class URLError(TorfError):
     """Invalid URL"""
@@ -186,6 +199,36 @@ class VerifyFileSizeError(TorfError):
         return self._expected_size
 
 
+class StreamSizeError(TorfError):
+    """Stream provides more or less data than the files of a torrent"""
+    def __init__(self, actual_size, expected_size):
+        self._actual_size = actual_size
+        self._expected_size = expected_size
+        if actual_size > expected_size:
+            super().__init__(f'Stream is too big: More than {expected_size} bytes',
+                             actual_size=actual_size, expected_size=expected_size)
+        elif actual_size < expected_size:
+            super().__init__(f'Stream is too small: {actual_size} instead of {expected_size} bytes',
+                             actual_size=actual_size, expected_size=expected_size)
+        else:
+            raise RuntimeError(f'Unjustified: actual_size={actual_size} == expected_size={expected_size}')
+
+    @property
+    def actual_size(self):
+        """
+        Number of bytes provided by the stream
+
+        If the stream is too big, this is only the number of bytes that were
+        read before that was noticed.
+        """
+        return self._actual_size
+
+    @property
+    def expected_size(self):
+        """Combined size of all files"""
+        return self._expected_size
+
+
 class VerifyContentError(TorfError):
     """On-disk data does not match hashes in metainfo"""
     def __init__(self, filepath, piece_index, piece_size, file_sizes):
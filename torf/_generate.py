@@ -12,15 +12,23 @@
 # You should have received a copy of the GNU General Public License
 # along with torf.  If not, see <https://www.gnu.org/licenses/>.
 
+import bisect
+import concurrent.futures
+import contextlib
 import errno
+import itertools
 import logging
+import math
 import os
 import queue
 import threading
 from hashlib import sha1
 from time import monotonic as time_monotonic
 
+import flatbencode as bencode
+
 from . import _errors as errors
+from . import _utils as utils
 from ._stream import TorrentFileStream
 
 QUEUE_CLOSED = object()
@@ -94,28 +102,82 @@ class Reader(Worker):
     """
     :class:`Worker` subclass that reads files in pieces and pushes them to a
     queue
+
+    If `piece_indexes` is not `None`, only the pieces at those indexes are read
+    one by one.
+
+    If `skip_pieces` is not `None`, files are still read sequentially, but the
+    pieces at those indexes are not pushed and skipped without reading them
+    where possible (see :meth:`~.TorrentFileStream.iter_pieces`).
+
+    If `memory_map` is true and `piece_indexes` is `None`, files are mapped
+    into memory and pieces that don't span multiple files are hashed without
+    copying them (see :meth:`~.TorrentFileStream.iter_pieces`).
+
+    `piece_queue`, `buffer_pool` and `exception_filter` may be shared with other
+    readers (see :class:`ShardedReader`). A provided `piece_queue` is not closed
+    when reading is done.
     """
 
-    def __init__(self, *, torrent, queue_size, path=None):
+    def __init__(self, *, torrent, queue_size, path=None, piece_indexes=None, skip_pieces=None,
+                 memory_map=False, piece_queue=None, buffer_pool=None, exception_filter=None,
+                 name='reader'):
         self._torrent = torrent
         self._path = path
-        self._piece_queue = queue.Queue(maxsize=queue_size)
+        self._memory_map = memory_map
+        self._piece_indexes = None if piece_indexes is None else sorted(piece_indexes)
+        self._skip_pieces = frozenset(skip_pieces or ())
+        # The owner of a provided `piece_queue` is responsible for closing it
+        self._close_piece_queue = piece_queue is None
+        self._piece_queue = queue.Queue(maxsize=queue_size) if piece_queue is None else piece_queue
+        # Pieces are read into a fixed number of buffers that are handed back
+        # by the hashers. If all buffers are in use, reading blocks until a
+        # piece is hashed.
+        if buffer_pool is None:
+            pieces = torrent.pieces if piece_indexes is None else len(self._piece_indexes)
+            buffer_pool = PieceBufferPool(
+                size=max(1, min(queue_size, pieces)),
+                piece_size=torrent.piece_size,
+            )
+        self._buffer_pool = buffer_pool
+        self._exception_filter = ExceptionFilter() if exception_filter is None else exception_filter
         self._stop = False
-        self._memory_error_timestamp = -1
-        super().__init__(name='reader', worker=self._push_pieces)
+        super().__init__(name=name, worker=self._push_pieces)
 
     def _push_pieces(self):
         stream = TorrentFileStream(self._torrent)
         try:
-            iter_pieces = stream.iter_pieces(self._path, oom_callback=self._handle_oom)
-            for piece_index, (piece, filepath, exceptions) in enumerate(iter_pieces):
+            if self._piece_indexes is None:
+                iter_pieces = enumerate(stream.iter_pieces(
+                    self._path,
+                    memory_map=self._memory_map,
+                    buffer_pool=self._buffer_pool,
+                    skip_pieces=self._skip_pieces,
+                ))
+            else:
+                iter_pieces = self._iter_pieces_at_indexes(stream)
+
+            # Exceptions are only reported for the first piece of a missing
+            # file. If that piece is skipped, they are reported with the next
+            # missing piece that isn't skipped.
+            skipped_exceptions = ()
+            for piece_index, (piece, filepath, exceptions) in iter_pieces:
                 # _debug(f'{_thread_name()}: Read #{piece_index}')
                 if self._stop:
                     _debug(f'{_thread_name()}: Stopped reading')
+                    if piece:
+                        self._buffer_pool.put(piece)
                     break
-                elif exceptions:
+                elif piece_index in self._skip_pieces:
+                    if piece:
+                        self._buffer_pool.put(piece)
+                    skipped_exceptions += tuple(exceptions)
+                elif exceptions or (skipped_exceptions and not piece):
+                    exceptions = (*skipped_exceptions, *exceptions)
+                    skipped_exceptions = ()
                     self._push_piece(piece_index=piece_index, filepath=filepath, exceptions=exceptions)
                 elif piece:
+                    skipped_exceptions = ()
                     self._push_piece(piece_index=piece_index, filepath=filepath, piece=piece)
                 else:
                     # `piece` is None because of missing file, and the exception
@@ -129,28 +191,25 @@ class Reader(Worker):
             raise
 
         finally:
-            self._piece_queue.put(QUEUE_CLOSED)
-            _debug(f'{_thread_name()}: Piece queue is now exhausted')
+            if self._close_piece_queue:
+                self._piece_queue.put(QUEUE_CLOSED)
+                _debug(f'{_thread_name()}: Piece queue is now exhausted')
             stream.close()
 
+    def _iter_pieces_at_indexes(self, stream):
+        # Read pieces one by one and report each exception only once, like
+        # TorrentFileStream.iter_pieces() does it
+        for piece_index in self._piece_indexes:
+            buffer = self._buffer_pool.get()
+            filepath, piece, exceptions = _read_piece(stream, piece_index, self._path, buffer=buffer)
+            if piece is None:
+                self._buffer_pool.put(buffer)
+            yield piece_index, (piece, filepath, self._exception_filter(exceptions))
+
     def _push_piece(self, *, piece_index, filepath, piece=None, exceptions=()):
         # _debug(f'{_thread_name()}: Pushing #{piece_index}: {filepath}: {_pretty_bytes(piece)}, {exceptions!r}')
         self._piece_queue.put((piece_index, filepath, piece, exceptions))
 
-    def _handle_oom(self, exception):
-        # Reduce piece_queue.maxsize by 1 every 100ms until the MemoryErrors stop
-        now = time_monotonic()
-        time_diff = now - self._memory_error_timestamp
-        if time_diff >= 0.1:
-            old_maxsize = self._piece_queue.maxsize
-            new_maxsize = max(1, int(old_maxsize * 0.9))
-            if new_maxsize != old_maxsize:
-                _debug(f'{_thread_name()}: Reducing piece_queue.maxsize to {new_maxsize}')
-                self._piece_queue.maxsize = new_maxsize
-                self._memory_error_timestamp = now
-            else:
-                raise errors.ReadError(errno.ENOMEM, exception)
-
     def stop(self):
         """Stop reading and close the piece queue"""
         if not self._stop:
@@ -165,16 +224,434 @@ class Reader(Worker):
         """
         return self._piece_queue
 
+    @property
+    def buffer_pool(self):
+        """
+        :class:`PieceBufferPool` instance that provides the buffers of the
+        pieces in :attr:`piece_queue`
+        """
+        return self._buffer_pool
+
+
+class StreamReader(Worker):
+    """
+    :class:`Worker` subclass that reads pieces from a stream and pushes them to
+    a queue
+
+    `data` is a file-like object with a ``readinto()`` or ``read()`` method or
+    an iterable of bytes-like objects of any size. It must provide the
+    concatenated content of the torrent's files.
+
+    Each piece is reported with the path of the file that contains its last
+    byte. `filepaths` are the reported paths of the torrent's files and default
+    to their relative paths.
+
+    :raise StreamSizeError: if `data` provides more or less data than the
+        torrent's files
+    """
+
+    def __init__(self, *, torrent, queue_size, data, filepaths=None):
+        self._torrent = torrent
+        self._fill = _get_stream_filler(data)
+        if filepaths is None:
+            filepaths = [str(file) for file in torrent.files]
+        self._filepaths = filepaths
+        self._piece_queue = queue.Queue(maxsize=queue_size)
+        self._buffer_pool = PieceBufferPool(
+            size=max(1, min(queue_size, torrent.pieces)),
+            piece_size=torrent.piece_size,
+        )
+        self._stop = False
+        super().__init__(name='reader', worker=self._push_pieces)
+
+    def _push_pieces(self):
+        try:
+            piece_size = self._torrent.piece_size
+            total_size = self._torrent.size
+            file_ends = list(itertools.accumulate(file.size for file in self._torrent.files))
+            for piece_index in range(self._torrent.pieces):
+                if self._stop:
+                    _debug(f'{_thread_name()}: Stopped reading')
+                    break
+
+                piece_start = piece_index * piece_size
+                piece_length = min(piece_size, total_size - piece_start)
+                buffer = self._buffer_pool.get()
+                piece = memoryview(buffer)[:piece_length]
+                bytes_read = self._fill(piece)
+                if bytes_read < piece_length:
+                    self._buffer_pool.put(piece)
+                    raise errors.StreamSizeError(piece_start + bytes_read, total_size)
+
+                filepath = self._filepaths[bisect.bisect_right(file_ends, piece_start + piece_length - 1)]
+                self._piece_queue.put((piece_index, filepath, piece, ()))
+
+            else:
+                # Make sure there is no more data
+                if self._fill(memoryview(bytearray(1))):
+                    raise errors.StreamSizeError(total_size + 1, total_size)
+
+        except BaseException as e:
+            _debug(f'{_thread_name()}: Exception while reading: {e!r}')
+            raise
+
+        finally:
+            self._piece_queue.put(QUEUE_CLOSED)
+            _debug(f'{_thread_name()}: Piece queue is now exhausted')
+
+    def stop(self):
+        """Stop reading and close the piece queue"""
+        if not self._stop:
+            _debug(f'{_thread_name()}: {type(self).__name__}: Setting stop flag')
+            self._stop = True
+
+    @property
+    def piece_queue(self):
+        """:class:`queue.Queue` instance that gets evenly sized pieces from the stream"""
+        return self._piece_queue
+
+    @property
+    def buffer_pool(self):
+        """
+        :class:`PieceBufferPool` instance that provides the buffers of the
+        pieces in :attr:`piece_queue`
+        """
+        return self._buffer_pool
+
+
+def _get_stream_filler(data):
+    # Return callable that fills a memoryview from `data` and returns the number
+    # of bytes written, which is smaller than its length only if `data` is
+    # exhausted
+    if hasattr(data, 'readinto'):
+        def fill(view):
+            filled = 0
+            while filled < len(view):
+                bytes_read = data.readinto(view[filled:])
+                if not bytes_read:
+                    break
+                filled += bytes_read
+            return filled
+
+    elif hasattr(data, 'read'):
+        def fill(view):
+            filled = 0
+            while filled < len(view):
+                chunk = data.read(len(view) - filled)
+                if not chunk:
+                    break
+                view[filled:filled + len(chunk)] = chunk
+                filled += len(chunk)
+            return filled
+
+    else:
+        chunks = iter(data)
+        leftover = memoryview(b'')
+
+        def fill(view):
+            nonlocal leftover
+            filled = 0
+            while filled < len(view):
+                if not leftover:
+                    try:
+                        leftover = memoryview(next(chunks)).cast('B')
+                    except StopIteration:
+                        break
+                length = min(len(leftover), len(view) - filled)
+                view[filled:filled + length] = leftover[:length]
+                leftover = leftover[length:]
+                filled += length
+            return filled
+
+    return fill
+
+
+class CopyReader(StreamReader):
+    """
+    :class:`StreamReader` subclass that copies the torrent's files from `path`
+    to `destination` and pushes the copied data as pieces
+
+    `path` is the torrent's content path (see :attr:`~.Torrent.path`).
+    Each file is written to `destination` plus its path in the torrent,
+    i.e. the torrent's name is the first path segment.
+
+    :raise ReadError: if a file in `path` is not readable
+    :raise WriteError: if a file in `destination` is not writable
+    :raise VerifyFileSizeError: if a file in `path` does not have the expected
+        size
+    """
+
+    def __init__(self, *, torrent, queue_size, path, destination):
+        self._files = tuple(
+            (
+                file,
+                os.path.join(str(path), *file.parts[1:]),
+                os.path.join(str(destination), *file.parts),
+            )
+            for file in torrent.files
+        )
+        self._chunks = self._iter_copied_chunks(chunk_size=torrent.piece_size)
+        super().__init__(
+            torrent=torrent,
+            queue_size=queue_size,
+            data=self._chunks,
+            filepaths=[source for _, source, _ in self._files],
+        )
+
+    def _push_pieces(self):
+        try:
+            super()._push_pieces()
+        finally:
+            # Close any open files if we stopped early
+            self._chunks.close()
+
+    def _iter_copied_chunks(self, *, chunk_size):
+        for file, source, target in self._files:
+            try:
+                source_fh = open(source, 'rb')
+            except OSError as e:
+                raise errors.ReadError(e.errno, source)
+
+            with source_fh:
+                if os.path.exists(target) and os.path.samefile(source, target):
+                    raise errors.PathError(target, msg='Destination is the same file as source')
+
+                try:
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    target_fh = open(target, 'wb')
+                except OSError as e:
+                    raise errors.WriteError(e.errno, target)
+
+                with target_fh:
+                    bytes_copied = 0
+                    while True:
+                        try:
+                            chunk = source_fh.read(chunk_size)
+                        except OSError as e:
+                            raise errors.ReadError(e.errno, source)
+                        if not chunk:
+                            break
+
+                        bytes_copied += len(chunk)
+                        if bytes_copied > file.size:
+                            raise errors.VerifyFileSizeError(source, bytes_copied, file.size)
+
+                        try:
+                            target_fh.write(chunk)
+                        except OSError as e:
+                            raise errors.WriteError(e.errno, target)
+                        yield chunk
+
+                    if bytes_copied < file.size:
+                        raise errors.VerifyFileSizeError(source, bytes_copied, file.size)
+
+
+class ShardedReader(Worker):
+    """
+    :class:`Worker` subclass that runs multiple :class:`Reader` instances
+    concurrently
+
+    The piece indexes are split into up to `readers` shards of consecutive
+    pieces (see :func:`get_shards`). Each shard is read by its own
+    :class:`Reader` with its own file handles. All readers push to the same
+    :attr:`piece_queue` and use the same :attr:`buffer_pool`.
+
+    If `piece_indexes` is not `None`, only the pieces at those indexes are read.
+    """
+
+    def __init__(self, *, torrent, queue_size, readers, path=None, piece_indexes=None):
+        shards = get_shards(torrent, readers, piece_indexes=piece_indexes)
+        self._piece_queue = queue.Queue(maxsize=queue_size)
+        self._buffer_pool = PieceBufferPool(
+            size=max(1, min(queue_size, sum(len(shard) for shard in shards))),
+            piece_size=torrent.piece_size,
+        )
+        # Files at shard boundaries are read by two readers, but their
+        # exceptions must only be reported once
+        exception_filter = ExceptionFilter()
+        self._readers = [
+            Reader(
+                torrent=torrent,
+                queue_size=queue_size,
+                path=path,
+                piece_indexes=shard,
+                piece_queue=self._piece_queue,
+                buffer_pool=self._buffer_pool,
+                exception_filter=exception_filter,
+                name=f'reader{i}',
+            )
+            for i, shard in enumerate(shards, start=1)
+        ]
+        super().__init__(name='shards', worker=self._join_readers)
+
+    def _join_readers(self):
+        try:
+            exception = None
+            for reader in self._readers:
+                try:
+                    reader.join()
+                except BaseException as e:
+                    _debug(f'{_thread_name()}: Exception from {reader.name}: {e!r}')
+                    # Don't keep other readers waiting for free buffers
+                    self.stop()
+                    if exception is None:
+                        exception = e
+            if exception is not None:
+                raise exception
+        finally:
+            self._piece_queue.put(QUEUE_CLOSED)
+            _debug(f'{_thread_name()}: Piece queue is now exhausted')
+
+    def stop(self):
+        """Stop all readers and close the piece queue"""
+        for reader in self._readers:
+            reader.stop()
+
+    @property
+    def piece_queue(self):
+        """:class:`queue.Queue` instance that gets pieces from all readers"""
+        return self._piece_queue
+
+    @property
+    def buffer_pool(self):
+        """:class:`PieceBufferPool` instance that is shared by all readers"""
+        return self._buffer_pool
+
+
+def get_shards(torrent, shards, piece_indexes=None):
+    """
+    Split piece indexes into up to `shards` lists of similar length
+
+    Shards only start at the first piece after the end of a file. A file is
+    only read by two readers if its first piece also contains the end of the
+    previous file.
+
+    :param torrent: :class:`~.Torrent` instance
+    :param int shards: Maximum number of shards
+    :param piece_indexes: Piece indexes to split or `None` to split all piece
+        indexes
+
+    :return: list of sorted lists of piece indexes
+    """
+    piece_indexes = range(torrent.pieces) if piece_indexes is None else sorted(piece_indexes)
+    if not piece_indexes:
+        return []
+
+    # Piece indexes that a new shard may start at
+    piece_size = torrent.piece_size
+    boundaries = []
+    file_end = 0
+    for file in torrent.files:
+        file_end += file.size
+        boundaries.append(math.ceil(file_end / piece_size))
+
+    # Positions in `piece_indexes` that are preceded by a file boundary
+    cuts = [
+        i for i in range(1, len(piece_indexes))
+        if (bisect.bisect_right(boundaries, piece_indexes[i])
+            > bisect.bisect_right(boundaries, piece_indexes[i - 1]))
+    ]
+
+    # Use the cut that is closest to each ideal shard boundary
+    shard_cuts = set()
+    if cuts:
+        for k in range(1, shards):
+            target = k * len(piece_indexes) / shards
+            i = bisect.bisect_left(cuts, target)
+            nearest = min(cuts[max(0, i - 1):i + 1], key=lambda cut: abs(cut - target))
+            shard_cuts.add(nearest)
+
+    positions = [0, *sorted(shard_cuts), len(piece_indexes)]
+    return [list(piece_indexes[start:stop]) for start, stop in zip(positions, positions[1:])]
+
+
+class ExceptionFilter:
+    """
+    Callable that removes exceptions that were passed to it before
+
+    Exceptions are equal if their string representations are equal. This is
+    thread-safe so it can be shared by multiple readers.
+    """
+
+    def __init__(self):
+        self._reported = set()
+        self._lock = threading.Lock()
+
+    def __call__(self, exceptions):
+        """Return tuple of `exceptions` that were not passed before"""
+        if not exceptions:
+            return ()
+        unreported = []
+        with self._lock:
+            for exception in exceptions:
+                if str(exception) not in self._reported:
+                    self._reported.add(str(exception))
+                    unreported.append(exception)
+        return tuple(unreported)
+
+
+class PieceBufferPool:
+    """
+    Fixed number of pre-allocated, re-usable piece buffers
+
+    :meth:`get` blocks until a buffer is returned via :meth:`put` if all buffers
+    are in use. This limits memory usage to `size` * `piece_size` bytes and
+    throttles the reader if hashing can't keep up.
+
+    If not all buffers can be allocated, the pool uses as many as possible.
+
+    :raise ReadError: if not a single buffer can be allocated
+    """
+
+    def __init__(self, *, size, piece_size):
+        self._buffers = queue.Queue()
+        for _ in range(size):
+            try:
+                self._buffers.put(bytearray(piece_size))
+            except MemoryError:
+                _debug(f'{_thread_name()}: Out of memory after allocating {self._buffers.qsize()} piece buffers')
+                break
+        self._size = self._buffers.qsize()
+        if self._size < 1:
+            raise errors.ReadError(errno.ENOMEM)
+
+    def get(self):
+        """Return unused :class:`bytearray`, blocking until one is available"""
+        return self._buffers.get()
+
+    def put(self, piece):
+        """
+        Make buffer of `piece` (:class:`memoryview` or :class:`bytearray`) available again
+
+        Pieces of other buffers (e.g. memory-mapped files) are only released.
+        """
+        if isinstance(piece, memoryview):
+            buffer = piece.obj
+            piece.release()
+        else:
+            buffer = piece
+        if isinstance(buffer, bytearray):
+            self._buffers.put(buffer)
+
+    @property
+    def size(self):
+        """Number of buffers"""
+        return self._size
+
 
 class HasherPool:
     """
     Wrapper around one or more :class:`Worker` instances that each read a piece
     from :attr:`Reader.piece_queue`, feed it to :func:`~.hashlib.sha1`, and push
     the resulting hash to :attr:`hash_queue`
+
+    If `buffer_pool` is given, hashed pieces are passed to its `put()` method
+    (see :attr:`Reader.buffer_pool`).
     """
 
-    def __init__(self, hasher_threads, piece_queue):
+    def __init__(self, hasher_threads, piece_queue, buffer_pool=None):
         self._piece_queue = piece_queue
+        self._buffer_pool = buffer_pool
         self._hash_queue = queue.Queue()
         self._finalize_event = threading.Event()
 
@@ -248,6 +725,8 @@ class HasherPool:
 
         elif piece:
             piece_hash = sha1(piece).digest()
+            if self._buffer_pool is not None:
+                self._buffer_pool.put(piece)
             # _debug(f'{_thread_name()}: Hashed #{piece_index}: '
             #        f'{_pretty_bytes(piece)} [{len(piece)} bytes] -> {piece_hash}')
             self._hash_queue.put((piece_index, filepath, piece_hash, ()))
@@ -299,6 +778,280 @@ class HasherPool:
         return self._hash_queue
 
 
+class ProcessHasherPool:
+    """
+    Hash pieces in worker processes
+
+    The piece index space is split into ranges of consecutive pieces. Each range
+    is sent to a worker process that reads the pieces itself via
+    :class:`~.TorrentFileStream` and only sends back the piece hashes, so piece
+    data never crosses the process boundary.
+
+    This class implements the interface of :class:`Reader` (:meth:`stop`,
+    :meth:`join`) and :class:`HasherPool` (:attr:`hash_queue`, :meth:`join`),
+    so it can be passed to :class:`Collector` as both.
+
+    If `piece_indexes` is not `None`, only the pieces at those indexes are read.
+    """
+
+    def __init__(self, *, torrent, processes, path=None, piece_indexes=None):
+        self._torrent = torrent
+        self._path = path if path is not None else torrent.path
+        self._piece_indexes = piece_indexes
+        self._processes = processes
+        self._hash_queue = queue.Queue()
+        self._stop = False
+        # Exceptions are only reported once per file, like Reader does it
+        self._exception_filter = ExceptionFilter()
+        self._dispatcher = Worker(name='dispatcher', worker=self._dispatch_piece_ranges)
+
+    def _get_piece_ranges(self):
+        if self._piece_indexes is None:
+            piece_indexes = range(self._torrent.pieces)
+        else:
+            piece_indexes = sorted(self._piece_indexes)
+
+        # Small enough ranges to report progress and react to stop() in a
+        # timely manner, large enough to keep IPC overhead low
+        range_size = max(1, min(1024, math.ceil(len(piece_indexes) / (self._processes * 8))))
+        first_piece_index = last_piece_index = None
+        for piece_index in piece_indexes:
+            if first_piece_index is None:
+                first_piece_index = last_piece_index = piece_index
+            elif piece_index == last_piece_index + 1 and piece_index - first_piece_index < range_size:
+                last_piece_index = piece_index
+            else:
+                yield first_piece_index, last_piece_index
+                first_piece_index = last_piece_index = piece_index
+        if first_piece_index is not None:
+            yield first_piece_index, last_piece_index
+
+    def _dispatch_piece_ranges(self):
+        # Only the information needed to locate pieces is sent to the workers
+        info = {key: value for key, value in self._torrent.metainfo['info'].items()
+                if key != 'pieces'}
+        piece_ranges = self._get_piece_ranges()
+        pending = set()
+        executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self._processes,
+            mp_context=utils.get_mp_context(),
+        )
+        try:
+            while not self._stop:
+                # Keep a few ranges queued per process, but not all of them so
+                # we can stop quickly
+                while len(pending) < self._processes * 2:
+                    piece_range = next(piece_ranges, None)
+                    if piece_range is None:
+                        break
+                    pending.add(executor.submit(_hash_piece_range, info, self._path, *piece_range))
+
+                if not pending:
+                    break
+
+                done, pending = concurrent.futures.wait(
+                    pending,
+                    return_when=concurrent.futures.FIRST_COMPLETED,
+                )
+                for future in done:
+                    for task in future.result():
+                        if self._stop:
+                            _debug(f'{_thread_name()}: Stopped dispatching')
+                            break
+                        self._push_hash(*task)
+
+        except BaseException as e:
+            _debug(f'{_thread_name()}: Exception while dispatching: {e!r}')
+            raise
+
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+            self._hash_queue.put(QUEUE_CLOSED)
+            _debug(f'{_thread_name()}: Hash queue is now exhausted')
+
+    def _push_hash(self, piece_index, filepath, piece_hash, exceptions):
+        self._hash_queue.put((piece_index, filepath, piece_hash, self._exception_filter(exceptions)))
+
+    def stop(self):
+        """Stop dispatching piece ranges and close the hash queue"""
+        if not self._stop:
+            _debug(f'{_thread_name()}: {type(self).__name__}: Setting stop flag')
+            self._stop = True
+
+    def join(self):
+        """Block until all worker processes have terminated"""
+        self._dispatcher.join()
+
+    @property
+    def hash_queue(self):
+        """:class:`queue.Queue` instance that gets piece hashes"""
+        return self._hash_queue
+
+
+def _hash_piece_range(info, content_path, first_piece_index, last_piece_index):
+    # This runs in a worker process of ProcessHasherPool and returns a list of
+    # `(piece_index, filepath, piece_hash, exceptions)` tuples
+    from ._torrent import Torrent  # Prevent circular import
+    torrent = Torrent()
+    torrent.metainfo['info'] = info
+
+    tasks = []
+    with TorrentFileStream(torrent, content_path=content_path) as stream:
+        for piece_index in range(first_piece_index, last_piece_index + 1):
+            filepath, piece, exceptions = _read_piece(stream, piece_index)
+            if exceptions:
+                tasks.append((piece_index, filepath, None, exceptions))
+            else:
+                tasks.append((piece_index, filepath, sha1(piece).digest(), ()))
+    return tasks
+
+
+def _read_piece(stream, piece_index, content_path=None, buffer=None):
+    # Return `(filepath, piece, exceptions)` for a single piece where `filepath`
+    # is the last file in the piece
+    filepath = stream.get_files_at_piece_index(piece_index, content_path=content_path)[-1]
+    try:
+        piece = stream.get_piece(piece_index, content_path=content_path, buffer=buffer)
+    except (errors.ReadError, errors.VerifyFileSizeError) as e:
+        return filepath, None, (e,)
+    else:
+        return filepath, piece, ()
+
+
+_collector_observer = threading.local()
+
+
+@contextlib.contextmanager
+def observe_collectors(callback):
+    """
+    Context manager that calls `callback` with every :class:`Collector` instance
+    that is created in the current thread
+
+    This gives access to :meth:`Collector.cancel` from other threads.
+    """
+    previous_callback = getattr(_collector_observer, 'callback', None)
+    _collector_observer.callback = callback
+    try:
+        yield
+    finally:
+        _collector_observer.callback = previous_callback
+
+
+class Checkpoint:
+    """
+    Sidecar file that stores the contiguous prefix of collected piece hashes
+
+    Piece hashes are passed to :meth:`add` in any order and the prefix is
+    written to `filepath` at most every `interval` seconds. The file also
+    stores a fingerprint of the torrent's name, piece size and files. It is
+    only valid for torrents with the same fingerprint.
+
+    :raise WriteError: if `filepath` cannot be written
+    """
+
+    def __init__(self, filepath, torrent, interval=30):
+        self._filepath = str(filepath)
+        self._fingerprint = self.get_fingerprint(torrent)
+        self._interval = interval
+        self._hashes = []
+        self._pending_hashes = {}
+        self._saved_hashes_count = 0
+        self._last_save_time = time_monotonic()
+
+    @staticmethod
+    def get_fingerprint(torrent):
+        """Return :class:`bytes` that identify the file layout of `torrent`"""
+        return utils.get_fingerprint(
+            torrent.name,
+            torrent.piece_size,
+            files=((file, file.size) for file in torrent.files),
+        )
+
+    @classmethod
+    def read(cls, filepath, torrent):
+        """
+        Return sequence of piece hashes from `filepath`
+
+        The sequence is empty if `filepath` doesn't exist, is not a valid
+        checkpoint or belongs to a different file layout.
+
+        :raise ReadError: if `filepath` exists but cannot be read
+        """
+        try:
+            with open(filepath, 'rb') as f:
+                content = f.read()
+        except FileNotFoundError:
+            return ()
+        except OSError as e:
+            raise errors.ReadError(e.errno, str(filepath))
+
+        try:
+            checkpoint = bencode.decode(content)
+            fingerprint = checkpoint[b'fingerprint']
+            pieces = checkpoint[b'pieces']
+        except (bencode.DecodingError, ValueError, TypeError, KeyError):
+            _debug(f'Ignoring invalid checkpoint: {filepath}')
+            return ()
+
+        if fingerprint != cls.get_fingerprint(torrent):
+            _debug(f'Ignoring checkpoint for different file layout: {filepath}')
+            return ()
+        elif not isinstance(pieces, bytes) or len(pieces) % 20 != 0 or len(pieces) // 20 > torrent.pieces:
+            _debug(f'Ignoring checkpoint with invalid pieces: {filepath}')
+            return ()
+        else:
+            return tuple(pieces[pos:pos + 20] for pos in range(0, len(pieces), 20))
+
+    def add(self, piece_index, piece_hash):
+        """Remember `piece_hash` and write the prefix if `interval` has passed"""
+        if piece_index == len(self._hashes):
+            self._hashes.append(piece_hash)
+            # Move subsequent pieces that were collected earlier to the prefix
+            while len(self._hashes) in self._pending_hashes:
+                self._hashes.append(self._pending_hashes.pop(len(self._hashes)))
+        elif piece_index > len(self._hashes):
+            self._pending_hashes[piece_index] = piece_hash
+
+        if time_monotonic() - self._last_save_time >= self._interval:
+            self.save()
+
+    def save(self):
+        """Write the prefix to `filepath` if it changed since the last write"""
+        self._last_save_time = time_monotonic()
+        hashes_count = len(self._hashes)
+        if hashes_count > self._saved_hashes_count:
+            content = bencode.encode({
+                b'fingerprint': self._fingerprint,
+                b'pieces': b''.join(self._hashes),
+            })
+            # Replace the previous checkpoint atomically so it is never
+            # incomplete
+            utils.write_file_atomically(self._filepath, content)
+            self._saved_hashes_count = hashes_count
+            _debug(f'{_thread_name()}: Saved {hashes_count} piece hashes to {self._filepath}')
+
+    def remove(self):
+        """Remove `filepath` if it exists"""
+        try:
+            os.remove(self._filepath)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            raise errors.WriteError(e.errno, self._filepath)
+
+    @property
+    def filepath(self):
+        """Path of the sidecar file"""
+        return self._filepath
+
+    @property
+    def hashes(self):
+        """Contiguous prefix of piece hashes"""
+        return tuple(self._hashes)
+
+
 class Collector:
     """
     Consume items from :attr:`HasherPool.hash_queue` and ensure proper
@@ -306,27 +1059,53 @@ class Collector:
     operation
     """
 
-    def __init__(self, torrent, reader, hashers, callback=None):
+    def __init__(self, torrent, reader, hashers, callback=None, known_hashes=None, pieces_total=None,
+                 checkpoint=None):
         self._reader = reader
         self._hashers = hashers
         self._callback = callback
-        self._hashes_unsorted = []
-        self._pieces_seen = []
-        self._pieces_total = torrent.pieces
+        self._checkpoint = checkpoint
+        self._known_hashes = known_hashes or {}
+        # Piece hashes are written to their position in `_pieces` and
+        # `_pieces_seen` is a bitmap with one bit per piece. Pieces that failed
+        # are seen, but their hashes remain zeroed.
+        pieces = torrent.pieces
+        self._pieces_count = pieces
+        self._pieces = bytearray(20 * pieces)
+        self._pieces_view = memoryview(self._pieces)
+        self._pieces_seen = bytearray(math.ceil(pieces / 8))
+        self._pieces_seen_count = 0
+        self._pieces_failed = set()
+        # Number of pieces that are reported to `callback` as total
+        self._pieces_total = pieces if pieces_total is None else pieces_total
+
+        observer = getattr(_collector_observer, 'callback', None)
+        if observer is not None:
+            observer(self)
 
     def collect(self):
         """
         Read piece hashes from :attr:`HasherPool.hash_queue`
 
-        When this method returns, :attr:`hashes` is an ordered sequence of
-        collected piece hashes.
+        When this method returns, :attr:`pieces` contains the concatenated
+        hashes of all collected pieces.
 
         Exceptions from :class:`Reader`, :class:`HasherPool` or the provided
         callback are raised after all threads are terminated and joined.
 
-        :return: the same value as :attr:`hashes`
+        Piece hashes from the `known_hashes` argument, a mapping of piece
+        indexes to `(filepath, piece_hash)` tuples, are collected first.
+
+        If the `checkpoint` argument is a :class:`Checkpoint` instance, all
+        collected piece hashes are passed to it and it is saved when this
+        method returns, even if collecting failed or was cancelled.
+
+        :return: the same value as :attr:`pieces`
         """
         try:
+            for piece_index, (filepath, piece_hash) in self._known_hashes.items():
+                self._collect(piece_index, filepath, piece_hash, ())
+
             hash_queue = self._hashers.hash_queue
             while True:
                 # _debug(f'{_thread_name()}: Waiting for next piece hash')
@@ -339,24 +1118,35 @@ class Collector:
 
         except BaseException as e:
             _debug(f'{_thread_name()}: Exception while dequeueing piece hashes: {e!r}')
-            self._cancel()
+            self.cancel()
             raise
 
         finally:
             self._finalize()
+            if self._checkpoint is not None:
+                self._checkpoint.save()
 
-        return self.hashes
+        return self.pieces
 
     def _collect(self, piece_index, filepath, piece_hash, exceptions):
         # _debug(f'{_thread_name()}: Collecting #{piece_index}: {_pretty_bytes(piece_hash)}, {exceptions}')
 
         # Remember which pieces where hashed to count them and for sanity checking
-        assert piece_index not in self._pieces_seen
-        self._pieces_seen.append(piece_index)
+        byte_index = piece_index >> 3
+        byte = self._pieces_seen[byte_index]
+        bit = 1 << (piece_index & 7)
+        assert not byte & bit
+        self._pieces_seen[byte_index] = byte | bit
+        self._pieces_seen_count += 1
 
         # Collect piece
         if not exceptions and piece_hash:
-            self._hashes_unsorted.append((piece_index, piece_hash))
+            offset = piece_index * 20
+            self._pieces_view[offset:offset + 20] = piece_hash
+            if self._checkpoint is not None:
+                self._checkpoint.add(piece_index, piece_hash)
+        else:
+            self._pieces_failed.add(piece_index)
 
         # If there is no callback, raise first exception
         if exceptions and not self._callback:
@@ -366,14 +1156,20 @@ class Collector:
         if self._callback:
             # _debug(f'{_thread_name()}: Collector callback: {self._callback}')
             maybe_cancel = self._callback(
-                piece_index, len(self._pieces_seen), self._pieces_total,
+                piece_index, self._pieces_seen_count, self._pieces_total,
                 filepath, piece_hash, exceptions,
             )
             # _debug(f'{_thread_name()}: Collector callback return value: {maybe_cancel}')
             if maybe_cancel is not None:
-                self._cancel()
+                self.cancel()
+
+    def cancel(self):
+        """
+        Stop reading pieces
 
-    def _cancel(self):
+        This is thread-safe. :meth:`collect` returns after the pieces that were
+        already read are collected.
+        """
         # NOTE: We don't need to stop HasherPool or Collector.collect() because
         #       they will stop when Reader._push_pieces() pushes QUEUE_CLOSED.
         #       They will process the pieces in the queue, but that shouldn't
@@ -387,10 +1183,60 @@ class Collector:
         self._hashers.join()
         _debug(f'{_thread_name()}: hash_queue has {self._hashers.hash_queue.qsize()} items left')
 
+    def _is_complete(self):
+        return self._pieces_seen_count == self._pieces_count and not self._pieces_failed
+
+    def _iter_hashed_piece_indexes(self):
+        if self._is_complete():
+            return iter(range(self._pieces_count))
+        else:
+            failed = self._pieces_failed
+            return (i for i in _iter_bitmap(self._pieces_seen) if i not in failed)
+
+    @property
+    def pieces(self):
+        """
+        Concatenated hashes of all collected pieces in the order of their
+        indexes as :class:`bytes`
+
+        This is 20 bytes for each piece if all pieces were hashed successfully.
+        """
+        if self._is_complete():
+            return bytes(self._pieces)
+        else:
+            return b''.join(self.hashes)
+
     @property
     def hashes(self):
         """Ordered sequence of piece hashes"""
-        return tuple(hash for index, hash in sorted(self._hashes_unsorted))
+        pieces = self._pieces
+        return tuple(bytes(pieces[i * 20:i * 20 + 20]) for i in self._iter_hashed_piece_indexes())
+
+    @property
+    def hashes_by_index(self):
+        """Mapping of piece indexes to piece hashes"""
+        pieces = self._pieces
+        return {i: bytes(pieces[i * 20:i * 20 + 20]) for i in self._iter_hashed_piece_indexes()}
+
+    @property
+    def pieces_done(self):
+        """Number of collected pieces, including pieces that failed"""
+        return self._pieces_seen_count
+
+    @property
+    def pieces_seen(self):
+        """Set of indexes of collected pieces, including pieces that failed"""
+        return frozenset(_iter_bitmap(self._pieces_seen))
+
+
+def _iter_bitmap(bitmap):
+    # Yield index of each set bit in `bitmap` (first bit is the least
+    # significant bit of the first byte)
+    for byte_index, byte in enumerate(bitmap):
+        while byte:
+            lowest_bit = byte & -byte
+            yield (byte_index << 3) + lowest_bit.bit_length() - 1
+            byte ^= lowest_bit
 
 
 class _IntervaledCallback:
@@ -478,7 +1324,7 @@ class VerifyCallback(_TranslatingCallback):
         self._exp_file_sizes = tuple(
             (
                 os.sep.join((str(path), *file.parts[1:])),
-                self._torrent.partial_size(file),
+                file.size,
             )
             for file in self._torrent.files
         )
@@ -1,9 +1,16 @@
+import concurrent.futures
 import errno
+import functools
+import logging
 import os
+import threading
 
 from . import _errors as error
 from . import _generate as generate
 from . import _stream as stream
+from . import _utils as utils
+
+_debug = logging.getLogger('torf').debug
 
 
 class find_torrent_files:
@@ -73,9 +80,17 @@ def is_file_match(torrent, candidate):
 
     This is a quick check that doesn't require any system calls.
     """
+    return is_info_match(torrent, candidate.metainfo['info'])
+
+
+def is_info_match(torrent, candidate_info):
+    """
+    Same as :func:`is_file_match`, but `candidate_info` is the ``info``
+    dictionary of the candidate (see :func:`read_info`)
+    """
     # Compare relative file paths and file sizes.
     # Order of files is important.
-    torrent_info, candidate_info = torrent.metainfo['info'], candidate.metainfo['info']
+    torrent_info = torrent.metainfo['info']
 
     # Don't bother doing anything else if the names are different
     if torrent_info['name'] != candidate_info['name']:
@@ -84,11 +99,57 @@ def is_file_match(torrent, candidate):
     torrent_id = _get_filepaths_and_sizes(torrent_info)
     candidate_id = _get_filepaths_and_sizes(candidate_info)
     if torrent_id == candidate_id:
-        if torrent.piece_size_min <= candidate.piece_size <= torrent.piece_size_max:
+        if torrent.piece_size_min <= candidate_info['piece length'] <= torrent.piece_size_max:
             return True
 
     return False
 
+
+_INFO_FIELDS = ('name', 'piece length', 'length', 'files')
+
+
+def read_info(filepath):
+    """
+    Read ``name``, ``piece length`` and ``length`` or ``files`` from the
+    ``info`` dictionary of torrent file `filepath`
+
+    Everything else, most notably ``pieces``, is skipped without decoding it
+    and the torrent is not validated.
+
+    :return: ``info`` dictionary with only those fields or ``None`` if the
+        file can't be read or the fields are missing or invalid; the reason
+        can be found by reading the file with :meth:`~.Torrent.read`
+    """
+    try:
+        with open(filepath, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    try:
+        info = utils.bdecode_info_fields(data, _INFO_FIELDS)
+    except ValueError:
+        return None
+
+    if not isinstance(info.get('name'), str) or not isinstance(info.get('piece length'), int):
+        return None
+    elif 'length' in info:
+        if not isinstance(info['length'], int) or info['length'] <= 0:
+            return None
+    elif isinstance(info.get('files'), list) and info['files']:
+        for file in info['files']:
+            if not (
+                isinstance(file, dict)
+                and isinstance(file.get('length'), int)
+                and isinstance(file.get('path'), list)
+                and all(isinstance(part, str) for part in file['path'])
+            ):
+                return None
+    else:
+        return None
+    return info
+
+
 def _get_filepaths_and_sizes(info):
     name = info['name']
 
@@ -147,6 +208,113 @@ def is_content_match(torrent, candidate):
     return True
 
 
+def screen_candidate(torrent, candidate_path):
+    """
+    Read torrent file `candidate_path` if its files match `torrent`
+
+    Only the name, files and piece size are decoded (see :func:`read_info`)
+    unless they match or can't be decoded.
+
+    :raises ReadError: if reading the torrent file fails
+    :raises BdecodeError: if parsing the torrent file fails
+    :raises MetainfoError: if the torrent file contains invalid or
+        insufficient metadata
+
+    :return: :class:`~.Torrent` instance if the files match, ``None`` otherwise
+    """
+    candidate_info = read_info(candidate_path)
+    if candidate_info is not None and not is_info_match(torrent, candidate_info):
+        # Don't decode and validate the whole torrent
+        return None
+    candidate = type(torrent).read(candidate_path)
+    if is_file_match(torrent, candidate):
+        return candidate
+    return None
+
+
+def iter_candidates(torrent, torrent_file_items, threads=1):
+    """
+    Screen candidates for :meth:`~.Torrent.reuse`
+
+    :param torrent: :class:`~.Torrent` instance
+    :param torrent_file_items: Sequence of ``(torrent_filepath,
+        torrent_files_done, exception)`` tuples (see :class:`find_torrent_files`)
+    :param int threads: How many candidates are screened and compared
+        concurrently; if 1, each candidate is screened when its item is
+        requested
+
+    Yield ``(torrent_filepath, torrent_files_done, candidate, exception,
+    is_content_match)`` tuples in the same order as `torrent_file_items`.
+    `candidate` is the matching :class:`~.Torrent` or ``None``.
+    `is_content_match` is a callable that returns the result of
+    :func:`is_content_match` if `candidate` is not ``None``.
+    """
+    if threads <= 1:
+        for candidate_path, files_done, exception in torrent_file_items:
+            candidate, exception = _screen(torrent, candidate_path, exception)
+            yield (
+                candidate_path, files_done, candidate, exception,
+                functools.partial(is_content_match, torrent, candidate),
+            )
+        return
+
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=threads, thread_name_prefix='reuse')
+    stopped = threading.Event()
+    pending = []
+    try:
+        items = iter(torrent_file_items)
+        while True:
+            # Keep a few candidates ahead of the one that is reported next
+            # instead of reading all of them before a match is found
+            for candidate_path, files_done, exception in items:
+                future = executor.submit(_screen_and_compare, torrent, candidate_path, exception, stopped)
+                pending.append((candidate_path, files_done, future))
+                if len(pending) >= threads * 2:
+                    break
+            if not pending:
+                break
+
+            candidate_path, files_done, future = pending.pop(0)
+            candidate, exception, content_future = future.result()
+            yield (
+                candidate_path, files_done, candidate, exception,
+                content_future.result if content_future is not None else None,
+            )
+    finally:
+        # Stop reading candidates after a match was found or we were cancelled.
+        # Candidates that are already being screened don't compare content.
+        stopped.set()
+        for _, _, future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+def _screen(torrent, candidate_path, exception):
+    try:
+        if exception:
+            raise exception
+        elif candidate_path:
+            return screen_candidate(torrent, candidate_path), None
+        else:
+            raise RuntimeError('Both candidate_path and exception are None?!')
+    except (error.ReadError, error.BdecodeError, error.MetainfoError) as e:
+        return None, e
+
+
+def _screen_and_compare(torrent, candidate_path, exception, stopped):
+    candidate, exception = _screen(torrent, candidate_path, exception)
+    if candidate is not None and not stopped.is_set():
+        # Compare piece hashes right away and keep the result or exception
+        # until the candidate is reported
+        content_future = concurrent.futures.Future()
+        try:
+            content_future.set_result(is_content_match(torrent, candidate))
+        except Exception as e:
+            content_future.set_exception(e)
+        return candidate, exception, content_future
+    return candidate, exception, None
+
+
 def copy(from_torrent, to_torrent):
     """
     Copy ``pieces``, ``piece length`` and ``files`` from `from_torrent` to
@@ -173,6 +341,185 @@ def copy(from_torrent, to_torrent):
         to_torrent.metainfo['info']['files'] = source_files
 
 
+def get_signature(info):
+    """
+    Return :class:`bytes` that identify the ``name`` and files in `info`
+
+    Two ``info`` dictionaries have the same signature if :func:`is_file_match`
+    would compare their names and files as equal.
+    """
+    return utils.get_fingerprint(info['name'], files=_get_filepaths_and_sizes(info))
+
+
+class ReuseIndex(utils.SQLiteDatabase):
+    """
+    Persistent index of existing torrent files for :meth:`~.Torrent.reuse`
+
+    The name, relative file paths and file sizes of each torrent file are
+    stored in an SQLite database together with its piece size and the
+    modification time and size of the torrent file. Finding candidates for
+    :meth:`~.Torrent.reuse` doesn't require reading any torrent files, and
+    :meth:`update` only reads torrent files that were added or changed.
+
+    :param path: Path to the database file; it is created if it doesn't exist
+
+    :raises ReadError: if the database can't be opened
+    """
+
+    _schema = (
+        'CREATE TABLE IF NOT EXISTS torrents '
+        '(path TEXT PRIMARY KEY, mtime INTEGER NOT NULL, size INTEGER NOT NULL, '
+        'signature BLOB, piece_length INTEGER)',
+        'CREATE INDEX IF NOT EXISTS signature_index ON torrents (signature)',
+    )
+    _table = 'torrents'
+    _description = 'reuse index'
+
+    def update(self, *paths, max_file_size=float('inf')):
+        """
+        Add new and changed torrent files and remove deleted ones
+
+        Each path in `paths` is a torrent file or a directory that is searched
+        recursively for torrent files. Torrent files are only read if they are
+        not indexed yet or if their size or modification time changed.
+        Indexed torrent files beneath `paths` that don't exist any more are
+        removed.
+
+        Torrent files that can't be read are remembered and not read again
+        until they change.
+
+        :param int max_file_size: Ignore torrent files that are larger than
+            this many bytes
+
+        :raises WriteError: if writing to the database fails
+
+        :return: Sequence of `(torrent_filepath, exception)` tuples for each
+            path or torrent file that couldn't be read; `torrent_filepath` is
+            ``None`` if a directory couldn't be read
+        """
+        # Local import to avoid circular dependency
+        from ._torrent import Torrent
+
+        roots = tuple(os.path.abspath(path) for path in paths)
+        known = self._get_known(roots)
+        seen = set()
+        unreadable_dirs = []
+        exceptions = []
+        rows = []
+        for torrent_filepath, _, exception in find_torrent_files(*roots, max_file_size=max_file_size):
+            if exception:
+                exceptions.append((torrent_filepath, exception))
+                if torrent_filepath is None:
+                    unreadable_dirs.append(exception.path)
+                continue
+
+            torrent_filepath = str(torrent_filepath)
+            seen.add(torrent_filepath)
+            try:
+                stat = os.stat(torrent_filepath)
+            except OSError as e:
+                exceptions.append((torrent_filepath, error.ReadError(e.errno, torrent_filepath)))
+                continue
+
+            if known.get(torrent_filepath) == (stat.st_mtime_ns, stat.st_size):
+                continue
+
+            info = read_info(torrent_filepath)
+            try:
+                if info is None:
+                    # Get the reason or decode unusual torrents completely
+                    info = Torrent.read(torrent_filepath).metainfo['info']
+                signature = get_signature(info)
+                piece_length = info['piece length']
+            except (error.ReadError, error.BdecodeError, error.MetainfoError) as e:
+                exceptions.append((torrent_filepath, e))
+                signature = piece_length = None
+            except (RuntimeError, TypeError) as e:
+                # Torrent doesn't contain any files or has undecodable paths
+                _debug(f'Not indexing {torrent_filepath}: {e}')
+                signature = piece_length = None
+            rows.append((torrent_filepath, stat.st_mtime_ns, stat.st_size, signature, piece_length))
+
+        removed = [
+            (path,) for path in known
+            if path not in seen and not _is_beneath(path, unreadable_dirs)
+        ]
+
+        with self._transaction('write to', error.WriteError) as db:
+            db.executemany(
+                'INSERT OR REPLACE INTO torrents (path, mtime, size, signature, piece_length) '
+                'VALUES (?, ?, ?, ?, ?)',
+                rows,
+            )
+            db.executemany('DELETE FROM torrents WHERE path = ?', removed)
+
+        return tuple(exceptions)
+
+    def _get_known(self, roots):
+        # Return mapping of indexed torrent file paths beneath `roots` to
+        # (mtime, size) tuples
+        where, params = _get_sql_beneath(roots)
+        with self._transaction('read from', error.ReadError) as db:
+            cursor = db.execute(f'SELECT path, mtime, size FROM torrents WHERE {where}', params)
+            return {path: (mtime, size) for path, mtime, size in cursor.fetchall()}
+
+    def find(self, torrent, *paths):
+        """
+        Return sorted list of indexed torrent files that may match `torrent`
+
+        Candidates have the same name, files and file sizes as `torrent`, and
+        their piece size is between :attr:`~.Torrent.piece_size_min` and
+        :attr:`~.Torrent.piece_size_max` of `torrent`. Piece hashes must still
+        be compared to make sure a candidate actually matches.
+
+        :param torrent: :class:`~.Torrent` instance
+        :param paths: Only return torrent files beneath any of these paths;
+            if not given, return torrent files from anywhere
+
+        :raises ReadError: if reading from the database fails
+        """
+        try:
+            signature = get_signature(torrent.metainfo['info'])
+        except RuntimeError:
+            # Torrent doesn't contain any files
+            return []
+
+        roots = tuple(os.path.abspath(path) for path in paths)
+        if roots:
+            where, params = _get_sql_beneath(roots)
+        else:
+            where, params = '1', ()
+        with self._transaction('read from', error.ReadError) as db:
+            cursor = db.execute(
+                'SELECT path FROM torrents WHERE signature = ? AND piece_length BETWEEN ? AND ? '
+                f'AND ({where}) ORDER BY path',
+                (signature, torrent.piece_size_min, torrent.piece_size_max, *params),
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+def _is_beneath(path, roots):
+    for root in roots:
+        if path == root or path.startswith(root.rstrip(os.sep) + os.sep):
+            return True
+    return False
+
+
+def _get_sql_beneath(roots):
+    # Return SQL condition and parameters that match the same "path" values as
+    # _is_beneath(). Paths beneath a root are selected as a range, which can be
+    # looked up in the primary key index.
+    conditions = []
+    params = []
+    for root in roots:
+        prefix = root.rstrip(os.sep) + os.sep
+        conditions.append('path = ? OR (path >= ? AND path < ?)')
+        params.extend((root, prefix, prefix[:-1] + chr(ord(os.sep) + 1)))
+    if not conditions:
+        return '0', ()
+    return ' OR '.join(f'({condition})' for condition in conditions), tuple(params)
+
+
 class ReuseCallback(generate._IntervaledCallback):
     def __init__(self, *args, torrent, torrent_files_total, **kwargs):
         super().__init__(*args, **kwargs)
@@ -0,0 +1,151 @@
+# This file is part of torf.
+#
+# torf is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# torf is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with torf.  If not, see <https://www.gnu.org/licenses/>.
+
+import math
+import random
+
+from ._stream import TorrentFileStream
+
+
+def get_piece_indexes(torrent, fraction=None, pieces=None, pieces_per_file=None, seed=None):
+    """
+    Return sorted list of randomly picked piece indexes
+
+    Exactly one of `fraction`, `pieces` or `pieces_per_file` must be given.
+
+    :param float fraction: Pick this fraction of all pieces (0 < `fraction` <= 1)
+    :param int pieces: Pick this many pieces
+    :param int pieces_per_file: Pick this many pieces from each file
+    :param seed: Seed for :class:`random.Random` to get the same pieces each
+        time or ``None``
+
+    :raises ValueError: if the arguments are invalid
+    """
+    if sum(arg is not None for arg in (fraction, pieces, pieces_per_file)) != 1:
+        raise ValueError('Exactly one of fraction, pieces or pieces_per_file must be given')
+
+    rng = random.Random(seed)
+    all_piece_indexes = range(torrent.pieces)
+
+    if fraction is not None:
+        fraction = float(fraction)
+        if not 0 < fraction <= 1:
+            raise ValueError(f'fraction must be greater than 0 and at most 1: {fraction!r}')
+        count = math.ceil(fraction * len(all_piece_indexes))
+        piece_indexes = rng.sample(all_piece_indexes, count)
+
+    elif pieces is not None:
+        pieces = int(pieces)
+        if pieces < 1:
+            raise ValueError(f'pieces must be positive: {pieces!r}')
+        count = min(pieces, len(all_piece_indexes))
+        piece_indexes = rng.sample(all_piece_indexes, count)
+
+    else:
+        pieces_per_file = int(pieces_per_file)
+        if pieces_per_file < 1:
+            raise ValueError(f'pieces_per_file must be positive: {pieces_per_file!r}')
+        piece_indexes = set()
+        stream = TorrentFileStream(torrent)
+        for file in torrent.files:
+            if file.size > 0:
+                file_piece_indexes = stream.get_piece_indexes_of_file(file)
+                count = min(pieces_per_file, len(file_piece_indexes))
+                piece_indexes.update(rng.sample(file_piece_indexes, count))
+
+    return sorted(piece_indexes)
+
+
+class SampleResult:
+    """
+    Result of :meth:`~.Torrent.verify_sample`
+
+    Instances are truthy if all sampled pieces were checked successfully.
+    """
+
+    def __init__(self, pieces_total, piece_indexes, pieces_checked, bad_pieces):
+        self._pieces_total = pieces_total
+        self._piece_indexes = tuple(piece_indexes)
+        self._pieces_checked = pieces_checked
+        self._bad_pieces = tuple(sorted(bad_pieces))
+
+    @property
+    def pieces_total(self):
+        """Number of pieces in the torrent"""
+        return self._pieces_total
+
+    @property
+    def piece_indexes(self):
+        """Sorted sequence of sampled piece indexes"""
+        return self._piece_indexes
+
+    @property
+    def pieces_checked(self):
+        """
+        Number of sampled pieces that were checked
+
+        This is less than ``len(piece_indexes)`` if verification was cancelled.
+        """
+        return self._pieces_checked
+
+    @property
+    def bad_pieces(self):
+        """Sorted sequence of indexes of pieces that are corrupt or not readable"""
+        return self._bad_pieces
+
+    def confidence(self, corrupt_fraction=0.01):
+        """
+        Estimate how likely it is that corruption was detected
+
+        :param float corrupt_fraction: Fraction of corrupt pieces (0 <
+            `corrupt_fraction` <= 1)
+
+        :return: Probability (0.0 - 1.0) that at least one corrupt piece would
+            have been found if `corrupt_fraction` of all pieces were corrupt;
+            ``1.0`` if a corrupt piece was found
+
+        The estimate assumes sampled pieces are picked uniformly from all
+        pieces. If they are picked per file, small files are overrepresented.
+        """
+        corrupt_fraction = float(corrupt_fraction)
+        if not 0 < corrupt_fraction <= 1:
+            raise ValueError(f'corrupt_fraction must be greater than 0 and at most 1: {corrupt_fraction!r}')
+        elif self._bad_pieces:
+            return 1.0
+
+        total = self._pieces_total
+        checked = self._pieces_checked
+        corrupt = max(1, math.ceil(corrupt_fraction * total))
+        if checked > total - corrupt:
+            # Impossible to miss all corrupt pieces
+            return 1.0
+
+        # Hypergeometric probability of checking only good pieces:
+        # C(total - corrupt, checked) / C(total, checked)
+        missed = math.exp(
+            math.lgamma(total - corrupt + 1) - math.lgamma(total - corrupt - checked + 1)
+            - math.lgamma(total + 1) + math.lgamma(total - checked + 1)
+        )
+        return max(0.0, min(1.0, 1 - missed))
+
+    def __bool__(self):
+        return not self._bad_pieces and self._pieces_checked >= len(self._piece_indexes)
+
+    def __repr__(self):
+        return (
+            f'{type(self).__name__}('
+            f'pieces_total={self._pieces_total!r}, '
+            f'pieces_checked={self._pieces_checked!r}, '
+            f'bad_pieces={self._bad_pieces!r})'
+        )
@@ -1,10 +1,13 @@
+import bisect
 import errno
 import hashlib
 import itertools
 import math
+import mmap
 import os
 
 from . import _errors as error
+from . import _utils as utils
 
 
 class TorrentFileStream:
@@ -29,6 +32,7 @@ class TorrentFileStream:
         self._torrent = torrent
         self._content_path = content_path
         self._open_files = {}
+        self._file_index = None
 
     def _get_content_path(self, content_path, none_ok=False, file=None):
         # Get content_path argument from class or method call or from
@@ -90,6 +94,13 @@ class TorrentFileStream:
         """Largest valid piece index (smallest is always 0)"""
         return math.floor((self._torrent.size - 1) / self._torrent.piece_size)
 
+    def _get_file_index(self):
+        # Return _FileIndex for the current files of the torrent
+        files = self._torrent.files
+        if self._file_index is None or not self._file_index.is_index_of(files):
+            self._file_index = _FileIndex(files)
+        return self._file_index
+
     def get_file_position(self, file):
         """
         Return index of first byte of `file` in stream of concatenated files
@@ -98,13 +109,13 @@ class TorrentFileStream:
 
         :raise ValueError: if `file` is not specified in the torrent
         """
+        file_index = self._get_file_index()
         try:
-            file_index = self._torrent.files.index(file)
+            i = file_index.index(file)
         except ValueError:
             raise ValueError(f'File not specified: {file}')
         else:
-            stream_pos = sum(f.size for f in self._torrent.files[:file_index])
-            return stream_pos
+            return file_index.positions[i]
 
     def get_file_at_position(self, position, content_path=None):
         """
@@ -118,13 +129,13 @@ class TorrentFileStream:
             from the torrent)
         """
         if position >= 0:
-            pos = 0
-            for file in self._torrent.files:
-                pos += file.size - 1
-                if pos >= position:
-                    return self._get_content_path(content_path, none_ok=True, file=file)
-                else:
-                    pos += 1
+            file_index = self._get_file_index()
+            # Last file that starts at or before `position`; empty files are
+            # skipped because they share their position with the next file
+            i = bisect.bisect_right(file_index.positions, position) - 1
+            if i < len(file_index.files):
+                file = file_index.files[i]
+                return self._get_content_path(content_path, none_ok=True, file=file)
 
         raise ValueError(f'position is out of bounds (0 - {self._torrent.size - 1}): {position}')
 
@@ -168,9 +179,17 @@ class TorrentFileStream:
             from the torrent)
         """
         assert first_byte_index <= last_byte_index, (first_byte_index, last_byte_index)
-        pos = 0
+        file_index = self._get_file_index()
+        positions = file_index.positions
+        # Only files that start between the file before `first_byte_index` and
+        # the byte after `last_byte_index` can be in the range (an empty file
+        # right after the range "ends" at `last_byte_index`)
+        first_file_index = max(0, bisect.bisect_left(positions, first_byte_index) - 1)
+        last_file_index = min(len(file_index.files), bisect.bisect_right(positions, last_byte_index + 1))
         files = []
-        for file in self._torrent.files:
+        for i in range(first_file_index, last_file_index):
+            file = file_index.files[i]
+            pos = positions[i]
             file_first_byte_index = pos
             file_last_byte_index = pos + file.size - 1
             if (
@@ -183,7 +202,6 @@ class TorrentFileStream:
             ):
                 content_file_path = self._get_content_path(content_path, none_ok=True, file=file)
                 files.append(content_file_path)
-            pos += file.size
         return files
 
     def get_byte_range_of_file(self, file):
@@ -286,7 +304,7 @@ class TorrentFileStream:
             validated_piece_indexes.add(valid_rpi)
         return sorted(validated_piece_indexes)
 
-    def get_piece(self, piece_index, content_path=None):
+    def get_piece(self, piece_index, content_path=None, buffer=None):
         """
         Return piece at `piece_index` or `None` for nonexisting file(s)
 
@@ -295,12 +313,17 @@ class TorrentFileStream:
         :param content_path: Path to file or directory to read piece from
             (defaults to class argument of the same name or
             :attr:`~.Torrent.path`)
+        :param buffer: :class:`bytearray` of at least :attr:`~.Torrent.piece_size`
+            bytes to read the piece into or `None`
+
+            If this is not `None`, a :class:`memoryview` of `buffer` is returned
+            instead of :class:`bytes`.
 
         :raise ReadError: if a file exists but cannot be read
         :raise VerifyFileSizeError: if a file has unexpected size
         """
         piece_size = self._torrent.piece_size
-        torrent_size = sum(f.size for f in self._torrent.files)
+        torrent_size = self._get_file_index().positions[-1]
 
         min_piece_index = 0
         max_piece_index = math.floor((torrent_size - 1) / piece_size)
@@ -334,9 +357,20 @@ class TorrentFileStream:
             file_pos = self.get_file_position(file)
             seek_to = file.size - ((file_pos + file.size) % piece_size)
 
+        # Get expected `piece` length
+        if last_byte_index_of_piece == torrent_size - 1:
+            exp_piece_size = torrent_size % piece_size
+            if exp_piece_size == 0:
+                exp_piece_size = piece_size
+        else:
+            exp_piece_size = piece_size
+
         # Read piece data from `relevant_files`
-        bytes_to_read = piece_size
-        piece = bytearray()
+        if buffer is None:
+            piece = memoryview(bytearray(exp_piece_size))
+        else:
+            piece = memoryview(buffer)[:exp_piece_size]
+        bytes_read = 0
         for file in relevant_files:
             # Translate path within torrent into path within file system
             filepath = self._get_content_path(content_path, none_ok=False, file=file)
@@ -352,22 +386,16 @@ class TorrentFileStream:
             try:
                 fh.seek(seek_to)
                 seek_to = 0
-
-                content = fh.read(bytes_to_read)
-                bytes_to_read -= len(content)
-                piece.extend(content)
+                bytes_read += fh.readinto(piece[bytes_read:])
             except OSError as e:
                 raise error.ReadError(e.errno, file)
 
         # Ensure expected `piece` length
-        if last_byte_index_of_piece == torrent_size - 1:
-            exp_piece_size = torrent_size % piece_size
-            if exp_piece_size == 0:
-                exp_piece_size = piece_size
+        assert bytes_read == exp_piece_size, (bytes_read, exp_piece_size)
+        if buffer is None:
+            return bytes(piece)
         else:
-            exp_piece_size = piece_size
-        assert len(piece) == exp_piece_size, (len(piece), exp_piece_size)
-        return bytes(piece)
+            return piece
 
     def _get_file_size_from_fs(self, filepath):
         if os.path.exists(filepath):
@@ -394,7 +422,8 @@ class TorrentFileStream:
 
         return self._open_files.get(filepath, None)
 
-    def iter_pieces(self, content_path=None, oom_callback=None):
+    def iter_pieces(self, content_path=None, oom_callback=None, memory_map=False, buffer_pool=None,
+                    skip_pieces=None):
         """
         Iterate over `(piece, filepath, (exception1, exception2, ...))`
 
@@ -430,6 +459,40 @@ class TorrentFileStream:
             callback to raise the exception or deal with it in some other way.
 
             If this is `None`, :class:`~.errors.MemoryError` is raised normally.
+        :param bool memory_map: Whether to map files into memory and yield
+            :class:`memoryview` pieces instead of reading :class:`bytes`
+
+            Pieces that belong to a single file are slices of the mapped file
+            and are not copied. Pieces that span multiple files are assembled in
+            a buffer that is re-used for the next spanning piece, i.e. such a
+            piece is only valid until the next piece is requested. This mode is
+            meant for consumers that process each piece immediately, e.g. by
+            passing it to :func:`hashlib.sha1`.
+
+            If `buffer_pool` is also given, pieces that span multiple files are
+            assembled in buffers from `buffer_pool` instead and stay valid
+            until they are passed to `buffer_pool.put()`. Slices of mapped
+            files are also passed to `buffer_pool.put()`, which must ignore
+            pieces whose buffer didn't come from `get()`.
+
+            Files that can't be mapped into memory are read into the same
+            buffers.
+        :param buffer_pool: Object with a `get()` method that returns a
+            :class:`bytearray` of :attr:`~.Torrent.piece_size` bytes and a
+            `put(piece)` method that takes a piece and makes its buffer
+            available to `get()` again
+
+            If this is not `None` and `memory_map` is false, files are read with
+            :meth:`~io.BufferedIOBase.readinto` into buffers from `buffer_pool`
+            and pieces are :class:`memoryview` instances of those buffers. The
+            consumer must pass each piece to `buffer_pool.put()` when it is done
+            with it. `oom_callback` is ignored because nothing is allocated.
+        :param skip_pieces: Container of piece indexes that are not needed
+
+            If `memory_map` is true or `buffer_pool` is not `None`, pieces at
+            these indexes that are completely inside one file are yielded as
+            `None` without reading them. Other pieces at these indexes are
+            read normally.
 
         :raise ReadError: if file exists but is not readable
         :raise VerifyFileSizeError: if file has unexpected size
@@ -437,8 +500,13 @@ class TorrentFileStream:
         trailing_bytes = b''
         missing_pieces = _MissingPieces(torrent=self._torrent, stream=self)
         skip_bytes = 0
+        if memory_map:
+            piece_buffer = _PieceBuffer(self._torrent.piece_size, buffer_pool=buffer_pool)
 
+        file_end = 0
         for file in self._torrent.files:
+            # Stream position of the first byte of `file`
+            file_start, file_end = file_end, file_end + file.size
             if file in missing_pieces.bycatch_files:
                 continue
 
@@ -457,7 +525,21 @@ class TorrentFileStream:
                     exception = e
 
             # Make generator that yields `(piece, filepath, exceptions)` tuples
-            if fh:
+            if fh and memory_map:
+                # _debug(f'{file}: Mapping {filepath}')
+                # Yield complete pieces from mapped file and keep incomplete
+                # piece in `piece_buffer`
+                pieces, skip_bytes = self._iter_from_mmap(
+                    fh,
+                    piece_buffer=piece_buffer,
+                    skip_bytes=skip_bytes,
+                    file_start=file_start,
+                    skip_pieces=skip_pieces,
+                )
+                for piece in pieces:
+                    yield (piece, filepath, ())
+
+            elif fh:
                 # _debug(f'{file}: Reading {filepath}')
                 # Read pieces from opened file
                 pieces, skip_bytes = self._iter_from_file_handle(
@@ -465,11 +547,14 @@ class TorrentFileStream:
                     prepend=trailing_bytes,
                     skip_bytes=skip_bytes,
                     oom_callback=oom_callback,
+                    buffer_pool=buffer_pool,
+                    file_start=file_start,
+                    skip_pieces=skip_pieces,
                 )
                 trailing_bytes = b''
                 piece_size = self._torrent.piece_size
                 for piece in pieces:
-                    if len(piece) == piece_size:
+                    if piece is None or len(piece) == piece_size:
                         yield (piece, filepath, ())
                     else:
                         trailing_bytes = piece
@@ -477,7 +562,11 @@ class TorrentFileStream:
             else:
                 # _debug(f'{file}: Faking {filepath}')
                 # We can't complete the current piece
+                if buffer_pool is not None and trailing_bytes:
+                    buffer_pool.put(trailing_bytes)
                 trailing_bytes = b''
+                if memory_map:
+                    piece_buffer.clear()
                 # Opening file failed
                 items, skip_bytes = missing_pieces(file, content_path, reason=exception)
                 for item in items:
@@ -487,8 +576,13 @@ class TorrentFileStream:
         # divisible by piece size
         if trailing_bytes:
             yield (trailing_bytes, filepath, ())
+        elif memory_map and piece_buffer:
+            yield (piece_buffer.take(), filepath, ())
+        if memory_map:
+            piece_buffer.close()
 
-    def _iter_from_file_handle(self, fh, prepend, skip_bytes, oom_callback):
+    def _iter_from_file_handle(self, fh, prepend, skip_bytes, oom_callback, buffer_pool=None,
+                               file_start=0, skip_pieces=None):
         # Read pieces from from file handle.
         # `prepend` is the incomplete piece from the previous file, i.e. the
         # leading bytes of the next piece.
@@ -499,6 +593,9 @@ class TorrentFileStream:
             skipped = fh.seek(skip_bytes)
             skip_bytes -= skipped
 
+        if buffer_pool is not None:
+            return self._iter_into_buffers(fh, prepend, buffer_pool, file_start, skip_pieces), skip_bytes
+
         def iter_pieces(fh, prepend):
             piece_size = self._torrent.piece_size
             piece = b''
@@ -538,6 +635,136 @@ class TorrentFileStream:
 
         return iter_pieces(fh, prepend), skip_bytes
 
+    def _iter_into_buffers(self, fh, prepend, buffer_pool, file_start=0, skip_pieces=None):
+        # Read pieces from file handle into buffers from `buffer_pool`.
+        # `prepend` is a memoryview of the incomplete piece from the previous
+        # file. Its buffer is filled up with the first bytes from `fh`.
+        # The final piece may be incomplete and is passed as `prepend` for the
+        # next file.
+        # `file_start` is the stream position of the first byte in `fh`.
+        # Complete pieces in `fh` with an index in `skip_pieces` are yielded
+        # as `None` without reading them.
+        piece_size = self._torrent.piece_size
+        try:
+            file_size = os.fstat(fh.fileno()).st_size if skip_pieces else 0
+            while True:
+                if prepend:
+                    view = memoryview(prepend.obj)
+                    length = len(prepend)
+                    prepend = None
+                else:
+                    if skip_pieces:
+                        pos = fh.tell()
+                        skipped_pos = pos
+                        while (skipped_pos + piece_size <= file_size
+                               and (file_start + skipped_pos) % piece_size == 0
+                               and (file_start + skipped_pos) // piece_size in skip_pieces):
+                            skipped_pos += piece_size
+                            yield None
+                        if skipped_pos != pos:
+                            fh.seek(skipped_pos)
+                    view = memoryview(buffer_pool.get())
+                    length = 0
+
+                # Fill buffer until it contains a complete piece or EOF
+                while length < piece_size:
+                    bytes_read = fh.readinto(view[length:piece_size])
+                    if not bytes_read:
+                        break
+                    length += bytes_read
+
+                if length:
+                    yield view[:length]
+                else:
+                    buffer_pool.put(view)
+
+                if length < piece_size:
+                    break  # EOF
+
+        except OSError as e:
+            raise error.ReadError(e.errno, fh.name)
+
+    def _iter_from_mmap(self, fh, piece_buffer, skip_bytes, file_start=0, skip_pieces=None):
+        # Map file from file handle into memory and yield `piece_size`ed
+        # memoryview slices.
+        # `piece_buffer` contains the incomplete piece from the previous file,
+        # i.e. the leading bytes of the next piece. When it is completed, it is
+        # yielded and cleared. Trailing bytes of `fh` are put into it.
+        # `skip_bytes` is the number of bytes from `fh` to ignore before
+        # reading the next piece.
+        # `file_start` is the stream position of the first byte in `fh`.
+        # Complete pieces in `fh` with an index in `skip_pieces` are yielded
+        # as `None`.
+
+        try:
+            file_size = os.fstat(fh.fileno()).st_size
+        except OSError as e:
+            raise error.ReadError(e.errno, fh.name)
+
+        pos = min(skip_bytes, file_size)
+        skip_bytes = 0
+
+        def iter_pieces(fh, pos):
+            if pos >= file_size:
+                # Empty files can't be mapped
+                return
+
+            piece_size = self._torrent.piece_size
+            try:
+                mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                # Some files can't be mapped, e.g. on some network file systems
+                yield from self._iter_into_piece_buffer(fh, pos, piece_buffer)
+                return
+
+            view = memoryview(mapped)
+            try:
+                # Complete piece from previous file with first bytes from `fh`
+                if piece_buffer:
+                    pos += piece_buffer.fill(view[pos:])
+                    if piece_buffer.is_full:
+                        yield piece_buffer.take()
+
+                # Iterate over `piece_size`ed slices
+                while pos + piece_size <= file_size:
+                    if skip_pieces and (file_start + pos) // piece_size in skip_pieces:
+                        yield None
+                    else:
+                        yield view[pos:pos + piece_size]
+                    pos += piece_size
+
+                # Remember incomplete piece for next file
+                if pos < file_size:
+                    piece_buffer.fill(view[pos:])
+
+            finally:
+                view.release()
+                try:
+                    mapped.close()
+                except BufferError:
+                    # Consumer still holds a reference to a piece. The mapping
+                    # is closed when the last piece is garbage collected.
+                    pass
+
+        return iter_pieces(fh, pos), skip_bytes
+
+    def _iter_into_piece_buffer(self, fh, pos, piece_buffer):
+        # Fallback for _iter_from_mmap() that reads from file handle into
+        # `piece_buffer` and yields each complete piece. The incomplete final
+        # piece is kept in `piece_buffer` for the next file.
+        piece_size = self._torrent.piece_size
+        try:
+            fh.seek(pos)
+            while True:
+                data = fh.read(piece_size - len(piece_buffer))
+                if not data:
+                    break  # EOF
+                piece_buffer.fill(data)
+                if piece_buffer.is_full:
+                    yield piece_buffer.take()
+        except OSError as e:
+            raise error.ReadError(e.errno, fh.name)
+
     def _read_from_fh(self, fh, size, oom_callback):
         while True:
             try:
@@ -603,6 +830,100 @@ class TorrentFileStream:
             return stored_piece_hash == generated_piece_hash
 
 
+class _FileIndex:
+    """Stream positions of files for fast lookups"""
+
+    def __init__(self, files):
+        self._source = files
+        self.files = list(files)
+
+        # Stream position of each file plus the total size at the end
+        self.positions = [0, *itertools.accumulate(f.size for f in self.files)]
+
+        # Map each file to its index in `files` (first occurrence wins, like
+        # list.index())
+        self._indexes = {}
+        for i, file in enumerate(self.files):
+            self._indexes.setdefault(file, i)
+
+    def is_index_of(self, files):
+        """Whether this index is valid for `files`"""
+        # Torrent.files returns the same Files object until its files change
+        if files is self._source and isinstance(files, utils.Files):
+            return True
+        # This is cheap if `files` contains the same objects
+        elif self.files == list(files):
+            self._source = files
+            return True
+        else:
+            return False
+
+    def index(self, file):
+        """Return index of `file` or raise :class:`ValueError`"""
+        try:
+            return self._indexes[file]
+        except (KeyError, TypeError):
+            # `file` may be equal to a file without having the same hash,
+            # e.g. a path without size
+            return self.files.index(file)
+
+
+class _PieceBuffer:
+    """
+    Buffer for pieces that span multiple files
+
+    If `buffer_pool` is ``None``, a pre-allocated buffer is re-used for each
+    piece. Otherwise, each piece gets its own buffer from `buffer_pool`.
+    """
+
+    def __init__(self, piece_size, buffer_pool=None):
+        self._piece_size = piece_size
+        self._buffer_pool = buffer_pool
+        self._buffer = bytearray(piece_size) if buffer_pool is None else None
+        self._length = 0
+
+    def fill(self, data):
+        """Append as much of `data` as fits and return the number of bytes appended"""
+        if self._buffer is None:
+            self._buffer = self._buffer_pool.get()
+        size = min(len(data), self._piece_size - self._length)
+        self._buffer[self._length:self._length + size] = data[:size]
+        self._length += size
+        return size
+
+    def clear(self):
+        """Forget all buffered data"""
+        self._length = 0
+
+    def take(self):
+        """
+        Return :class:`memoryview` of the buffered data and clear the buffer
+
+        If there is a `buffer_pool`, the returned piece must be passed to its
+        `put()` method.
+        """
+        view = memoryview(self._buffer)[:self._length]
+        self._length = 0
+        if self._buffer_pool is not None:
+            self._buffer = None
+        return view
+
+    def close(self):
+        """Return unused buffer to `buffer_pool`"""
+        if self._buffer_pool is not None and self._buffer is not None:
+            self._buffer_pool.put(self._buffer)
+            self._buffer = None
+            self._length = 0
+
+    @property
+    def is_full(self):
+        """Whether the buffer contains a complete piece"""
+        return self._length == self._piece_size
+
+    def __len__(self):
+        return self._length
+
+
 class _MissingPieces:
     """Calculate the missing pieces for a given file"""
 
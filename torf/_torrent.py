@@ -13,6 +13,9 @@
 # along with torf.  If not, see <https://www.gnu.org/licenses/>.
 
 import base64
+import bisect
+import collections
+import concurrent.futures
 import errno
 import hashlib
 import inspect
@@ -22,15 +25,20 @@ import math
 import os
 import pathlib
 import re
+import stat
 from collections import abc
 from datetime import datetime
 
 import flatbencode as bencode
 
 from . import __version__
+from . import _async as asynchronous
+from . import _bitfield as bitfield
+from . import _cache as hashcache
 from . import _errors as error
 from . import _generate as generate
 from . import _reuse as reuse
+from . import _sample as sample
 from . import _utils as utils
 
 _PACKAGE_NAME = __name__.split('.')[0]
@@ -104,9 +112,17 @@ class Torrent():
                  private=None, comment=None, source=None, creation_date=None,
                  created_by='%s %s' % (_PACKAGE_NAME, __version__),
                  piece_size=None, piece_size_min=None, piece_size_max=None,
-                 randomize_infohash=False):
+                 randomize_infohash=False, scan_threads=1):
         self._path = None
         self._metainfo = {}
+        # Values derived from metainfo (e.g. "files") mapped to snapshots of
+        # the metainfo values they were derived from
+        self._cache = {}
+        # Piece hashes from the previous incremental generate() call mapped to
+        # PieceHashCache.get_piece_keys()
+        self._previous_piece_hashes = {}
+        # utils.PathMatcher for exclude and include patterns or None
+        self._matcher = None
         self._exclude = {'globs'  : utils.MonitoredList(callback=self._filters_changed, type=str),
                          'regexs' : utils.MonitoredList(callback=self._filters_changed, type=re.compile)}
         self._include = {'globs'  : utils.MonitoredList(callback=self._filters_changed, type=str),
@@ -129,6 +145,7 @@ class Torrent():
         self.exclude_regexs = exclude_regexs
         self.include_globs = include_globs
         self.include_regexs = include_regexs
+        self.scan_threads = scan_threads
         self.path = path
 
         # Values that are implicitly changed by setting self.path
@@ -154,6 +171,35 @@ class Torrent():
             self._metainfo['info'] = {}
         return self._metainfo
 
+    def _get_cached(self, name, create, key):
+        # Return cached value or call `create` if `key` changed since the value
+        # was cached. `key` is a cheap snapshot of the metainfo values that the
+        # cached value is derived from (see utils.snapshot()).
+        cached = self._cache.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        value = create()
+        self._cache[name] = (key, value)
+        return value
+
+    def _set_cached(self, name, value, key):
+        # Cache `value` until `key` changes
+        self._cache[name] = (key, value)
+
+    def _get_files_key(self):
+        # Snapshot of the metainfo values that "files" and "size" are derived
+        # from
+        info = self.metainfo['info']
+        return utils.snapshot((info.get('name'), info.get('length'), info.get('files')))
+
+    def _get_info_key(self):
+        # Snapshot of metainfo['info'] for values derived from it
+        return utils.snapshot(self.metainfo['info'])
+
+    def _get_validation_key(self):
+        # Snapshot of everything validate() checks without the file system
+        return (self._path, utils.snapshot(self.metainfo))
+
     @property
     def path(self):
         """
@@ -182,9 +228,46 @@ class Torrent():
             self.metainfo['info'].pop('pieces', None)
         else:
             basepath = pathlib.Path(str(value))
-            filepaths = tuple(utils.File(fp, size=utils.real_size(fp))
-                              for fp in utils.list_files(basepath))
-            self._set_files(filepaths, basepath)
+            filepaths = tuple(utils.scan_files(
+                basepath,
+                threads=self.scan_threads,
+                prune=self._get_scan_prune(basepath),
+            ))
+            self._set_files(filepaths, basepath, scanned=True)
+
+    def _get_scan_prune(self, basepath):
+        # Return callable that tells utils.scan_files() to skip directories
+        # that only contain hidden or excluded files
+        matcher = self._path_matcher
+        name = pathlib.Path(os.path.abspath(basepath)).name
+
+        def prune(dirpath):
+            if os.path.basename(dirpath).startswith('.'):
+                return True
+            # Relative path with common parent directory (see _set_files())
+            return matcher.is_pruned(os.path.join(name, os.path.relpath(dirpath, basepath)))
+
+        return prune
+
+    @property
+    def scan_threads(self):
+        """
+        How many threads scan directories and check files when :attr:`path`
+        is set
+
+        Files are always sorted the same way. Scanning concurrently is useful
+        for huge directory trees, especially on network file systems.
+
+        :raises ValueError: if set to a number smaller than 1
+        """
+        return self._scan_threads
+
+    @scan_threads.setter
+    def scan_threads(self, value):
+        value = int(value)
+        if value < 1:
+            raise ValueError(f'scan_threads must be positive: {value!r}')
+        self._scan_threads = value
 
     @property
     def location(self):
@@ -215,6 +298,9 @@ class Torrent():
             directory
         :raises ValueError: if any file is not a :class:`File` object
         """
+        return self._get_cached('files', self._create_files, key=self._get_files_key())
+
+    def _create_files(self):
         info = self.metainfo['info']
         if self.mode == 'singlefile':
             files = (
@@ -241,6 +327,8 @@ class Torrent():
         return utils.Files(files, callback=self._files_changed)
 
     def _files_changed(self, files):
+        # `files` is the cached object and it doesn't match metainfo anymore
+        self._cache.pop('files', None)
         self.files = files
 
     @files.setter
@@ -318,7 +406,7 @@ class Torrent():
                               for fp in filepaths)
             self._set_files(filepaths, basepath)
 
-    def _set_files(self, files, basepath=None):
+    def _set_files(self, files, basepath=None, scanned=False):
         """
         Update ``name`` and ``files`` or ``length``, remove ``pieces`` and
         ``md5sum`` in :attr:`metainfo`\\ ``['info']``
@@ -326,6 +414,9 @@ class Torrent():
         :param files: Sequence of :class:`File`
         :param basepath: path-like that all paths in `files` start with; may be
             ``None`` if ``files`` is empty
+        :param bool scanned: Whether `files` were found by
+            :func:`~.utils.scan_files` and their sizes are the sizes in the file
+            system; otherwise empty files are only excluded if they exist
         """
         def abspath(p):
             # Absolute path without resolved symlinks
@@ -343,15 +434,9 @@ class Torrent():
             return pathlib.Path(abspath(p)).relative_to(abspath(basepath).parent)
 
         # Apply filters to relative paths with torrent name as first segment
-        exclude_globs = tuple(str(g) for g in self._exclude['globs'])
-        exclude_regexs = tuple(re.compile(r) for r in self._exclude['regexs'])
-        exclude = tuple(itertools.chain(exclude_globs, exclude_regexs))
-        include_globs = tuple(str(g) for g in self._include['globs'])
-        include_regexs = tuple(re.compile(r) for r in self._include['regexs'])
-        include = tuple(itertools.chain(include_globs, include_regexs))
         files = utils.filter_files(files, getter=relpath_with_parent,
-                                   exclude=exclude, include=include,
-                                   hidden=False, empty=False)
+                                   matcher=self._path_matcher,
+                                   hidden=False, empty=False, scanned=scanned)
 
         info = self.metainfo['info']
         if not files or all(f.size <= 0 for f in files):
@@ -478,8 +563,23 @@ class Torrent():
             raise ValueError(f'Must be Iterable, not {type(value).__name__}: {value}')
         self._include['regexs'][:] = value
 
+    @property
+    def _path_matcher(self):
+        # Exclude and include patterns compiled into a utils.PathMatcher
+        if self._matcher is None:
+            exclude_globs = tuple(str(g) for g in self._exclude['globs'])
+            exclude_regexs = tuple(re.compile(r) for r in self._exclude['regexs'])
+            include_globs = tuple(str(g) for g in self._include['globs'])
+            include_regexs = tuple(re.compile(r) for r in self._include['regexs'])
+            self._matcher = utils.PathMatcher(
+                exclude=tuple(itertools.chain(exclude_globs, exclude_regexs)),
+                include=tuple(itertools.chain(include_globs, include_regexs)),
+            )
+        return self._matcher
+
     def _filters_changed(self, _):
         """Callback for MonitoredLists in Torrent._exclude"""
+        self._matcher = None
         # Apply filters
         if self.path is not None:
             # Read file list from disk again
@@ -508,8 +608,8 @@ class Torrent():
                                          size=123456)}}
         """
         tree = {}   # Complete directory tree
-        paths = (tuple(f.parts) for f in self.files)
-        for path in paths:
+        for file in self.files:
+            path = tuple(file.parts)
             dirpath = path[:-1]  # Path without filename
             filename = path[-1]
             subtree = tree
@@ -517,7 +617,7 @@ class Torrent():
                 if item not in subtree:
                     subtree[item] = {}
                 subtree = subtree[item]
-            subtree[filename] = utils.File(path, size=self.partial_size(path))
+            subtree[filename] = utils.File(path, size=file.size)
         return tree
 
     @property
@@ -563,6 +663,9 @@ class Torrent():
     @property
     def size(self):
         """Total size of content in bytes"""
+        return self._get_cached('size', self._create_size, key=self._get_files_key())
+
+    def _create_size(self):
         if self.mode == 'singlefile':
             return self.metainfo['info']['length']
         elif self.mode == 'multifile':
@@ -755,14 +858,20 @@ class Torrent():
 
     @property
     def hashes(self):
-        """Tuple of SHA1 piece hashes as :class:`bytes`"""
+        """
+        Sequence of SHA1 piece hashes as :class:`bytes`
+
+        This is a :class:`PieceHashes` instance that doesn't copy
+        :attr:`metainfo`\\ ``['info']``\\ ``['pieces']``.
+        """
         hashes = self.metainfo['info'].get('pieces')
         if isinstance(hashes, (bytes, bytearray)):
-            # Each hash is 20 bytes long
-            return tuple(bytes(hashes[pos : pos + 20])
-                         for pos in range(0, len(hashes), 20))
+            if len(hashes) % 20 != 0:
+                # Ignore incomplete trailing hash of invalid metainfo
+                hashes = hashes[:len(hashes) - len(hashes) % 20]
+            return utils.PieceHashes(hashes)
         else:
-            return ()
+            return utils.PieceHashes()
 
     @property
     def trackers(self):
@@ -1013,18 +1122,19 @@ class Torrent():
         """
         SHA1 info hash
 
+        The info hash is only calculated again if :attr:`metainfo` changes.
+        Changes in the file system (e.g. a file in :attr:`path` that is removed)
+        are not detected until then.
+
         :raises MetainfoError: if :attr:`validate` fails or :attr:`metainfo` is
             not bencodable
         """
         try:
-            # Try to calculate infohash
-            self.validate()
-            try:
-                info = utils.encode_dict(self.metainfo['info'])
-            except ValueError as e:
-                raise error.MetainfoError(e)
-            else:
-                return hashlib.sha1(bencode.encode(info)).hexdigest()
+            # Try to calculate infohash. Successful validation is cached until
+            # anything in metainfo changes, the hash itself is only invalidated
+            # by changes in metainfo['info'].
+            self._get_cached('validated', self.validate, key=self._get_validation_key())
+            return self._get_cached('infohash', self._create_infohash, key=self._get_info_key())
         except error.MetainfoError as e:
             # If we can't calculate infohash, see if it was explicitly specifed.
             # This is necessary to create a Torrent from a Magnet URI.
@@ -1033,6 +1143,21 @@ class Torrent():
             except AttributeError:
                 raise e
 
+    def _create_infohash(self):
+        return hashlib.sha1(self._get_info_bytes()).hexdigest()
+
+    def _get_info_bytes(self):
+        # Bencoded metainfo['info'], encoded again only if it changed
+        return self._get_cached('info_bytes', self._create_info_bytes, key=self._get_info_key())
+
+    def _create_info_bytes(self):
+        try:
+            info = utils.encode_dict(self.metainfo['info'])
+        except ValueError as e:
+            raise error.MetainfoError(e)
+        else:
+            return bencode.encode(info)
+
     @property
     def infohash_base32(self):
         """Base 32 encoded SHA1 info hash"""
@@ -1071,15 +1196,16 @@ class Torrent():
         else:
             return True
 
-    def generate(self, threads=None, callback=None, interval=0):
+    def generate(self, threads=None, callback=None, interval=0, executor='thread', cache=None,
+                 incremental=False, checkpoint=None, resume_from=None, memory_map=False):
         """
         Hash pieces and report progress to `callback`
 
         This method sets :attr:`metainfo`\\ ``['info']``\\ ``['pieces']`` after
         all pieces are hashed successfully.
 
-        :param int threads: How many threads to use for hashing pieces or
-            ``None`` to use one thread per available CPU core
+        :param int threads: How many threads (or processes, see `executor`) to
+            use for hashing pieces or ``None`` to use one per available CPU core
         :param callable callback: Callable to report progress and/or abort
 
             `callback` must accept 4 positional arguments:
@@ -1093,10 +1219,51 @@ class Torrent():
             stopped.
         :param float interval: Minimum number of seconds between calls to
             `callback`; if 0, `callback` is called once per hashed piece
+        :param str executor: ``"thread"`` to read pieces in one thread and
+            hash them in `threads` threads or ``"process"`` to read and hash
+            ranges of pieces in `threads` worker processes
+
+            Worker processes only send piece hashes back, which avoids
+            contention on the global interpreter lock when many CPU cores are
+            available.
+        :param cache: :class:`PieceHashCache` instance or ``None``
+
+            Pieces of unchanged files are not read if their hashes are found
+            in `cache`. New piece hashes are stored in `cache`.
+        :param bool incremental: Whether to re-use piece hashes from the
+            previous call with `incremental` set to ``True``
+
+            Only pieces that are affected by added, removed or modified files
+            are read. A piece is re-used if it consists of the same byte ranges
+            of the same unchanged files (see :class:`PieceHashCache`), even if
+            its index changed.
+        :param checkpoint: Path of a file that the contiguous sequence of
+            piece hashes from the first piece onward is periodically written
+            to or ``None``
+
+            The file is removed after all pieces are hashed successfully. If
+            hashing fails or is cancelled, it is written one last time.
+        :param resume_from: Path of a file that was written via `checkpoint`
+            or ``None``
+
+            Reading starts at the first piece that is not in `resume_from`.
+            The file is ignored if it doesn't exist or if :attr:`name`,
+            :attr:`piece_size` or :attr:`files` are different. File contents
+            are not checked for changes.
+        :param bool memory_map: Whether to map files into memory instead of
+            reading them into buffers (see
+            :meth:`~.TorrentFileStream.iter_pieces`)
+
+            Pieces that don't span multiple files are hashed without copying
+            them. Files that can't be mapped are read normally. This is only
+            used if `executor` is ``"thread"`` and all pieces are read, i.e. no
+            piece hashes are re-used from `cache`, `incremental` or
+            `resume_from`.
 
         :raises PathError: if :attr:`path` contains only empty files/directories
         :raises ReadError: if :attr:`path` or any file beneath it is not
-            readable
+            readable or if `resume_from` is not readable
+        :raises WriteError: if `checkpoint` is not writable
         :raises RuntimeError: if :attr:`path` is None
 
         :return: ``True`` if all pieces were successfully hashed, ``False``
@@ -1107,16 +1274,18 @@ class Torrent():
         elif sum(utils.real_size(fp) for fp in self.filepaths) < 1:
             raise error.PathError(self.path, msg='Empty or all files excluded')
 
-        hasher_threads = threads or NCORES
-
-        # Read piece_size'd chunks from disk and send them to HasherPool
-        reader = generate.Reader(torrent=self, queue_size=hasher_threads * 3)
-
-        # Multiple threads that get chunks from Reader, calculate the hashes,
-        # and push them to a hash queue
-        hashers = generate.HasherPool(
-            hasher_threads=hasher_threads,
-            piece_queue=reader.piece_queue,
+        piece_keys, known_hashes = self._get_cached_hashes(
+            cache, self.path,
+            previous_hashes=self._previous_piece_hashes if incremental else None,
+        )
+        known_hashes.update(self._get_resumed_hashes(resume_from))
+        if checkpoint is not None:
+            checkpoint = generate.Checkpoint(checkpoint, self)
+        reader, hashers = self._get_hashing_pipeline(
+            threads=threads,
+            executor=executor,
+            skip_pieces=known_hashes,
+            memory_map=memory_map,
         )
 
         # Collect piece hashes from HasherPool and call `callback` for status
@@ -1130,14 +1299,25 @@ class Torrent():
                 interval=interval,
                 torrent=self,
             ),
+            known_hashes=known_hashes,
+            checkpoint=checkpoint,
         )
 
         # Collect piece hashes
-        piece_hashes = collector.collect()
-        concatenated_piece_hashes = b''.join(piece_hashes)
+        concatenated_piece_hashes = collector.collect()
+        hashes_by_index = collector.hashes_by_index
+        self._set_cached_hashes(cache, piece_keys, known_hashes, hashes_by_index)
+        if incremental:
+            self._previous_piece_hashes = {
+                piece_keys[piece_index][0]: piece_hash
+                for piece_index, piece_hash in hashes_by_index.items()
+                if piece_keys[piece_index][0] is not None
+            }
         hashes_count = len(concatenated_piece_hashes) / 20
         if hashes_count == self.pieces:
             self.metainfo['info']['pieces'] = concatenated_piece_hashes
+            if checkpoint is not None:
+                checkpoint.remove()
             return True
         elif hashes_count < self.pieces:
             # Hashing was cancelled
@@ -1146,7 +1326,143 @@ class Torrent():
             raise RuntimeError('Unexpected number of hashes generated: '
                                f'{hashes_count} instead of {self.pieces}')
 
-    def verify(self, path, threads=None, callback=None, interval=0):
+    def generate_stream(self, data, threads=None, callback=None, interval=0):
+        """
+        Hash pieces from a stream instead of reading :attr:`files` from disk
+
+        This works like :meth:`generate`, but `data` provides the content of
+        :attr:`files`, which can be declared without any existing files by
+        setting :attr:`files` to :class:`File` objects with sizes.
+
+        >>> torrent = Torrent()
+        >>> torrent.files = [File('Foo/a.txt', size=300), File('Foo/b.txt', size=200)]
+        >>> with open('a.txt', 'rb') as a, open('b.txt', 'rb') as b:
+        ...     torrent.generate_stream(itertools.chain(a, b))
+        True
+
+        Only a few pieces are kept in memory at any time.
+
+        :param data: Readable binary file-like object (e.g. a pipe) or iterable
+            of bytes-like objects that provides the concatenated content of
+            all files in the same order as :attr:`files`
+        :param int threads: How many threads to use for hashing pieces or
+            ``None`` to use one per available CPU core
+        :param callable callback: See :meth:`generate`; the file path is the
+            relative path of the file in :attr:`files`
+        :param float interval: See :meth:`generate`
+
+        :raises StreamSizeError: if `data` provides more or less data than the
+            combined size of :attr:`files`
+        :raises RuntimeError: if :attr:`files` is empty or all files are empty
+
+        :return: ``True`` if all pieces were successfully hashed, ``False``
+            otherwise
+        """
+        if self.size < 1:
+            raise RuntimeError('generate_stream() called while file list is empty')
+
+        hasher_threads = threads or NCORES
+        reader = generate.StreamReader(
+            torrent=self,
+            queue_size=hasher_threads * 3,
+            data=data,
+        )
+        return self._generate_from_stream_reader(reader, hasher_threads, callback, interval)
+
+    def generate_copy(self, destination, threads=None, callback=None, interval=0):
+        """
+        Copy :attr:`files` to `destination` and hash pieces in the same pass
+
+        This produces the same :attr:`metainfo` as :meth:`generate`, but the
+        content is only read once, e.g. when it is moved to a different
+        volume for seeding.
+
+        Files are copied to `destination`/:attr:`name` and existing files are
+        overwritten. Only file content is copied. If hashing fails or is
+        cancelled, `destination` may contain incomplete files.
+
+        :param destination: Path of an existing or new directory
+        :param int threads: How many threads to use for hashing pieces or
+            ``None`` to use one per available CPU core
+        :param callable callback: See :meth:`generate`
+        :param float interval: See :meth:`generate`
+
+        :raises PathError: if :attr:`path` contains only empty files/directories
+            or if a file would be copied onto itself
+        :raises ReadError: if :attr:`path` or any file beneath it is not
+            readable
+        :raises WriteError: if `destination` or any file beneath it is not
+            writable
+        :raises VerifyFileSizeError: if a file changed its size since
+            :attr:`path` was set
+        :raises RuntimeError: if :attr:`path` is None
+
+        :return: ``True`` if all pieces were successfully hashed, ``False``
+            otherwise
+        """
+        if self.path is None:
+            raise RuntimeError('generate_copy() called with no path specified')
+        elif self.size < 1:
+            raise error.PathError(self.path, msg='Empty or all files excluded')
+
+        hasher_threads = threads or NCORES
+        reader = generate.CopyReader(
+            torrent=self,
+            queue_size=hasher_threads * 3,
+            path=self.path,
+            destination=destination,
+        )
+        return self._generate_from_stream_reader(reader, hasher_threads, callback, interval)
+
+    def _generate_from_stream_reader(self, reader, hasher_threads, callback, interval):
+        hashers = generate.HasherPool(
+            hasher_threads=hasher_threads,
+            piece_queue=reader.piece_queue,
+            buffer_pool=reader.buffer_pool,
+        )
+        collector = generate.Collector(
+            torrent=self,
+            reader=reader,
+            hashers=hashers,
+            callback=generate.GenerateCallback(
+                callback=callback,
+                interval=interval,
+                torrent=self,
+            ),
+        )
+
+        concatenated_piece_hashes = collector.collect()
+        if len(concatenated_piece_hashes) // 20 == self.pieces:
+            self.metainfo['info']['pieces'] = concatenated_piece_hashes
+            return True
+        else:
+            # Hashing was cancelled
+            return False
+
+    def agenerate(self, threads=None, interval=0, executor='thread', cache=None, incremental=False,
+                  checkpoint=None, resume_from=None, memory_map=False):
+        """
+        Asynchronous version of :meth:`generate`
+
+        Arguments are the same as for :meth:`generate`, except for `callback`.
+
+        :return: :class:`AsyncProgress` instance that is awaitable and yields
+            ``(filepath, pieces_done, pieces_total)`` tuples
+        """
+        return asynchronous.AsyncProgress(
+            self.generate,
+            threads=threads,
+            interval=interval,
+            executor=executor,
+            cache=cache,
+            incremental=incremental,
+            checkpoint=checkpoint,
+            resume_from=resume_from,
+            memory_map=memory_map,
+        )
+
+    def verify(self, path, threads=None, callback=None, interval=0, executor='thread', cache=None,
+               readers=1, memory_map=False):
         """
         Check if `path` contains all the data specified in this torrent
 
@@ -1154,8 +1470,8 @@ class Torrent():
         :attr:`metainfo`\\ ``['info']``\\ ``['pieces']``.
 
         :param str path: Directory or file to read from
-        :param int threads: How many threads to use for hashing pieces or
-            ``None`` to use one thread per available CPU core
+        :param int threads: How many threads (or processes, see `executor`) to
+            use for hashing pieces or ``None`` to use one per available CPU core
         :param callable callback: Callable to report progress and/or abort
 
             `callback` must accept 7 positional arguments:
@@ -1174,6 +1490,17 @@ class Torrent():
         :param float interval: Minimum number of seconds between calls to
             `callback` (if 0, `callback` is called once per piece); this is
             ignored if an error is found
+        :param str executor: ``"thread"`` or ``"process"`` (see
+            :meth:`generate`)
+        :param cache: :class:`PieceHashCache` instance or ``None`` (see
+            :meth:`generate`)
+        :param int readers: How many threads read pieces concurrently if
+            `executor` is ``"thread"``; pieces are split into ranges at file
+            boundaries and each range is read with separate file handles, which
+            can be faster on storage that handles parallel reads well (e.g. SSDs
+            or RAID arrays)
+        :param bool memory_map: See :meth:`generate`; this is only used if
+            `readers` is 1
 
         If a callback is specified, exceptions are not raised but passed to
         `callback` instead.
@@ -1200,10 +1527,62 @@ class Torrent():
             path=path,
         )
 
+        if not self._verify_path_type(path, verify_callback, pieces_total=self.pieces):
+            return False
+
+        else:
+            piece_keys, known_hashes = self._get_cached_hashes(cache, path)
+            reader, hashers = self._get_hashing_pipeline(
+                threads=threads,
+                executor=executor,
+                path=path,
+                skip_pieces=known_hashes,
+                readers=readers,
+                memory_map=memory_map,
+            )
+
+            # Collect piece hashes from HasherPool and call `callback` for status
+            # reporting/cancellation
+            collector = generate.Collector(
+                torrent=self,
+                reader=reader,
+                hashers=hashers,
+                callback=verify_callback,
+                known_hashes=known_hashes,
+            )
+
+            concatenated_piece_hashes = collector.collect()
+            self._set_cached_hashes(cache, piece_keys, known_hashes, collector.hashes_by_index)
+            return concatenated_piece_hashes == self.metainfo['info']['pieces']
+
+    def averify(self, path, threads=None, interval=0, executor='thread', cache=None, readers=1,
+                memory_map=False):
+        """
+        Asynchronous version of :meth:`verify`
+
+        Arguments are the same as for :meth:`verify`, except for `callback`.
+
+        :return: :class:`AsyncProgress` instance that is awaitable and yields
+            ``(filepath, pieces_done, pieces_total, piece_index, piece_hash,
+            exception)`` tuples
+        """
+        return asynchronous.AsyncProgress(
+            self.verify,
+            path=path,
+            threads=threads,
+            interval=interval,
+            executor=executor,
+            cache=cache,
+            readers=readers,
+            memory_map=memory_map,
+        )
+
+    def _verify_path_type(self, path, verify_callback, pieces_total):
+        # Report error via `verify_callback` and return False if `path` is a
+        # directory and we expect a file or vice versa
         def early_exception(exception):
             piece_index = 0
             pieces_done = 0
-            pieces_total = self.pieces
             filepath = None
             piece_hash = None
             exceptions = (exception,)
@@ -1217,34 +1596,326 @@ class Torrent():
             early_exception(error.VerifyNotDirectoryError(path))
             return False
 
-        else:
-            hasher_threads = threads or NCORES
+        return True
 
-            # Read piece_size'd chunks from disk and send them to HasherPool
-            reader = generate.Reader(
+    def verify_sample(self, path, fraction=None, pieces=None, pieces_per_file=None, seed=None,
+                      threads=None, callback=None, interval=0, executor='thread', readers=1):
+        """
+        Check if `path` contains the data of randomly picked pieces
+
+        This is much faster than :meth:`verify` for big torrents, but it can
+        only give statistical confidence that `path` is not corrupt (see
+        :meth:`~.SampleResult.confidence`).
+
+        Exactly one of `fraction`, `pieces` or `pieces_per_file` must be given.
+
+        :param str path: Directory or file to read from
+        :param float fraction: Check this fraction of all pieces (0 <
+            `fraction` <= 1)
+        :param int pieces: Check this many pieces
+        :param int pieces_per_file: Check this many pieces of each file
+        :param seed: Seed for the random number generator to check the same
+            pieces each time or ``None`` to check different pieces each time
+        :param threads: See :meth:`verify`
+        :param callback: See :meth:`verify`; the number of checked pieces and the
+            total number of pieces only include sampled pieces
+        :param interval: See :meth:`verify`
+        :param executor: See :meth:`verify`
+        :param readers: See :meth:`verify`
+
+        If a callback is specified, exceptions are not raised but passed to
+        `callback` instead.
+
+        :raises VerifyContentError: if a file contains unexpected data
+        :raises VerifyIsDirectoryError: if `path` is a directory and this
+            torrent contains a single file
+        :raises VerifyNotDirectoryError: if `path` is a file and this torrent
+            contains a directory
+        :raises ReadError: if a file is not readable
+        :raises MetainfoError: if :meth:`validate` fails
+        :raises ValueError: if the sample size is invalid
+
+        :return: :class:`SampleResult` instance, which is truthy if all sampled
+            pieces are verified successfully
+        """
+        # First make sure we are a valid torrent
+        self.validate()
+
+        piece_indexes = sample.get_piece_indexes(
+            self,
+            fraction=fraction,
+            pieces=pieces,
+            pieces_per_file=pieces_per_file,
+            seed=seed,
+        )
+
+        # Wrapper around callback function that compares hashes
+        verify_callback = generate.VerifyCallback(
+            callback=callback,
+            interval=interval,
+            torrent=self,
+            path=path,
+        )
+
+        if not self._verify_path_type(path, verify_callback, pieces_total=len(piece_indexes)):
+            return sample.SampleResult(
+                pieces_total=self.pieces,
+                piece_indexes=piece_indexes,
+                pieces_checked=0,
+                bad_pieces=(),
+            )
+
+        reader, hashers = self._get_hashing_pipeline(
+            threads=threads,
+            executor=executor,
+            path=path,
+            piece_indexes=piece_indexes,
+            readers=readers,
+        )
+        collector = generate.Collector(
+            torrent=self,
+            reader=reader,
+            hashers=hashers,
+            callback=verify_callback,
+            pieces_total=len(piece_indexes),
+        )
+        collector.collect()
+
+        exp_hashes = self.hashes
+        piece_hashes = collector.hashes_by_index
+        return sample.SampleResult(
+            pieces_total=self.pieces,
+            piece_indexes=piece_indexes,
+            pieces_checked=collector.pieces_done,
+            bad_pieces=(
+                piece_index for piece_index in collector.pieces_seen
+                if piece_hashes.get(piece_index) != exp_hashes[piece_index]
+            ),
+        )
+
+    def verify_pieces(self, path, previous=None, threads=None, callback=None, interval=0,
+                      executor='thread', readers=1):
+        """
+        Check each piece in `path` and return the result for every piece
+
+        Unlike :meth:`verify`, this method doesn't stop at the first corrupt or
+        missing piece. Errors are passed to `callback` if it is given and
+        recorded in the returned :class:`PieceBitfield` instance, which can be
+        stored with :meth:`PieceBitfield.write`.
+
+        If `previous` is the result of a previous call, pieces that were
+        :attr:`~PieceBitfield.GOOD` are not checked again unless any of their
+        files was modified or replaced since then. This makes repeated checks
+        of the same content cheap.
+
+        :param str path: Directory or file to read from
+        :param previous: :class:`PieceBitfield` instance from a previous call
+            or ``None`` to check all pieces
+        :param threads: See :meth:`verify`
+        :param callback: See :meth:`verify`; the number of checked pieces and
+            the total number of pieces only include pieces that are checked
+        :param interval: See :meth:`verify`
+        :param executor: See :meth:`verify`
+        :param readers: See :meth:`verify`
+
+        :raises VerifyIsDirectoryError: if `path` is a directory and this
+            torrent contains a single file and there is no `callback`
+        :raises VerifyNotDirectoryError: if `path` is a file and this torrent
+            contains a directory and there is no `callback`
+        :raises MetainfoError: if :meth:`validate` fails
+        :raises ValueError: if `previous` was created for a different torrent
+
+        :return: :class:`PieceBitfield` instance, which is truthy if all pieces
+            are verified successfully; pieces that were not checked because
+            verification was cancelled are :attr:`~PieceBitfield.UNKNOWN`
+        """
+        # First make sure we are a valid torrent
+        self.validate()
+        infohash = self.infohash
+        if previous is not None and (previous.infohash != infohash or len(previous) != self.pieces):
+            raise ValueError(f'Bitfield belongs to different torrent: {previous.infohash}')
+
+        # Get file signatures before reading so any modification during
+        # verification is detected next time
+        file_signatures = tuple(
+            bitfield.get_file_signature(os.path.join(str(path), *file.parts[1:]))
+            for file in self.files
+        )
+        result = bitfield.PieceBitfield(infohash, self.pieces, file_signatures=file_signatures)
+        piece_indexes = self._get_unverified_piece_indexes(previous, file_signatures)
+        for piece_index in set(range(self.pieces)).difference(piece_indexes):
+            result[piece_index] = bitfield.PieceBitfield.GOOD
+
+        if not piece_indexes:
+            return result
+        elif not self._verify_path_type(
+            path,
+            generate.VerifyCallback(callback=callback, interval=interval, torrent=self, path=path),
+            pieces_total=len(piece_indexes),
+        ):
+            return result
+
+        reader, hashers = self._get_hashing_pipeline(
+            threads=threads,
+            executor=executor,
+            path=path,
+            piece_indexes=piece_indexes,
+            readers=readers,
+        )
+        collector = generate.Collector(
+            torrent=self,
+            reader=reader,
+            hashers=hashers,
+            # Report errors to `callback` or ignore them instead of raising
+            callback=generate.VerifyCallback(
+                callback=callback or (lambda *args: None),
+                interval=interval,
                 torrent=self,
-                queue_size=hasher_threads * 3,
                 path=path,
+            ),
+            pieces_total=len(piece_indexes),
+        )
+        collector.collect()
+
+        exp_hashes = self.hashes
+        piece_hashes = collector.hashes_by_index
+        for piece_index in collector.pieces_seen:
+            piece_hash = piece_hashes.get(piece_index)
+            if piece_hash is None:
+                result[piece_index] = bitfield.PieceBitfield.MISSING
+            elif piece_hash == exp_hashes[piece_index]:
+                result[piece_index] = bitfield.PieceBitfield.GOOD
+            else:
+                result[piece_index] = bitfield.PieceBitfield.BAD
+        return result
+
+    def _get_unverified_piece_indexes(self, previous, file_signatures):
+        # Return sorted list of indexes of pieces that were not GOOD in
+        # `previous` or that contain bytes of a file with a different signature
+        if previous is None or len(previous.file_signatures) != len(file_signatures):
+            return list(range(self.pieces))
+
+        piece_indexes = set(range(self.pieces)).difference(previous.good_pieces)
+        for (first, last), signature, previous_signature in zip(
+            bitfield.get_file_piece_ranges(self), file_signatures, previous.file_signatures,
+        ):
+            if first is not None and signature != previous_signature:
+                piece_indexes.update(range(first, last + 1))
+        return sorted(piece_indexes)
+
+    def _get_cached_hashes(self, cache, path, previous_hashes=None):
+        # Return cache keys for all pieces and mapping of piece indexes to
+        # `(filepath, piece_hash)` tuples for pieces that are found in
+        # `previous_hashes` (mapping of cache keys to piece hashes) or `cache`
+        if cache is None and previous_hashes is None:
+            return None, {}
+
+        piece_keys = hashcache.PieceHashCache.get_piece_keys(self, path)
+        keys = [key for key, filepath in piece_keys if key is not None]
+        cached_hashes = {key: previous_hashes[key] for key in keys
+                         if previous_hashes and key in previous_hashes}
+        if cache is not None:
+            cached_hashes.update(cache.get(key for key in keys if key not in cached_hashes))
+        known_hashes = {
+            piece_index: (filepath, cached_hashes[key])
+            for piece_index, (key, filepath) in enumerate(piece_keys)
+            if key in cached_hashes
+        }
+        return piece_keys, known_hashes
+
+    def _set_cached_hashes(self, cache, piece_keys, known_hashes, piece_hashes):
+        # Store newly calculated piece hashes in `cache`
+        if cache is not None:
+            cache.set(
+                (piece_keys[piece_index][0], piece_hash)
+                for piece_index, piece_hash in piece_hashes.items()
+                if piece_index not in known_hashes and piece_keys[piece_index][0] is not None
             )
 
+    def _get_resumed_hashes(self, resume_from):
+        # Return mapping of piece indexes to `(filepath, piece_hash)` tuples for
+        # piece hashes from checkpoint file `resume_from`
+        if resume_from is None:
+            return {}
+        piece_hashes = generate.Checkpoint.read(resume_from, self)
+        if not piece_hashes:
+            return {}
+
+        # Report the last file of each piece like Reader does
+        filepaths = tuple(self.filepaths)
+        file_ends = tuple(itertools.accumulate(file.size for file in self.files))
+        piece_size = self.piece_size
+        return {
+            piece_index: (
+                filepaths[bisect.bisect_right(file_ends, min((piece_index + 1) * piece_size, self.size) - 1)],
+                piece_hash,
+            )
+            for piece_index, piece_hash in enumerate(piece_hashes)
+        }
+
+    def _get_hashing_pipeline(self, threads, executor, path=None, piece_indexes=None, skip_pieces=None,
+                              readers=1, memory_map=False):
+        # Return `reader` and `hashers` arguments for generate.Collector
+        #
+        # `piece_indexes` are the only pieces that are read, one by one.
+        # `skip_pieces` are pieces that are already known. They are skipped
+        # while reading sequentially if possible.
+        hasher_threads = threads or NCORES
+
+        if skip_pieces:
+            if len(skip_pieces) >= self.pieces:
+                # Nothing to read
+                piece_indexes = ()
+            elif executor != 'thread' or readers > 1:
+                # Pieces are read in ranges anyway
+                piece_indexes = [piece_index for piece_index in range(self.pieces)
+                                 if piece_index not in skip_pieces]
+            if piece_indexes is not None:
+                skip_pieces = None
+
+        if executor == 'thread':
+            if readers > 1:
+                # Read ranges of pieces concurrently and send them to HasherPool
+                reader = generate.ShardedReader(
+                    torrent=self,
+                    queue_size=(hasher_threads + readers) * 3,
+                    readers=readers,
+                    path=path,
+                    piece_indexes=piece_indexes,
+                )
+            else:
+                # Read piece_size'd chunks from disk and send them to HasherPool
+                reader = generate.Reader(
+                    torrent=self,
+                    queue_size=hasher_threads * 3,
+                    path=path,
+                    piece_indexes=piece_indexes,
+                    skip_pieces=skip_pieces,
+                    memory_map=memory_map,
+                )
+
             # Multiple threads that get chunks from Reader, calculate the hashes,
             # and push them to a hash queue
             hashers = generate.HasherPool(
                 hasher_threads=hasher_threads,
                 piece_queue=reader.piece_queue,
+                buffer_pool=reader.buffer_pool,
             )
+            return reader, hashers
 
-            # Collect piece hashes from HasherPool and call `callback` for status
-            # reporting/cancellation
-            collector = generate.Collector(
+        elif executor == 'process':
+            # Multiple processes that read ranges of pieces, calculate the
+            # hashes, and push them to a hash queue
+            pool = generate.ProcessHasherPool(
                 torrent=self,
-                reader=reader,
-                hashers=hashers,
-                callback=verify_callback,
+                processes=hasher_threads,
+                path=path,
+                piece_indexes=piece_indexes,
             )
+            return pool, pool
 
-            piece_hashes = collector.collect()
-            return piece_hashes == self.hashes
+        else:
+            raise ValueError(f'Invalid executor: {executor!r}')
 
     def verify_filesize(self, path, callback=None):
         """
@@ -1338,7 +2009,7 @@ class Torrent():
 
             # Check file size
             fs_filepath_size = utils.real_size(fs_filepath)
-            expected_size = self.partial_size(torrent_filepath)
+            expected_size = torrent_filepath.size
             if fs_filepath_size != expected_size:
                 exception = error.VerifyFileSizeError(fs_filepath, fs_filepath_size, expected_size)
                 if cancel(file_index, exception):
@@ -1357,6 +2028,19 @@ class Torrent():
         else:
             return True
 
+    def averify_filesize(self, path):
+        """
+        Asynchronous version of :meth:`verify_filesize`
+
+        Arguments are the same as for :meth:`verify_filesize`, except for
+        `callback`.
+
+        :return: :class:`AsyncProgress` instance that is awaitable and yields
+            ``(fs_filepath, torrent_filepath, files_done, files_total,
+            exception)`` tuples
+        """
+        return asynchronous.AsyncProgress(self.verify_filesize, path=path)
+
     def validate(self):
         """
         Check if all mandatory keys exist in :attr:`metainfo` and all standard keys
@@ -1409,11 +2093,15 @@ class Torrent():
 
             if self.path is not None:
                 # Check if filepath actually points to a file
-                if not os.path.isfile(self.path):
+                try:
+                    path_stat = os.stat(self.path)
+                except OSError:
+                    path_stat = None
+                if path_stat is None or not stat.S_ISREG(path_stat.st_mode):
                     raise error.MetainfoError(f"Metainfo includes {self.path} as file, but it is not a file")
 
                 # Check if size matches
-                path_size = utils.real_size(self.path)
+                path_size = path_stat.st_size
                 if path_size != info['length']:
                     raise error.MetainfoError(f"Mismatching file sizes in metainfo ({info['length']})"
                                               f" and file system ({path_size}): {self.path}")
@@ -1446,13 +2134,15 @@ class Torrent():
                     filepath = os.path.join(self.path, os.path.join(*fileinfo['path']))
 
                     # Check if filepath exists and is a file
-                    if not os.path.exists(filepath):
+                    try:
+                        file_stat = os.stat(filepath)
+                    except OSError:
                         raise error.MetainfoError(f"Metainfo includes file that doesn't exist: {filepath}")
-                    if not os.path.isfile(filepath):
+                    if not stat.S_ISREG(file_stat.st_mode):
                         raise error.MetainfoError(f"Metainfo includes file that isn't a file: {filepath}")
 
                     # Check if sizes match
-                    filesize = utils.real_size(filepath)
+                    filesize = file_stat.st_size
                     if filesize != fileinfo['length']:
                         raise error.MetainfoError(f"Mismatching file sizes in metainfo ({fileinfo['length']})"
                                                   f" and file system ({filesize}): {filepath}")
@@ -1602,36 +2292,55 @@ class Torrent():
                 if not isinstance(metainfo_enc, abc.Mapping):
                     raise error.BdecodeError()
 
-            # Extract 'pieces' from metainfo before decoding because it's the
-            # only byte sequence that isn't supposed to be decoded to a string.
-            if (b'info' in metainfo_enc and
-                isinstance(metainfo_enc[b'info'], dict) and
-                b'pieces' in metainfo_enc[b'info']):
-                pieces = metainfo_enc[b'info'].pop(b'pieces')
-                metainfo = utils.decode_dict(metainfo_enc)
-                metainfo['info']['pieces'] = pieces
+            # Keep the original "info" dictionary so the infohash doesn't
+            # require encoding it again and is correct even if encoding it
+            # again doesn't produce the same bytes
+            if isinstance(metainfo_enc.get(b'info'), dict):
+                info_span = utils.get_bencoded_info_span(content)
             else:
-                metainfo = utils.decode_dict(metainfo_enc)
+                info_span = None
+            info_bytes = bytes(content[slice(*info_span)]) if info_span else None
+            return cls._from_bdecoded(metainfo_enc, info_bytes, validate)
+
+    @classmethod
+    def _from_bdecoded(cls, metainfo_enc, info_bytes, validate):
+        # Create instance from bdecoded metainfo and the original bencoded
+        # "info" dictionary (or None)
+
+        # Extract 'pieces' from metainfo before decoding because it's the
+        # only byte sequence that isn't supposed to be decoded to a string.
+        if (b'info' in metainfo_enc and
+            isinstance(metainfo_enc[b'info'], dict) and
+            b'pieces' in metainfo_enc[b'info']):
+            pieces = metainfo_enc[b'info'].pop(b'pieces')
+            metainfo = utils.decode_dict(metainfo_enc)
+            metainfo['info']['pieces'] = pieces
+        else:
+            metainfo = utils.decode_dict(metainfo_enc)
+
+        # "info" must be a dictionary.  If validation is not wanted, it's OK
+        # if it doesn't exist because the "metainfo" property will add it
+        # automatically.
+        utils.assert_type(metainfo, ('info',), (dict,), must_exist=validate)
 
-            # "info" must be a dictionary.  If validation is not wanted, it's OK
-            # if it doesn't exist because the "metainfo" property will add it
-            # automatically.
-            utils.assert_type(metainfo, ('info',), (dict,), must_exist=validate)
+        torrent = cls()
+        torrent._metainfo = metainfo
 
-            torrent = cls()
-            torrent._metainfo = metainfo
+        # Convert "creation date" to datetime.datetime and "private" to
+        # bool, but only if they exist
+        if b'creation date' in metainfo_enc:
+            torrent.creation_date = metainfo_enc[b'creation date']
+        if b'private' in metainfo_enc.get(b'info', {}):
+            torrent.private = metainfo_enc[b'info'][b'private']
 
-            # Convert "creation date" to datetime.datetime and "private" to
-            # bool, but only if they exist
-            if b'creation date' in metainfo_enc:
-                torrent.creation_date = metainfo_enc[b'creation date']
-            if b'private' in metainfo_enc.get(b'info', {}):
-                torrent.private = metainfo_enc[b'info'][b'private']
+        # Any change in "info" discards the original bytes
+        if info_bytes is not None:
+            torrent._set_cached('info_bytes', info_bytes, key=torrent._get_info_key())
 
-            if validate:
-                torrent.validate()
+        if validate:
+            torrent._get_cached('validated', torrent.validate, key=torrent._get_validation_key())
 
-            return torrent
+        return torrent
 
     @classmethod
     def read(cls, filepath, validate=True):
@@ -1658,6 +2367,100 @@ class Torrent():
         except error.BdecodeError:
             raise error.BdecodeError(filepath)
 
+    @classmethod
+    def read_many(cls, paths, validate=True, fields=None, processes=None):
+        """
+        Read multiple torrent files in worker processes
+
+        Directories in `paths` are searched recursively for files with the
+        extension ``.torrent``. Any other path is read as a torrent file.
+
+        Only a few torrent files are read ahead, so memory usage doesn't depend
+        on the number of torrent files. If the returned iterator is closed,
+        pending torrent files are not read.
+
+        :param paths: Path or iterable of paths to torrent files and/or
+            directories
+        :param bool validate: Whether to run :meth:`validate` on each new
+            Torrent instance
+        :param fields: Sequence of ``info`` keys (e.g. ``("name", "length",
+            "files")``) or ``None`` to read the whole ``info`` dictionary;
+            other ``info`` values (most notably ``pieces``) are skipped without
+            decoding them and the new Torrent instances are not validated
+            regardless of `validate`
+        :param int processes: How many worker processes to use or ``None`` to
+            use one per available CPU core
+
+        :return: Iterator over `(path, torrent)` tuples in the order the torrent
+            files are found where `torrent` is a new :class:`Torrent` instance
+            or the :class:`ReadError`, :class:`BdecodeError` or
+            :class:`MetainfoError` that was raised while reading `path`
+
+            :attr:`infohash` is calculated from the original ``info``
+            dictionary, even if `fields` is given.
+        """
+        if isinstance(paths, (str, os.PathLike)):
+            paths = (paths,)
+        if processes is None:
+            processes = NCORES
+        else:
+            processes = max(1, int(processes))
+        if fields is not None:
+            fields = tuple(fields)
+            validate = False
+
+        def iter_filepaths():
+            for path in paths:
+                if os.path.isdir(path):
+                    for filepath, _, exception in reuse.find_torrent_files(path):
+                        if exception is not None:
+                            yield exception.path, exception
+                        else:
+                            yield filepath, None
+                else:
+                    yield str(path), None
+
+        filepaths = iter_filepaths()
+        pending = collections.deque()
+        executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=utils.get_mp_context(),
+        )
+        try:
+            while True:
+                # Keep a few torrent files queued per process, but not all of
+                # them to limit memory usage
+                while len(pending) < processes * 4:
+                    item = next(filepaths, None)
+                    if item is None:
+                        break
+                    filepath, exception = item
+                    if exception is None:
+                        future = executor.submit(_read_torrent_file, cls, filepath, validate, fields)
+                    else:
+                        future = concurrent.futures.Future()
+                        future.set_result((None, None, exception))
+                    pending.append((filepath, future))
+
+                if not pending:
+                    break
+
+                filepath, future = pending.popleft()
+                torrent, info_bytes, exception = future.result()
+                if exception is not None:
+                    yield filepath, exception
+                else:
+                    # Cached values are not pickled
+                    if info_bytes is not None:
+                        torrent._set_cached('info_bytes', info_bytes, key=torrent._get_info_key())
+                    if validate:
+                        torrent._set_cached('validated', None, key=torrent._get_validation_key())
+                    yield filepath, torrent
+        finally:
+            for _, future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
     def copy(self):
         """Create a new :class:`Torrent` instance with the same metainfo"""
         from copy import deepcopy
@@ -1665,7 +2468,7 @@ class Torrent():
         cp._metainfo = deepcopy(self._metainfo)
         return cp
 
-    def reuse(self, path, callback=None, interval=0):
+    def reuse(self, path, callback=None, interval=0, index=None, threads=1, update_index=False):
         """
         Copy ``pieces`` and ``piece length`` from existing torrent
 
@@ -1680,6 +2483,9 @@ class Torrent():
         is found, compare three piece hashes per file to reduce the risk of a
         false positive.
 
+        Only the name, files and piece size of each torrent file are decoded
+        to find a match. Torrent files that don't match are not validated.
+
         .. warning:: This should almost always work in practice, but a false
             positive match is theoretically possible, and there is no way to
             avoid that.
@@ -1711,6 +2517,24 @@ class Torrent():
         :param float interval: Minimum number of seconds between calls to
             `callback`; if 0, `callback` is called for each torrent file;
             `callback` is always called if `exception` is not ``None``
+        :param index: :class:`ReuseIndex` instance or ``None``
+
+            If provided, only the torrent files beneath `path` that it returns
+            as candidates are read. The number of torrent files passed to
+            `callback` only includes those candidates.
+        :param bool update_index: Whether to call :meth:`ReuseIndex.update`
+            with `path` before looking for candidates in `index`
+
+            Walking `path` and checking every torrent file for changes can take
+            a while, so this is ``False`` by default and the index should be
+            updated separately. Exceptions from :meth:`ReuseIndex.update` are
+            reported to `callback` before any candidates.
+        :param int threads: How many torrent files are read and compared to
+            this torrent concurrently
+
+            Candidates are still reported to `callback` in the same order and
+            the first match is used. Candidates after the reported one may
+            already be read and hashed.
 
         :raises ReadError: if reading a torrent file fails
         :raises BdecodeError: if parsing a torrent file fails
@@ -1731,36 +2555,34 @@ class Torrent():
         else:
             raise ValueError(f'Invalid path argument: {path!r}')
 
-        torrent_file_items = reuse.find_torrent_files(*paths, max_file_size=self.MAX_TORRENT_FILE_SIZE)
+        if index is not None:
+            torrent_file_items = self._get_indexed_torrent_files(index, paths, update_index)
+        else:
+            # Walk the file system only once instead of getting `total` first
+            torrent_file_items = tuple(
+                reuse.find_torrent_files(*paths, max_file_size=self.MAX_TORRENT_FILE_SIZE)
+            )
         maybe_call_callback = reuse.ReuseCallback(
             callback=callback,
             interval=interval,
             torrent=self,
-            torrent_files_total=torrent_file_items.total,
+            torrent_files_total=torrent_file_items[-1][1] if torrent_file_items else 0,
         )
 
-        for candidate_path, files_done, exception in torrent_file_items:
-            try:
-                if candidate_path:
-                    candidate = Torrent.read(candidate_path)
-                elif exception:
-                    raise exception
-                else:
-                    raise RuntimeError('Both candidate_path and exception are None?!')
-
-            except (error.ReadError, error.BdecodeError, error.MetainfoError) as e:
-                cancelled = maybe_call_callback(candidate_path, files_done, False, e)
-                if cancelled is not None:
-                    break
+        candidates = reuse.iter_candidates(self, torrent_file_items, threads=threads)
+        try:
+            for candidate_path, files_done, candidate, exception, is_content_match in candidates:
+                if exception:
+                    cancelled = maybe_call_callback(candidate_path, files_done, False, exception)
+                    if cancelled is not None:
+                        break
 
-            else:
-                assert exception is None
-                if reuse.is_file_match(self, candidate):
+                elif candidate is not None:
                     cancelled = maybe_call_callback(candidate_path, files_done, None, exception)
                     if cancelled is not None:
                         break
 
-                    if reuse.is_content_match(self, candidate):
+                    if is_content_match():
                         maybe_call_callback(candidate_path, files_done, True, exception)
                         reuse.copy(candidate, self)
                         return True
@@ -1773,9 +2595,31 @@ class Torrent():
                     cancelled = maybe_call_callback(candidate_path, files_done, False, exception)
                     if cancelled is not None:
                         break
+        finally:
+            candidates.close()
 
         return False
 
+    def _get_indexed_torrent_files(self, index, paths, update_index):
+        # Return `(torrent_filepath, counter, exception)` tuples like
+        # find_torrent_files() does for update exceptions and candidates
+        if update_index:
+            items = list(index.update(*paths, max_file_size=self.MAX_TORRENT_FILE_SIZE))
+        else:
+            items = []
+        items.extend((candidate_path, None) for candidate_path in index.find(self, *paths))
+        return tuple(
+            (torrent_filepath, counter, exception)
+            for counter, (torrent_filepath, exception) in enumerate(items, start=1)
+        )
+
+    def __getstate__(self):
+        # Don't pickle or copy derived values
+        state = self.__dict__.copy()
+        state['_cache'] = {}
+        state['_previous_piece_hashes'] = {}
+        return state
+
     def __repr__(self):
         sig = inspect.signature(self.__init__)
         args = []
@@ -1807,3 +2651,37 @@ class Torrent():
             return self._metainfo == other._metainfo
         else:
             return NotImplemented
+
+
+def _read_torrent_file(cls, filepath, validate, fields):
+    # This runs in a worker process of Torrent.read_many() and returns a
+    # `(torrent, info_bytes, exception)` tuple
+    try:
+        if fields is None:
+            torrent = cls.read(filepath, validate=validate)
+        else:
+            try:
+                with open(filepath, 'rb') as f:
+                    content = f.read(cls.MAX_TORRENT_FILE_SIZE)
+            except OSError as e:
+                raise error.ReadError(e.errno, filepath)
+            try:
+                metainfo_enc, info_span = utils.bdecode_metainfo(content, fields)
+            except ValueError:
+                raise error.BdecodeError(filepath)
+            torrent = cls._from_bdecoded(metainfo_enc, None, validate=False)
+            if info_span is None:
+                return torrent, None, None
+            # The info hash can't be calculated from the incomplete "info".
+            # The original bytes are used if the selected fields validate,
+            # otherwise infohash falls back to _infohash.
+            info_bytes = bytes(content[slice(*info_span)])
+            torrent._infohash = hashlib.sha1(info_bytes).hexdigest()
+            return torrent, info_bytes, None
+        try:
+            info_bytes = torrent._get_info_bytes()
+        except error.MetainfoError:
+            info_bytes = None
+        return torrent, info_bytes, None
+    except error.TorfError as e:
+        return None, None, e
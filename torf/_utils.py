@@ -14,16 +14,23 @@
 
 import abc
 import collections
+import concurrent.futures
 import contextlib
 import errno
 import fnmatch
 import functools
+import hashlib
 import http.client
 import itertools
+import logging
+import multiprocessing
 import os
 import pathlib
 import re
 import socket
+import sqlite3
+import stat
+import threading
 import typing
 import urllib.error
 import urllib.parse
@@ -33,6 +40,8 @@ from urllib.parse import quote_plus as urlquote  # noqa: F401
 
 from . import _errors as error
 
+_debug = logging.getLogger('torf').debug
+
 
 def is_divisible_by_16_kib(num):
     """Return whether `num` is divisible by 16384 and positive"""
@@ -62,30 +71,169 @@ def is_md5sum(value):
     return bool(_md5sum_regex.match(value))
 
 
+def get_mp_context():
+    """
+    Return :mod:`multiprocessing` context for worker processes
+
+    Forking a process that runs multiple threads can copy locks in a locked
+    state, so worker processes are started with the "forkserver" method where
+    it is available and with "spawn" otherwise.
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    else:
+        return multiprocessing.get_context('spawn')
+
+
+def get_stat_signature(stat):
+    """
+    Return :class:`str` that changes if the file described by `stat`
+    (:func:`os.stat` result) is modified or replaced
+    """
+    return f'{stat.st_dev}:{stat.st_ino}:{stat.st_size}:{stat.st_mtime_ns}'
+
+
+def get_fingerprint(*fields, files=()):
+    """
+    Return SHA1 digest of `fields` and `files` as :class:`bytes`
+
+    :param fields: Values that are converted to :class:`str`
+    :param files: Iterable of `(filepath, size)` tuples; their order is part
+        of the fingerprint
+    """
+    parts = [str(field) for field in fields]
+    parts.extend(f'{filepath}\0{size}' for filepath, size in files)
+    return hashlib.sha1('\0\0'.join(parts).encode('utf-8', 'surrogateescape')).digest()
+
+
+def write_file_atomically(filepath, content):
+    """
+    Write :class:`bytes` `content` to `filepath`
+
+    `content` is written to a temporary file that replaces `filepath`, so
+    `filepath` is never incomplete.
+
+    :raises WriteError: if writing fails
+    """
+    tmp_filepath = f'{filepath}.tmp'
+    try:
+        with open(tmp_filepath, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_filepath, filepath)
+    except OSError as e:
+        raise error.WriteError(e.errno, str(filepath))
+
+
+class SQLiteDatabase:
+    """
+    Thread-safe SQLite database with a single table
+
+    :param path: Path to the database file; it is created if it doesn't exist
+
+    :raises ReadError: if the database can't be opened
+    """
+
+    # SQL statements that create the table and its indexes
+    _schema = ()
+    # Name of the table that is used by clear() and len()
+    _table = None
+    # Description of the database for debugging messages
+    _description = 'database'
+
+    def __init__(self, path):
+        self._path = str(path)
+        self._lock = threading.Lock()
+        try:
+            self._db = sqlite3.connect(self._path, check_same_thread=False)
+            for statement in self._schema:
+                self._db.execute(statement)
+            self._db.commit()
+        except sqlite3.Error as e:
+            _debug(f'Failed to open {self._description} {self._path}: {e!r}')
+            raise error.ReadError(errno.EIO, self._path)
+
+    @contextlib.contextmanager
+    def _transaction(self, action, exception_class):
+        # Provide locked database connection and commit changes; translate
+        # sqlite3.Error to `exception_class`
+        with self._lock:
+            try:
+                yield self._db
+                self._db.commit()
+            except sqlite3.Error as e:
+                _debug(f'Failed to {action} {self._description} {self._path}: {e!r}')
+                raise exception_class(errno.EIO, self._path)
+
+    @property
+    def path(self):
+        """Path to the database file"""
+        return self._path
+
+    def clear(self):
+        """
+        Remove everything from the database
+
+        :raises WriteError: if writing to the database fails
+        """
+        with self._transaction('clear', error.WriteError) as db:
+            db.execute(f'DELETE FROM {self._table}')
+
+    def close(self):
+        """
+        Close the database
+
+        This is called automatically when the instance is used as a context
+        manager.
+        """
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute(f'SELECT COUNT(*) FROM {self._table}').fetchone()[0]
+
+
 def real_size(path):
     """
     Return size for `path`, which is a (link to a) file or directory
 
     Raise ReadError on failure
     """
-    if os.path.isdir(os.path.realpath(path)):
-        def onerror(exc):
-            raise error.ReadError(getattr(exc, 'errno', None),
-                                  getattr(exc, 'filename', None))
+    try:
+        path_stat = os.stat(path)
+    except OSError as exc:
+        raise error.ReadError(getattr(exc, 'errno', None),
+                              getattr(exc, 'filename', None))
 
-        size = 0
-        walker = os.walk(path, followlinks=True, onerror=onerror)
-        for dirpath,dirnames,filenames in walker:
-            for filename in filenames:
-                filepath = os.path.join(dirpath, filename)
-                size += os.path.getsize(filepath)
-        return size
+    if stat.S_ISDIR(path_stat.st_mode):
+        return sum(_get_size(entry) for entry in _iter_file_entries(path))
     else:
-        try:
-            return os.path.getsize(path)
-        except OSError as exc:
-            raise error.ReadError(getattr(exc, 'errno', None),
-                                  getattr(exc, 'filename', None))
+        return path_stat.st_size
+
+def _iter_file_entries(path):
+    # Yield os.DirEntry for each non-directory beneath `path`
+    file_entries, subdirpaths = _list_directory(path)
+    yield from file_entries
+    for subdirpath in subdirpaths:
+        yield from _iter_file_entries(subdirpath)
+
+def _get_size(entry):
+    # DirEntry.stat() follows symbolic links and caches the result
+    try:
+        return entry.stat().st_size
+    except OSError as exc:
+        raise error.ReadError(getattr(exc, 'errno', None), entry.path)
+
+def _assert_readable(path):
+    os_supports_effective_ids = os.access in os.supports_effective_ids
+    if not os.access(path, os.R_OK, effective_ids=os_supports_effective_ids):
+        raise error.ReadError(errno.EACCES, path)
 
 def list_files(path):
     """
@@ -94,29 +242,117 @@ def list_files(path):
     Raise ReadError if `path` or any file or directory underneath it is not
     readable.
     """
-    def assert_readable(path):
-        os_supports_effective_ids = os.access in os.supports_effective_ids
-        if not os.access(path, os.R_OK, effective_ids=os_supports_effective_ids):
-            raise error.ReadError(errno.EACCES, path)
+    return [file_path for file_path, _ in _scan(path)]
+
+def scan_files(path, threads=1, prune=None):
+    """
+    Return list of sorted :class:`File` objects in `path`
+
+    This is like :func:`list_files`, but each :class:`File` also knows its
+    size. Every file is stat()ed only once.
+
+    If `threads` is greater than 1, subdirectories are scanned and files are
+    checked concurrently. The result is sorted the same way.
+
+    `prune` is a callable that gets the path of each subdirectory and returns
+    whether to skip it or ``None``.
+
+    Raise ReadError if `path` or any file or directory underneath it is not
+    readable.
+    """
+    return [File(file_path, size=size) for file_path, size in _scan(path, threads=threads, prune=prune)]
 
-    if os.path.isfile(path):
-        assert_readable(path)
-        return [path]
+def _scan(path, threads=1, prune=None):
+    # Return sorted list of (file_path, size) tuples
+    try:
+        path_stat = os.stat(path)
+    except OSError as exc:
+        raise error.ReadError(getattr(exc, 'errno', None),
+                              getattr(exc, 'filename', None))
+
+    if not stat.S_ISDIR(path_stat.st_mode):
+        _assert_readable(path)
+        return [(path, path_stat.st_size)]
+    elif threads > 1:
+        files = _scan_directories_concurrently(path, threads, prune)
     else:
-        def onerror(exc):
-            raise error.ReadError(getattr(exc, 'errno', None),
-                                  getattr(exc, 'filename', None))
-        filepaths = []
-        for dirpath, dirnames, filenames in os.walk(path, onerror=onerror, followlinks=True):
-            for filename in filenames:
-                filepath = os.path.join(dirpath, filename)
-                assert_readable(filepath)
-                filepaths.append(filepath)
-        return list(sorted(filepaths, key=lambda fp: str(fp).casefold()))
+        files = []
+        dirpaths = [path]
+        while dirpaths:
+            file_entries, subdirpaths = _list_directory(dirpaths.pop(), prune)
+            files.extend(_check_files(file_entries))
+            dirpaths.extend(reversed(subdirpaths))
+    # Paths that only differ in case are sorted case-sensitively so the order
+    # doesn't depend on which thread found them first
+    return sorted(files, key=lambda file: (str(file[0]).casefold(), str(file[0])))
+
+# Number of files per concurrently checked chunk
+_SCAN_CHUNK_SIZE = 256
+
+def _scan_directories_concurrently(path, threads, prune):
+    files = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=threads, thread_name_prefix='scan') as executor:
+        pending = {executor.submit(_list_directory, path, prune)}
+        try:
+            while pending:
+                done, pending = concurrent.futures.wait(
+                    pending,
+                    return_when=concurrent.futures.FIRST_COMPLETED,
+                )
+                for future in done:
+                    result = future.result()
+                    if isinstance(result, tuple):
+                        # Directory listing
+                        file_entries, subdirpaths = result
+                        for i in range(0, len(file_entries), _SCAN_CHUNK_SIZE):
+                            chunk = file_entries[i:i + _SCAN_CHUNK_SIZE]
+                            pending.add(executor.submit(_check_files, chunk))
+                        for subdirpath in subdirpaths:
+                            pending.add(executor.submit(_list_directory, subdirpath, prune))
+                    else:
+                        # Checked files
+                        files.extend(result)
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+    return files
+
+def _list_directory(path, prune=None):
+    # Return os.DirEntry for each non-directory and paths of subdirectories,
+    # following symbolic links to directories like os.walk(followlinks=True)
+    # and skipping subdirectories `prune` returns True for
+    try:
+        with os.scandir(path) as it:
+            entries = list(it)
+    except OSError as exc:
+        raise error.ReadError(getattr(exc, 'errno', None),
+                              getattr(exc, 'filename', None))
+
+    file_entries, subdirpaths = [], []
+    for entry in entries:
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            is_dir = False
+        if is_dir:
+            if prune is None or not prune(entry.path):
+                subdirpaths.append(entry.path)
+        else:
+            file_entries.append(entry)
+    return file_entries, subdirpaths
+
+def _check_files(file_entries):
+    # Return list of (file_path, size) tuples
+    files = []
+    for entry in file_entries:
+        _assert_readable(entry.path)
+        files.append((entry.path, _get_size(entry)))
+    return files
 
 
 def filter_files(items, getter=lambda f: f, hidden=True, empty=True,
-                 exclude=(), include=()):
+                 exclude=(), include=(), matcher=None, scanned=False):
     """
     Return reduced copy of `items`
 
@@ -127,8 +363,12 @@ def filter_files(items, getter=lambda f: f, hidden=True, empty=True,
         (see `fnmatch`) that are matched against full paths
     include: Same as `exclude`, but instead of removing files, matching patterns
         keep files even if they match a pattern in `excluude
+    matcher: PathMatcher instance that is used instead of `exclude` and
+        `include`
     hidden: Whether to include hidden files
     empty: Whether to include empty files
+    scanned: Whether `items` are :class:`File` objects from :func:`scan_files`
+        so their size is known to be the size in the file system
     """
     def is_hidden(path):
         for name in str(path).split(os.sep):
@@ -136,21 +376,8 @@ def filter_files(items, getter=lambda f: f, hidden=True, empty=True,
                 return True
         return False
 
-    def is_excluded(path,
-                    ex_regexs=tuple(x for x in exclude if isinstance(x, typing.Pattern)),
-                    ex_globs=tuple(x for x in exclude if isinstance(x, str)),
-                    in_regexs=tuple(i for i in include if isinstance(i, typing.Pattern)),
-                    in_globs=tuple(i for i in include if isinstance(i, str))):
-        # Include patterns take precedence over exclude pattersn
-        if any(r.search(str(path)) for r in in_regexs):
-            return False
-        elif any(fnmatch.fnmatch(str(path).casefold(), g.casefold()) for g in in_globs):
-            return False
-        elif any(r.search(str(path)) for r in ex_regexs):
-            return True
-        elif any(fnmatch.fnmatch(str(path).casefold(), g.casefold()) for g in ex_globs):
-            return True
-        return False
+    if matcher is None:
+        matcher = PathMatcher(exclude=exclude, include=include)
 
     items = tuple(items)
     filepaths = tuple(getter(i) for i in items)
@@ -160,24 +387,145 @@ def filter_files(items, getter=lambda f: f, hidden=True, empty=True,
         basepath = pathlib.Path().cwd()
 
     items_filtered = []
-    for item in items:
-        filepath = getter(item)
-        relpath_without_base = pathlib.Path(os.path.relpath(filepath, basepath))
-        relpath_with_base = pathlib.Path(basepath.parent, filepath)
+    for item, filepath in zip(items, filepaths):
         # Exclude hidden files and directories, but not hidden directories in
         # `basepath`
-        if not hidden and is_hidden(relpath_without_base):
+        if not hidden and is_hidden(os.path.relpath(filepath, basepath)):
             continue
         # Exclude empty file
-        elif not empty and os.path.exists(filepath) and real_size(filepath) <= 0:
+        elif not empty and _is_empty(item, filepath, scanned):
             continue
         # Exclude file matching regex
-        elif is_excluded(relpath_with_base):
+        elif matcher.is_excluded(pathlib.Path(basepath.parent, filepath)):
             continue
         else:
             items_filtered.append(item)
     return items_filtered
 
+def _is_empty(item, filepath, scanned):
+    if scanned:
+        # Don't stat() again if we already know the size
+        return item.size <= 0
+    else:
+        return os.path.exists(filepath) and real_size(filepath) <= 0
+
+
+class PathMatcher:
+    """
+    Match paths against exclude and include patterns
+
+    Wildcard patterns (see `fnmatch`) are compiled into case-insensitive
+    regular expressions. Paths that don't end with the literal end of any
+    wildcard pattern are rejected without running a regular expression.
+    Regular expressions are combined where that doesn't change their
+    meaning.
+
+    exclude: Sequence of regular expressions or strings with wildcard characters
+        that are matched against full paths
+    include: Same as `exclude`, but matching paths are never excluded
+    """
+
+    def __init__(self, exclude=(), include=()):
+        exclude, include = tuple(exclude), tuple(include)
+        self._exclude_globs = self._compile_globs(x for x in exclude if isinstance(x, str))
+        self._exclude_regexs = self._combine_regexs(x for x in exclude if isinstance(x, typing.Pattern))
+        self._include_globs = self._compile_globs(i for i in include if isinstance(i, str))
+        self._include_regexs = self._combine_regexs(i for i in include if isinstance(i, typing.Pattern))
+        # Directories can only be skipped if no file beneath them can be
+        # included again. Globs that end with "*" match everything beneath a
+        # directory if they match the directory path with a trailing separator.
+        if include:
+            self._prune_globs = None
+        else:
+            self._prune_globs = self._compile_globs(
+                x for x in exclude
+                if isinstance(x, str) and x.endswith('*')
+            )
+
+    @staticmethod
+    def _compile_globs(globs):
+        # Return tuple of literal suffixes, regular expression for globs that
+        # end with those suffixes and regular expression for all other globs
+        # or None if there are no globs
+        suffixes, suffixed_patterns, other_patterns = [], [], []
+        for glob in globs:
+            glob = str(glob).casefold()
+            # Any path that matches the glob ends with what comes after the
+            # last wildcard
+            suffix = glob[max(glob.rfind(char) for char in '*?]') + 1:]
+            if suffix:
+                suffixes.append(suffix)
+                suffixed_patterns.append(fnmatch.translate(glob))
+            else:
+                other_patterns.append(fnmatch.translate(glob))
+
+        if suffixes or other_patterns:
+            return (
+                tuple(suffixes),
+                re.compile('|'.join(suffixed_patterns)) if suffixed_patterns else None,
+                re.compile('|'.join(other_patterns)) if other_patterns else None,
+            )
+
+    @staticmethod
+    def _match_globs(globs, path_casefolded):
+        suffixes, suffixed_regex, other_regex = globs
+        if suffixed_regex and path_casefolded.endswith(suffixes) and suffixed_regex.match(path_casefolded):
+            return True
+        elif other_regex and other_regex.match(path_casefolded):
+            return True
+        return False
+
+    # Global inline flags like "(?i)" must be at the start of a pattern
+    _global_flags_regex = re.compile(r'^\(\?[aiLmsux]+\)')
+
+    @classmethod
+    def _combine_regexs(cls, regexs):
+        # Patterns with groups may contain backreferences that would refer to
+        # different groups in a combined pattern
+        combinable = collections.defaultdict(list)
+        separate = []
+        for regex in regexs:
+            if (
+                isinstance(regex.pattern, str)
+                and regex.groups == 0
+                and not cls._global_flags_regex.match(regex.pattern)
+            ):
+                combinable[regex.flags].append(regex)
+            else:
+                separate.append(regex)
+
+        combined = []
+        for flags, group in combinable.items():
+            if len(group) == 1:
+                combined.append(group[0])
+            else:
+                try:
+                    combined.append(re.compile('|'.join(f'(?:{r.pattern})' for r in group), flags))
+                except re.error:
+                    combined.extend(group)
+        return tuple(combined + separate)
+
+    def is_excluded(self, path):
+        """Whether `path` matches any exclude pattern and no include pattern"""
+        path = str(path)
+        path_casefolded = path.casefold()
+        # Include patterns take precedence over exclude pattersn
+        if self._include_regexs and any(r.search(path) for r in self._include_regexs):
+            return False
+        elif self._include_globs and self._match_globs(self._include_globs, path_casefolded):
+            return False
+        elif self._exclude_regexs and any(r.search(path) for r in self._exclude_regexs):
+            return True
+        elif self._exclude_globs and self._match_globs(self._exclude_globs, path_casefolded):
+            return True
+        return False
+
+    def is_pruned(self, dirpath):
+        """Whether every path beneath directory `dirpath` is excluded"""
+        if self._prune_globs:
+            return self._match_globs(self._prune_globs, (str(dirpath) + os.sep).casefold())
+        return False
+
 
 class MonitoredList(collections.abc.MutableSequence):
     """List with change callback"""
@@ -198,6 +546,9 @@ class MonitoredList(collections.abc.MutableSequence):
     def __getitem__(self, index):
         return self._items[index]
 
+    def __iter__(self):
+        return iter(self._items)
+
     def __delitem__(self, index):
         del self._items[index]
         if self._callback is not None:
@@ -273,6 +624,21 @@ class MonitoredList(collections.abc.MutableSequence):
         return repr(self._items)
 
 
+def snapshot(value):
+    """
+    Return immutable copy of nested :class:`dict` and :class:`list` values
+
+    Snapshots of equal values are equal, so a snapshot can be compared to
+    a later snapshot to find out if `value` was changed in the meantime.
+    """
+    if isinstance(value, dict):
+        return (dict, tuple((key, snapshot(item)) for key, item in value.items()))
+    elif isinstance(value, (list, tuple)):
+        return (type(value), tuple(snapshot(item) for item in value))
+    else:
+        return value
+
+
 class File(os.PathLike):
     """Path-like that also stores the file size"""
 
@@ -440,6 +806,108 @@ class Filepaths(MonitoredList):
             super().insert(index, path)
 
 
+
+class PieceHashes(collections.abc.Sequence):
+    """
+    Read-only sequence of SHA1 piece hashes
+
+    Hashes are not copied from the concatenated `pieces` (:class:`bytes` or
+    other bytes-like object) until they are accessed. Indexing, slicing and
+    :func:`len` are O(1). Slices are :class:`PieceHashes` instances that share
+    the same memory.
+
+    Instances are equal to other instances with the same hashes and to
+    sequences of :class:`bytes` with the same items.
+
+    :raises ValueError: if the length of `pieces` is not divisible by 20
+    """
+
+    def __init__(self, pieces=b''):
+        if isinstance(pieces, memoryview):
+            pieces = pieces.cast('B')
+        elif not isinstance(pieces, bytes):
+            # Don't share mutable memory
+            pieces = bytes(pieces)
+        if len(pieces) % 20 != 0:
+            raise ValueError(f'Length of pieces is not divisible by 20: {len(pieces)}')
+        self._view = memoryview(pieces)
+
+    @property
+    def bytes(self):
+        """Concatenated hashes as :class:`bytes`"""
+        obj = self._view.obj
+        if isinstance(obj, bytes) and len(obj) == self._view.nbytes:
+            return obj
+        else:
+            return self._view.tobytes()
+
+    def __len__(self):
+        return len(self._view) // 20
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1:
+                return type(self)(self._view[start * 20:max(start, stop) * 20])
+            else:
+                return type(self)(b''.join(self[i] for i in range(start, stop, step)))
+        else:
+            length = len(self)
+            if index < 0:
+                index += length
+            if not 0 <= index < length:
+                raise IndexError('piece hash index out of range')
+            return self._view[index * 20:index * 20 + 20].tobytes()
+
+    def __iter__(self):
+        view = self._view
+        for pos in range(0, len(view), 20):
+            yield view[pos:pos + 20].tobytes()
+
+    def diff(self, other, block_size=1024):
+        """
+        Return indexes of hashes that are different in `other`
+
+        Indexes that exist only in one of both sequences are also different.
+
+        :param other: :class:`PieceHashes` instance, concatenated hashes as
+            :class:`bytes` or sequence of :class:`bytes`
+        :param int block_size: Number of hashes that are compared at once
+            before the hashes of a differing block are compared individually
+
+        :return: Sorted sequence of :class:`int`
+        """
+        if not isinstance(other, PieceHashes):
+            other = type(self)(other if isinstance(other, (bytes, bytearray, memoryview)) else b''.join(other))
+        a, b = self.bytes, other.bytes
+        common = min(len(a), len(b)) // 20
+        indexes = []
+        block_bytes = block_size * 20
+        for block_start in range(0, common * 20, block_bytes):
+            block_end = min(block_start + block_bytes, common * 20)
+            if a[block_start:block_end] != b[block_start:block_end]:
+                indexes.extend(
+                    pos // 20 for pos in range(block_start, block_end, 20)
+                    if a[pos:pos + 20] != b[pos:pos + 20]
+                )
+        indexes.extend(range(common, max(len(a), len(b)) // 20))
+        return tuple(indexes)
+
+    def __eq__(self, other):
+        if isinstance(other, PieceHashes):
+            return self.bytes == other.bytes
+        elif isinstance(other, collections.abc.Sequence) and not isinstance(other, (str, bytes, bytearray)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        else:
+            return NotImplemented
+
+    def __hash__(self):
+        return hash(self.bytes)
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.bytes!r})'
+
+
 def is_url(url):
     """Return whether `url` is a valid URL"""
     try:
@@ -776,6 +1244,165 @@ def decode_dict(dct):
     return dct_dec
 
 
+def bdecode_info_fields(data, fields):
+    """
+    Decode only some fields of the ``info`` dictionary in bencoded `data`
+
+    All other values, including ``pieces``, are skipped without creating any
+    objects for them.
+
+    :param data: Bencoded :class:`bytes` of a torrent file
+    :param fields: Sequence of ``info`` keys (:class:`str`)
+
+    :raises ValueError: if `data` is not a valid bencoded dictionary
+
+    :return: :class:`dict` that maps each found key in `fields` to its value,
+        decoded like :func:`decode_value` does
+    """
+    if data[:1] != b'd':
+        raise ValueError('Not a bencoded dictionary')
+    wanted = {field.encode('utf8') for field in fields}
+    found = {}
+    pos = 1
+    while data[pos:pos + 1] != b'e':
+        key, pos = _bdecode_string(data, pos)
+        if key == b'info' and data[pos:pos + 1] == b'd':
+            info, pos = _bdecode_dict(data, pos, wanted)
+            found = decode_dict(info)
+        else:
+            pos = _bdecode_skip(data, pos)
+    return found
+
+def bdecode_metainfo(data, info_fields=None):
+    """
+    Decode bencoded torrent `data`, skipping unwanted values in ``info``
+
+    Skipped values, including ``pieces`` if it is not in `info_fields`, are not
+    decoded and no objects are created for them. Nothing is decoded to
+    :class:`str`.
+
+    :param data: Bencoded :class:`bytes` of a torrent file
+    :param info_fields: Sequence of ``info`` keys (:class:`str`) or ``None``
+        to decode all of them
+
+    :raises ValueError: if `data` is not a valid bencoded dictionary
+
+    :return: `(metainfo, info_span)` tuple where `info_span` is the return
+        value of :func:`get_bencoded_info_span`
+    """
+    if data[:1] != b'd':
+        raise ValueError('Not a bencoded dictionary')
+    if info_fields is not None:
+        info_fields = {field.encode('utf8') for field in info_fields}
+    metainfo = {}
+    info_span = None
+    pos = 1
+    while data[pos:pos + 1] != b'e':
+        key, pos = _bdecode_string(data, pos)
+        if key == b'info' and data[pos:pos + 1] == b'd':
+            start = pos
+            metainfo[key], pos = _bdecode_dict(data, pos, info_fields)
+            info_span = (start, pos)
+        else:
+            metainfo[key], pos = _bdecode_value(data, pos)
+    if pos + 1 != len(data):
+        raise ValueError(f'Unexpected data at {pos + 1}')
+    return metainfo, info_span
+
+def get_bencoded_info_span(data):
+    """
+    Find the bencoded ``info`` dictionary in bencoded `data`
+
+    :param data: Bencoded :class:`bytes` of a torrent file
+
+    :raises ValueError: if `data` is not a valid bencoded dictionary
+
+    :return: `(start, end)` tuple so that ``data[start:end]`` is the
+        ``info`` dictionary exactly as it was encoded or ``None`` if there is
+        no ``info`` dictionary
+    """
+    if data[:1] != b'd':
+        raise ValueError('Not a bencoded dictionary')
+    pos = 1
+    while data[pos:pos + 1] != b'e':
+        key, pos = _bdecode_string(data, pos)
+        start = pos
+        pos = _bdecode_skip(data, pos)
+        if key == b'info' and data[start:start + 1] == b'd':
+            return start, pos
+    return None
+
+def _bdecode_string(data, pos):
+    colon = data.index(b':', pos)
+    length = data[pos:colon]
+    if not length.isdigit():
+        raise ValueError(f'Invalid string length at {pos}: {bytes(length)!r}')
+    end = colon + 1 + int(length)
+    if end > len(data):
+        raise ValueError(f'String at {pos} exceeds data')
+    return data[colon + 1:end], end
+
+def _bdecode_int(data, pos):
+    end = data.index(b'e', pos)
+    return int(data[pos + 1:end]), end + 1
+
+def _bdecode_dict(data, pos, keys=None):
+    # Decode dictionary at `pos`; if `keys` is not None, skip values of other keys
+    dct = {}
+    pos += 1
+    while data[pos:pos + 1] != b'e':
+        key, pos = _bdecode_string(data, pos)
+        if keys is None or key in keys:
+            dct[key], pos = _bdecode_value(data, pos)
+        else:
+            pos = _bdecode_skip(data, pos)
+    return dct, pos + 1
+
+def _bdecode_value(data, pos):
+    char = data[pos:pos + 1]
+    if char == b'd':
+        return _bdecode_dict(data, pos)
+    elif char == b'l':
+        lst = []
+        pos += 1
+        while data[pos:pos + 1] != b'e':
+            value, pos = _bdecode_value(data, pos)
+            lst.append(value)
+        return lst, pos + 1
+    elif char == b'i':
+        return _bdecode_int(data, pos)
+    elif char.isdigit():
+        return _bdecode_string(data, pos)
+    else:
+        raise ValueError(f'Invalid value at {pos}: {bytes(char)!r}')
+
+def _bdecode_skip(data, pos):
+    # Return position after the value at `pos` without decoding it
+    depth = 0
+    while True:
+        char = data[pos:pos + 1]
+        if char in (b'd', b'l'):
+            depth += 1
+            pos += 1
+        elif char == b'e' and depth > 0:
+            depth -= 1
+            pos += 1
+        elif char == b'i':
+            _, pos = _bdecode_int(data, pos)
+        elif char.isdigit():
+            colon = data.index(b':', pos)
+            length = data[pos:colon]
+            if not length.isdigit():
+                raise ValueError(f'Invalid string length at {pos}: {bytes(length)!r}')
+            pos = colon + 1 + int(length)
+            if pos > len(data):
+                raise ValueError('String exceeds data')
+        else:
+            raise ValueError(f'Invalid value at {pos}: {bytes(char)!r}')
+
+        if depth == 0:
+            return pos
+
 def encode_value(value):
     if type(value) in ENCODE_ALLOWED_TYPES:
         return value